@@ -0,0 +1,59 @@
+"""Compare FastAPI-style PlaneList validation with the parse_plane_list fast path.
+
+Run with: python benchmarks/bench_parse.py [planes]
+"""
+import json
+import sys
+import time
+import tracemalloc
+
+import orjson
+
+from adsb_api.utils.models import PlaneList, parse_plane_list
+
+
+def make_body(planes: int) -> bytes:
+    return orjson.dumps(
+        {
+            "planes": [
+                {"callsign": f"BAW{i}", "lat": 51.0 + i / 1000, "lng": -0.5 + i / 1000}
+                for i in range(planes)
+            ]
+        }
+    )
+
+
+def bench(name: str, fn, repeat: int = 2000):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    retained = sum(
+        stat.size for stat in tracemalloc.take_snapshot().statistics("filename")
+    )
+    tracemalloc.stop()
+    del result
+    print(
+        f"{name:>10}: {best * 1e6:8.1f} us, peak {peak / 1024:7.1f} KiB, "
+        f"result {retained / 1024:7.1f} KiB"
+    )
+
+
+def main():
+    planes = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    body = make_body(planes)
+    print(f"{planes} planes, {len(body)} bytes")
+
+    # What FastAPI does for a PlaneList body: stdlib json, then model validation
+    bench("fastapi", lambda: PlaneList.model_validate(json.loads(body)))
+    bench("pydantic", lambda: PlaneList.model_validate_json(body))
+    bench("fast path", lambda: parse_plane_list(body))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Compare the scalar plausible path with plausible_batch for one routeset request.
+
+Run with: python benchmarks/bench_plausible.py [planes] [legs]
+"""
+import asyncio
+import random
+import sys
+import time
+
+from adsb_api.utils.plausible import _plausible_sync, plausible, plausible_batch
+
+
+def make_request(planes: int, legs: int):
+    rnd = random.Random(42)
+    positions, routes = [], []
+    for _ in range(planes):
+        airports = [
+            {"lat": rnd.uniform(-60, 70), "lon": rnd.uniform(-180, 180)}
+            for _ in range(legs + 1)
+        ]
+        a, b = airports[0], airports[1]
+        t = rnd.random()
+        positions.append(
+            (a["lat"] + (b["lat"] - a["lat"]) * t, a["lon"] + (b["lon"] - a["lon"]) * t)
+        )
+        routes.append(airports)
+    return positions, routes
+
+
+async def scalar(positions, routes) -> list[bool]:
+    """The per-plane, per-leg path routeset used before plausible_batch."""
+    out = []
+    for (lat, lng), airports in zip(positions, routes):
+        ok = False
+        for a, b in zip(airports, airports[1:]):
+            if (
+                await plausible(
+                    round(lat, 3),
+                    round(lng, 3),
+                    round(a["lat"], 3),
+                    round(a["lon"], 3),
+                    round(b["lat"], 3),
+                    round(b["lon"], 3),
+                )
+            )[0]:
+                ok = True
+                break
+        out.append(ok)
+    return out
+
+
+def bench(name: str, fn, repeat: int = 200):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"{name:>8}: {best * 1e6:9.1f} us per request")
+
+
+def main():
+    planes = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    legs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    positions, routes = make_request(planes, legs)
+    print(f"{planes} planes x {legs} legs")
+
+    loop = asyncio.new_event_loop()
+
+    def run_scalar():
+        _plausible_sync.cache_clear()
+        loop.run_until_complete(scalar(positions, routes))
+
+    bench("scalar", run_scalar)
+    bench("batch", lambda: plausible_batch(positions, routes))
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
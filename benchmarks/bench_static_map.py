@@ -0,0 +1,110 @@
+"""Renders per second: StaticMapRenderer vs a Playwright tab from the browser pool.
+
+Run with: python benchmarks/bench_static_map.py [renders] [cdp_endpoint]
+
+The static renderer uses synthetic tiles in a temporary cache and no network.
+The browser path only runs when a CDP endpoint is given (e.g.
+ws://localhost:3000/?timeout=12000000) and renders live aircraft from re-api.
+"""
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image
+
+from adsb_api.utils.static_map import StaticMapRenderer, fit_zoom, to_pixel
+
+
+def make_aircraft(n: int) -> list[list[dict]]:
+    rnd = random.Random(42)
+    out = []
+    for i in range(n):
+        lat, lon = rnd.uniform(35, 60), rnd.uniform(-10, 30)
+        track = rnd.uniform(0, 360)
+        ac = {"hex": f"{i:06x}", "lat": lat, "lon": lon, "track": track}
+        out.append([{**ac, "flight": f"TEST{i}"}])
+    return out
+
+
+def box(ac: dict) -> tuple[float, float, float, float]:
+    return ac["lat"] - 0.005, ac["lon"] - 0.005, ac["lat"] + 0.005, ac["lon"] + 0.005
+
+
+def fill_tiles(tile_dir: Path, sets: list[list[dict]]):
+    tile = BytesIO()
+    Image.new("RGB", (256, 256), (200, 220, 200)).save(tile, format="PNG")
+    for (ac,) in sets:
+        z = fit_zoom(box(ac))
+        x, y = to_pixel(ac["lat"], ac["lon"], z)
+        for tx in range(int(x // 256) - 1, int(x // 256) + 2):
+            for ty in range(int(y // 256) - 1, int(y // 256) + 2):
+                path = tile_dir / str(z) / str(tx) / f"{ty}.png"
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(tile.getvalue())
+
+
+async def bench_static(sets: list[list[dict]]):
+    with tempfile.TemporaryDirectory() as tile_dir:
+        fill_tiles(Path(tile_dir), sets)
+        renderer = StaticMapRenderer(tile_dir=tile_dir)
+
+        async def no_trail(hex):
+            return []
+
+        renderer._trail = no_trail
+        start = time.perf_counter()
+        await asyncio.gather(*[renderer.render(ac, box(ac[0])) for ac in sets])
+        elapsed = time.perf_counter() - start
+    ms = elapsed / len(sets) * 1000
+    print(f"    static: {len(sets) / elapsed:8.1f} renders/s ({ms:.1f} ms each)")
+
+
+async def bench_browser(renders: int, endpoint: str):
+    from adsb_api.utils import api_tar
+    from adsb_api.utils.browser2 import (
+        BrowserTabPool,
+        before_add_to_pool_cb,
+        before_return_to_pool_cb,
+    )
+
+    pool = BrowserTabPool(
+        "https://adsb.lol/",
+        endpoints=[endpoint],
+        before_add_to_pool_cb=before_add_to_pool_cb,
+        before_return_to_pool_cb=before_return_to_pool_cb,
+    )
+    await pool.initialize()
+    session = await api_tar.get_http_session()
+    async with session.get(f"{api_tar.REAPI_ENDPOINT}?all") as r:
+        aircraft = (await r.json())["aircraft"]
+    hexes = [ac["hex"] for ac in aircraft if ac.get("lat") is not None][:renders]
+    bounds = await asyncio.gather(*[api_tar._find_bounds([h]) for h in hexes])
+    found = [f for f in bounds if f]
+
+    async def one(hex, bounds):
+        async with pool.get_tab() as tab:
+            await api_tar._render_png(tab, [hex], bounds)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one(ac[0]["hex"], bounds) for bounds, ac in found])
+    elapsed = time.perf_counter() - start
+    tabs = pool._total_tabs
+    print(f"   browser: {len(found) / elapsed:8.1f} renders/s ({tabs} tabs)")
+    await pool.shutdown()
+    await api_tar.close_http_session()
+
+
+def main():
+    renders = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    print(f"{renders} single-aircraft renders")
+    asyncio.run(bench_static(make_aircraft(renders)))
+    if len(sys.argv) > 2:
+        asyncio.run(bench_browser(renders, sys.argv[2]))
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,6 @@ import traceback
 import uuid
 from collections import defaultdict
 
-import aiohttp
 import h3
 import orjson
 from fastapi import FastAPI, Header, Request
@@ -18,28 +17,47 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi_cache import FastAPICache
 from fastapi_cache.backends.redis import RedisBackend
-from redis import asyncio as aioredis
 
+from adsb_api.utils import timing
 from adsb_api.utils.api_routes import router as routes_router
 from adsb_api.utils.api_tar import close_http_session as close_tar_http_session
+from adsb_api.utils.api_tar import prerender
 from adsb_api.utils.api_tar import router as tar_router
 from adsb_api.utils.api_v2 import router as v2_router
-from adsb_api.utils.dependencies import browser, feederData, provider, redisVRS
-from adsb_api.utils.models import ApiUuidRequest, PrettyJSONResponse
-from adsb_api.utils.settings import (INSECURE, REDIS_KEY_BEAST_CLIENTS, REDIS_KEY_BEAST_RECEIVERS, REDIS_KEY_HUB_AIRCRAFT, REDIS_KEY_MLAT_CLIENTS, REDIS_KEY_MLAT_SYNC, REDIS_KEY_MLAT_TOTALCOUNT, REDIS_HOST, SALT_BEAST,
-                                     SALT_MLAT, SALT_MY)
+from adsb_api.utils.dependencies import (
+    browser,
+    clientCache,
+    feederData,
+    photos,
+    provider,
+    redisConnections,
+    redisVRS,
+    screenshotJobs,
+    screenshotPrerenderer,
+    staticMap,
+)
+from adsb_api.utils.models import (
+    ApiUuidRequest,
+    CompactJSONResponse,
+    PrettyJSONMiddleware,
+)
+from adsb_api.utils.settings import (
+    INSECURE,
+    REDIS_KEY_BEAST_CLIENTS,
+    REDIS_KEY_BEAST_RECEIVERS,
+    REDIS_KEY_HUB_AIRCRAFT,
+    REDIS_KEY_MLAT_CLIENTS,
+    REDIS_KEY_MLAT_SYNC,
+    REDIS_KEY_MLAT_TOTALCOUNT,
+    REDIS_CLIENT_CACHE_SIZE,
+    REDIS_HOST,
+    SALT_BEAST,
+    SALT_MLAT,
+    SALT_MY,
+)
 
 PROJECT_PATH = pathlib.Path(__file__).parent.parent.parent
 
-# Shared aiohttp session for external HTTP requests
-_http_session: aiohttp.ClientSession | None = None
-
-async def get_http_session() -> aiohttp.ClientSession:
-    global _http_session
-    if _http_session is None:
-        _http_session = aiohttp.ClientSession()
-    return _http_session
-
 description = """
 The adsb.lol API is a free and open source
 API for the [adsb.lol](https://adsb.lol) project.
@@ -88,6 +106,7 @@ app = FastAPI(
     },
 )
 
+app.add_middleware(PrettyJSONMiddleware)
 app.include_router(v2_router)
 app.include_router(routes_router)
 app.include_router(tar_router)
@@ -131,13 +150,25 @@ def ensure_uuid_security():
 
 @app.on_event("startup")
 async def startup_event():
-    redis = aioredis.from_url(REDIS_HOST, encoding="utf8", decode_responses=True)
+    await redisConnections.connect()
+    redis = redisConnections.primary
+    if REDIS_CLIENT_CACHE_SIZE:
+        await clientCache.start(REDIS_HOST)
+        redis = clientCache.wrap(redis)
+        # Invalidations follow the primary: a lagging replica could refill old values
+        redisConnections.route_reads = False
     FastAPICache.init(RedisBackend(redis), prefix="api")
-    for i in (redisVRS, provider, feederData):
-        i.redis_connection_string = REDIS_HOST
+    for i in (redisVRS, provider, feederData, photos):
+        i.connections = redisConnections
     await provider.startup()
     await redisVRS.connect()
     await feederData.connect()
+    await photos.connect()
+    if REDIS_CLIENT_CACHE_SIZE:
+        for i in (provider, redisVRS, feederData):
+            i.redis = clientCache.wrap(i.redis)
+    await staticMap.connect()
+    await screenshotJobs.start(redisVRS.redis)
     await asyncio.sleep(1)
     await redisVRS.dispatch_background_task()
     await feederData.dispatch_background_task()
@@ -148,25 +179,28 @@ async def startup_event():
         print("browser.start() timed out after 5s - CDP browser may be unavailable")
     except Exception:
         traceback.print_exc()
+    await screenshotPrerenderer.start(prerender, browser)
 
     ensure_uuid_security()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    global _http_session
     await provider.shutdown()
     await redisVRS.shutdown()
+    await photos.shutdown()
+    await staticMap.shutdown()
+    await screenshotJobs.stop()
+    await screenshotPrerenderer.stop()
+    await clientCache.stop()
     await browser.shutdown()
+    await redisConnections.shutdown()
     await close_tar_http_session()
-    if _http_session:
-        await _http_session.close()
-        _http_session = None
 
 
 @app.get(
     "/api/0/mlat-server/{server}/sync.json",
-    response_class=PrettyJSONResponse,
+    response_class=CompactJSONResponse,
     include_in_schema=False,
 )
 async def mlat_receivers(
@@ -184,12 +218,12 @@ async def mlat_receivers(
         print(f"failed mlat_sync host={host}, server={server} (not in {mlat_sync.keys()})")
         return {"error": "not found"}
 
-    return mlat_sync[server]
+    return CompactJSONResponse(mlat_sync[server])
 
 
 @app.get(
     "/api/0/mlat-server/totalcount.json",
-    response_class=PrettyJSONResponse,
+    response_class=CompactJSONResponse,
     include_in_schema=False,
 )
 async def mlat_totalcount_json():
@@ -199,36 +233,84 @@ async def mlat_totalcount_json():
 @app.get("/metrics", include_in_schema=False)
 async def metrics():
     # Parallel JSON gets with parsing
-    data = await provider._json_gets([REDIS_KEY_BEAST_CLIENTS, REDIS_KEY_BEAST_RECEIVERS, REDIS_KEY_MLAT_CLIENTS, REDIS_KEY_HUB_AIRCRAFT])
+    data, screenshot_queue = await asyncio.gather(
+        provider._json_gets(
+            [
+                REDIS_KEY_BEAST_CLIENTS,
+                REDIS_KEY_BEAST_RECEIVERS,
+                REDIS_KEY_MLAT_CLIENTS,
+                REDIS_KEY_HUB_AIRCRAFT,
+            ]
+        ),
+        screenshotJobs.queue_depth(),
+    )
     aircraft_count = data.get(REDIS_KEY_HUB_AIRCRAFT)
 
     metrics = [
-        "adsb_api_beast_total_receivers {}".format(len(data.get(REDIS_KEY_BEAST_RECEIVERS) or [])),
-        "adsb_api_beast_total_clients {}".format(len(data.get(REDIS_KEY_BEAST_CLIENTS) or [])),
+        "adsb_api_beast_total_receivers {}".format(
+            len(data.get(REDIS_KEY_BEAST_RECEIVERS) or [])
+        ),
+        "adsb_api_beast_total_clients {}".format(
+            len(data.get(REDIS_KEY_BEAST_CLIENTS) or [])
+        ),
         *[
             'adsb_api_mlat_total{{server="{0}"}} {1}'.format(server, len(clients))
             for server, clients in (data.get(REDIS_KEY_MLAT_CLIENTS) or {}).items()
         ],
         f"adsb_api_aircraft_total {int(aircraft_count) if aircraft_count else 0}",
+        *[
+            f'adsb_api_snapshot_cache_total{{result="{result}"}} {count}'
+            for result, count in sorted(provider.snapshot_stats.items())
+        ],
+        *[
+            f'adsb_api_client_cache_total{{event="{event}"}} {count}'
+            for event, count in sorted(clientCache.stats.items())
+        ],
+        f"adsb_api_client_cache_entries {len(clientCache)}",
+        *[
+            f'adsb_api_redis_reads_total{{target="{target}"}} {count}'
+            for target, count in sorted(redisConnections.stats.items())
+        ],
+        f"adsb_api_redis_replicas_healthy {redisConnections.healthy_replicas()}",
+        *[
+            f'adsb_api_route_cache_total{{layer="{layer}",result="{result}"}} {count}'
+            for (layer, result), count in sorted(redisVRS.cache_stats.items())
+        ],
+        f"adsb_api_screenshot_queue_depth {screenshot_queue}",
+        f"adsb_api_screenshot_rendering {screenshotJobs.rendering}",
+        f"adsb_api_screenshot_waiting {screenshotJobs.waiting()}",
+        *[
+            f'adsb_api_screenshot_jobs_total{{event="{event}"}} {count}'
+            for event, count in sorted(screenshotJobs.stats.items())
+        ],
+        *[
+            f'adsb_api_screenshot_prerender_total{{event="{event}"}} {count}'
+            for event, count in sorted(screenshotPrerenderer.stats.items())
+        ],
+        *[
+            f"adsb_api_browser_{name} {value}"
+            for name, value in browser.stats().items()
+        ],
+        *[
+            f'adsb_api_browser_endpoint_{name}{{endpoint="{b["endpoint"]}"}} {value}'
+            for b in browser.browser_stats()
+            for name, value in b.items()
+            if name != "endpoint"
+        ],
+        *timing.metrics_lines(),
     ]
     return Response(content="\n".join(metrics), media_type="text/plain")
 
 
 @app.get(
     "/0/me",
-    response_class=PrettyJSONResponse,
+    response_class=CompactJSONResponse,
     tags=["v0"],
     summary="Information about your receiver and global stats",
 )
 async def api_me(request: Request):
     client_ip = request.client.host
-    my_beast_clients, mlat_clients = await asyncio.gather(
-        provider.get_clients_per_client_ip(client_ip),
-        provider.mlat_clients_to_list(client_ip),
-    )
-
-    data = await provider._json_gets([REDIS_KEY_MLAT_CLIENTS, REDIS_KEY_BEAST_CLIENTS, REDIS_KEY_HUB_AIRCRAFT])
-    mlat_data, beast_data, aircraft_count = data.get(REDIS_KEY_MLAT_CLIENTS) or {}, data.get(REDIS_KEY_BEAST_CLIENTS) or {}, data.get(REDIS_KEY_HUB_AIRCRAFT)
+    my_beast_clients, mlat_clients, counts = await provider.get_me(client_ip)
 
     response = {
         "_motd": [],
@@ -236,11 +318,7 @@ async def api_me(request: Request):
             "beast": my_beast_clients,
             "mlat": mlat_clients,
         },
-        "global": {
-            "beast": len(beast_data),
-            "mlat": sum([len(i) for i in mlat_data.values()]),
-            "aircraft": int(aircraft_count) if aircraft_count else 0,
-        },
+        "global": counts,
     }
 
     # If any of the clients.beast.ms = -1, they PROBABLY do not use beast_reduce_plus_out
@@ -255,7 +333,7 @@ async def api_me(request: Request):
             "WARNING: Some of your mlat clients have bad sync timeout. Please check your mlat configuration."
         )
     # If any bad
-    return response
+    return CompactJSONResponse(response)
 
 @app.get("/0/my", tags=["v0"], summary="My Map redirect based on IP")
 @app.get("/api/0/my", tags=["v0"], summary="My Map redirect based on IP", include_in_schema=False)
@@ -276,7 +354,7 @@ async def api_my(request: Request):
 
 
 @app.get(
-    "/data/receiver.json", response_class=PrettyJSONResponse, include_in_schema=False
+    "/data/receiver.json", response_class=CompactJSONResponse, include_in_schema=False
 )
 async def receiver_json(
     host: str | None = Header(default=None, include_in_schema=False)
@@ -290,65 +368,34 @@ async def receiver_json(
     # ret.update(feederData.additional_receiver_params)
 
     uids = host.split(".")[0].split("_")
-
-    for uid in uids:
-        # try getting receiver for uid
-        receiver = await feederData.redis.get(f"my:{uid}")
-        if receiver:
-            receiver = receiver.decode()[:18]
-        else:
-            continue
-
-        rdata = await feederData.redis.get(f"receiver:{receiver}")
-        if rdata:
-            rdata = orjson.loads(rdata.decode())
-            ret["lat"], ret["lon"] = round(rdata[8], 1), round(rdata[9], 1)
-            break
+    if rdata := await feederData.get_my_receiver(uids):
+        ret["lat"], ret["lon"] = round(rdata[8], 1), round(rdata[9], 1)
     return ret
 
 
 @app.get(
     "/data/aircraft.json",
-    response_class=PrettyJSONResponse,
+    response_class=CompactJSONResponse,
     include_in_schema=False,
 )
 async def aircraft_json(
     host: str | None = Header(default=None, include_in_schema=False)
 ):
     uids = host.split(".")[0].split("_")
-    ac = []
-    for uid in uids:
-        # we need to find the name of a redis key by its value!
-        receiver = await feederData.redis.get(f"my:{uid}")
-        if receiver:
-            receiver = receiver.decode()[:18]
-        else:
-            continue
-
-        if receiver:
-            data = await feederData.get_aircraft(receiver)
-            if data is not None:
-                # remove key recentReceiverIds if it exists
-                for aircraft in data:
-                    try:
-                        del aircraft["recentReceiverIds"]
-                    except KeyError:
-                        pass
-                ac.extend(data)
-    return {
+    return CompactJSONResponse({
         "now": int(time.time()),
         "messages": 0,
-        "aircraft": ac,
-    }
+        "aircraft": orjson.Fragment(await feederData.get_my_aircraft(uids)),
+    })
 
 
 # An API 1:1 caching https://api.planespotters.net/pub/photos/hex/<hex> for 1h
-# Watch out! It passes also ?icaoType and ?reg to the API
+# ?icaoType and ?reg are passed to the API, but the cache is keyed by hex only
 
 
 @app.get(
     "/0/planespotters_net/hex/{hex}",
-    response_class=PrettyJSONResponse,
+    response_class=CompactJSONResponse,
     include_in_schema=False,
     tags=["v0"],
 )
@@ -357,23 +404,7 @@ async def planespotters_net_hex(
     reg: str = "",
     icaoType: str = "",
 ):
-    # make a params out of the query params
-    params = {"icaoType": icaoType, "reg": reg}
-    redis_key = f"planespotters_net_hex:{hex}:{icaoType}:{reg}"
-    # check if we have a cached response
-
-    if cache := await redisVRS.redis.get(redis_key):
-        return orjson.loads(cache)
-    # if not, query the API (using shared session)
-    session = await get_http_session()
-    async with session.get(
-        f"https://api.planespotters.net/pub/photos/hex/{hex}",
-        params=params,
-    ) as response:
-        if response.status == 200:
-            await redisVRS.redis.setex(redis_key, 3600, orjson.dumps(await response.json()))
-            return await response.json()
-        return {"error": "not found"}
+    return Response(await photos.get(hex, reg, icaoType), media_type="application/json")
 
 
 @app.options("/0/planespotters_net/hex/{hex}", include_in_schema=False)
@@ -0,0 +1,72 @@
+from bisect import bisect_left
+from collections import defaultdict
+
+import h3
+
+# ~69 km average edge: a ring search touches a few cells for typical radii
+AIRPORT_INDEX_H3_RES = 3
+_EDGE_KM = h3.average_hexagon_edge_length(AIRPORT_INDEX_H3_RES, "km")
+
+
+class AirportIndex:
+    """In-memory airport lookups: H3 cells for proximity, ICAO, IATA and name maps."""
+
+    def __init__(self, airports: list[dict]):
+        self.airports = airports
+        self._by_icao = {a["icao"].upper(): a for a in airports}
+        self._by_iata = {a["iata"].upper(): a for a in airports if a["iata"]}
+        self._names = sorted((a["name"].lower(), i) for i, a in enumerate(airports))
+        self._name_keys = [name for name, _ in self._names]
+        self._cells = defaultdict(list)
+        for a in airports:
+            self._cells[
+                h3.latlng_to_cell(a["lat"], a["lon"], AIRPORT_INDEX_H3_RES)
+            ].append(a)
+
+    def __len__(self) -> int:
+        return len(self.airports)
+
+    def nearest(
+        self, lat: float, lon: float, limit: int = 5, radius_km: float = 250
+    ) -> list[dict]:
+        """Up to limit airports within radius_km of (lat, lon), closest first."""
+        origin = h3.latlng_to_cell(lat, lon, AIRPORT_INDEX_H3_RES)
+        found = []
+        k = 0
+        while True:
+            for cell in h3.grid_ring(origin, k):
+                for a in self._cells.get(cell, ()):
+                    d = h3.great_circle_distance((lat, lon), (a["lat"], a["lon"]), "km")
+                    if d <= radius_km:
+                        found.append((d, a))
+            # Anything in ring k + 1 is at least this far away, wherever the point sits
+            ring_min_km = _EDGE_KM * (1.5 * (k + 1) - 2)
+            if ring_min_km > radius_km:
+                break
+            if (
+                len(found) >= limit
+                and sorted(d for d, _ in found)[limit - 1] <= ring_min_km
+            ):
+                break
+            k += 1
+        found.sort(key=lambda item: item[0])
+        return [{**a, "distance_km": round(d, 2)} for d, a in found[:limit]]
+
+    def search(self, query: str, limit: int = 10) -> list[dict]:
+        """Exact ICAO / IATA matches first, then airports whose name starts with it."""
+        q = query.strip()
+        results = [
+            a for a in (self._by_icao.get(q.upper()), self._by_iata.get(q.upper())) if a
+        ]
+        prefix = q.lower()
+        i = bisect_left(self._name_keys, prefix)
+        while (
+            len(results) < limit
+            and i < len(self._names)
+            and self._name_keys[i].startswith(prefix)
+        ):
+            a = self.airports[self._names[i][1]]
+            if a not in results:
+                results.append(a)
+            i += 1
+        return results[:limit]
@@ -1,9 +1,16 @@
-from fastapi import APIRouter, Response
-from adsb_api.utils.models import PrettyJSONResponse
+from fastapi import APIRouter, Path, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from adsb_api.utils.models import CompactJSONResponse
 from adsb_api.utils.dependencies import redisVRS
-from adsb_api.utils.models import PlaneList
-from adsb_api.utils.plausible import plausible
+from adsb_api.utils.models import (
+    PLANE_LIST_OPENAPI,
+    parse_plane_list,
+    parse_planes,
+    valid_position,
+)
+from adsb_api.utils.settings import ROUTESET_BULK_MAX_PLANES
 import asyncio
+import orjson
 
 CORS_HEADERS = {
     "Access-Control-Allow-Origin": "*",
@@ -11,43 +18,139 @@ CORS_HEADERS = {
     "Access-Control-Allow-Headers": "access-control-allow-origin,content-type",
 }
 
-router = APIRouter(prefix="/api", tags=["v0"])
-
-
-async def calc_plausible(route, lat: float, lng: float) -> bool:
-    for i in range(len(route.get("_airports", [])) - 1):
-        a, b = route["_airports"][i], route["_airports"][i + 1]
-        if await plausible(round(lat, 3), round(lng, 3), round(a["lat"], 3), round(a["lon"], 3), round(b["lat"], 3), round(b["lon"], 3)):
-            return True
-    return False
-
+ROUTESET_BULK_CHUNK = 100
 
-async def get_route_cached_or_fetch(callsign: str, lat: float, lng: float) -> dict:
-    """Get route from cache or fetch, with plausible calculation."""
-    if cached := await redisVRS.get_cached_route(callsign):
-        return cached
-
-    route = await redisVRS.get_route(callsign)
-    if route["airport_codes"] != "unknown":
-        route["plausible"] = await calc_plausible(route, lat, lng)
-        await redisVRS.cache_route(callsign, route["plausible"], route)
-    return route
+router = APIRouter(prefix="/api", tags=["v0"])
 
 
-@router.get("/0/airport/{icao}", response_class=PrettyJSONResponse, tags=["v0"],
+def _parse_bulk_planes(body: bytes, ndjson: bool) -> list[tuple[str, float, float]]:
+    """Planes from an NDJSON body (one per line), a JSON array or {"planes": [...]}."""
+    if ndjson:
+        return parse_planes(
+            orjson.loads(line) for line in body.splitlines() if line.strip()
+        )
+    if body.lstrip().startswith(b"{"):
+        return parse_plane_list(body)
+    return parse_planes(orjson.loads(body))
+
+
+async def _stream_routes(planes: list[tuple[str, float, float]]):
+    for i in range(0, len(planes), ROUTESET_BULK_CHUNK):
+        routes = await redisVRS.resolve_routes(planes[i:i + ROUTESET_BULK_CHUNK])
+        yield b"\n".join(routes.values()) + b"\n"
+
+
+@router.get(
+    "/0/airport/nearest/{lat}/{lon}",
+    response_class=CompactJSONResponse,
+    tags=["v0"],
+    summary="Airports nearest to a point",
+    description="Data by https://github.com/vradarserver/standing-data/",
+)
+async def api_airport_nearest(
+    lat: float = Path(..., examples=51.47, ge=-90, le=90),
+    lon: float = Path(..., examples=-0.46, ge=-180, le=180),
+    limit: int = Query(5, ge=1, le=50),
+    radius_km: float = Query(250, gt=0, le=1000),
+):
+    return (await redisVRS.get_airport_index()).nearest(lat, lon, limit, radius_km)
+
+
+@router.get("/0/airport/search", response_class=CompactJSONResponse, tags=["v0"],
+            summary="Airports by ICAO, IATA or name prefix", description="Data by https://github.com/vradarserver/standing-data/")
+async def api_airport_search(
+    q: str = Query(..., min_length=2, examples="heathrow"),
+    limit: int = Query(10, ge=1, le=50),
+):
+    return (await redisVRS.get_airport_index()).search(q, limit)
+
+
+@router.get("/0/airport/{icao}", response_class=CompactJSONResponse, tags=["v0"],
             summary="Airports by ICAO", description="Data by https://github.com/vradarserver/standing-data/")
 async def api_airport(icao: str):
     return await redisVRS.get_airport(icao)
 
 
-@router.get("/0/route/{callsign}/{lat}/{lng}", response_class=PrettyJSONResponse, tags=["v0"],
-            summary="Route plus plausible flag", description="Data by https://github.com/vradarserver/standing-data/",
-            include_in_schema=False)
+_ROUTE_INDEX_DESCRIPTION = (
+    "Data by https://github.com/vradarserver/standing-data/. "
+    "With `live=true`, only routes of aircraft airborne right now are returned, "
+    "each with a `live` position."
+)
+
+
+async def _indexed_routes(index: str, key: str, live: bool, offset: int, limit: int):
+    routes = await redisVRS.get_indexed_routes(index, key.upper(), live, offset, limit)
+    return CompactJSONResponse(
+        content=[orjson.Fragment(r) for r in routes], headers=CORS_HEADERS
+    )
+
+
+@router.get("/0/routes/airport/{icao}", response_class=CompactJSONResponse, tags=["v0"],
+            summary="Routes serving an airport", description=_ROUTE_INDEX_DESCRIPTION)
+async def api_routes_airport(
+    icao: str,
+    live: bool = False,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=1000),
+):
+    return await _indexed_routes("airport", icao, live, offset, limit)
+
+
+@router.get(
+    "/0/routes/airline/{airline_code}",
+    response_class=CompactJSONResponse,
+    tags=["v0"],
+    summary="Routes of an airline (ICAO code, e.g. BAW)",
+    description=_ROUTE_INDEX_DESCRIPTION,
+)
+async def api_routes_airline(
+    airline_code: str,
+    live: bool = False,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=1000),
+):
+    return await _indexed_routes("airline", airline_code, live, offset, limit)
+
+
+@router.get(
+    "/0/routes/pair/{origin}/{destination}",
+    response_class=CompactJSONResponse,
+    tags=["v0"],
+    summary="Routes flying from one airport to another",
+    description=_ROUTE_INDEX_DESCRIPTION,
+)
+async def api_routes_pair(
+    origin: str,
+    destination: str,
+    live: bool = False,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=1000),
+):
+    return await _indexed_routes("pair", f"{origin}-{destination}", live, offset, limit)
+
+
+@router.get(
+    "/0/route/{callsign}/{lat}/{lng}",
+    response_class=CompactJSONResponse,
+    tags=["v0"],
+    summary="Route plus plausible flag",
+    description="Data by https://github.com/vradarserver/standing-data/",
+    include_in_schema=False,
+)
 async def api_route3(callsign: str, lat: str, lng: str):
-    return PrettyJSONResponse(content=await get_route_cached_or_fetch(callsign, float(lat), float(lng)), headers=CORS_HEADERS)
-
-
-@router.get("/0/route/{callsign}", response_class=PrettyJSONResponse, tags=["v0"],
+    try:
+        position = float(lat), float(lng)
+    except ValueError:
+        return Response(status_code=400, headers=CORS_HEADERS)
+    if not valid_position(*position):
+        return Response(status_code=400, headers=CORS_HEADERS)
+    routes = await redisVRS.resolve_routes([(callsign, *position)])
+    return CompactJSONResponse(
+        content=orjson.Fragment(routes[callsign]), headers=CORS_HEADERS
+    )
+
+
+@router.get("/0/route/{callsign}", response_class=CompactJSONResponse, tags=["v0"],
             summary="Route for callsign", description="Data by https://github.com/vradarserver/standing-data/",
             include_in_schema=False)
 async def api_route(callsign: str):
@@ -55,33 +158,52 @@ async def api_route(callsign: str):
     return Response(status_code=302, headers={"Location": f"https://vrs-standing-data.adsb.lol/routes/{callsign[:2]}/{callsign}.json#deprecated"})
 
 
-@router.post("/0/routeset", response_class=PrettyJSONResponse, tags=["v0"])
-async def api_routeset(planeList: PlaneList):
-    if not planeList.planes or len(planeList.planes) > 100:
+@router.post(
+    "/0/routeset",
+    response_class=CompactJSONResponse,
+    tags=["v0"],
+    openapi_extra=PLANE_LIST_OPENAPI,
+)
+async def api_routeset(request: Request):
+    try:
+        planes = parse_plane_list(await request.body())
+    except ValueError as e:
+        # Schema errors keep the 422 clients got from FastAPI's body validation
+        detail = [{"type": "value_error", "loc": ["body"], "msg": str(e)}]
+        return CompactJSONResponse(content={"detail": detail}, status_code=422)
+    if not planes or len(planes) > 100:
         return Response(status_code=400)
 
-    callsigns = [p.callsign for p in planeList.planes]
-    cached = await redisVRS.get_cached_routes_bulk(callsigns)
-    uncached = [cs for cs in callsigns if not cached.get(cs)]
-    fetched = await redisVRS.get_routes_bulk(uncached) if uncached else {}
-
-    # Merge routes, track uncached for parallel plausible
-    routes, tasks = {}, []
-    for p in planeList.planes:
-        r = cached.get(p.callsign) or fetched.get(p.callsign) or {"callsign": p.callsign, "airport_codes": "unknown", "_airports": []}
-        routes[p.callsign] = r
-        if p.callsign in uncached and r["airport_codes"] != "unknown":
-            tasks.append((p.callsign, r, p.lat, p.lng))
-
-    # Parallel plausible + cache
-    if tasks:
-        for (cs, r, lat, lng), is_plausible in zip(tasks, await asyncio.gather(*(calc_plausible(r, lat, lng) for _, r, lat, lng in tasks))):
-            r["plausible"] = is_plausible
-        await asyncio.gather(*(redisVRS.cache_route(cs, routes[cs]["plausible"], routes[cs]) for cs, _, _, _ in tasks))
-
-    return PrettyJSONResponse(content=list(routes.values()), headers=CORS_HEADERS)
-
-
+    routes = await redisVRS.resolve_routes(planes)
+    return CompactJSONResponse(
+        content=[orjson.Fragment(r) for r in routes.values()], headers=CORS_HEADERS
+    )
+
+
+@router.post(
+    "/0/routeset/bulk",
+    tags=["v0"],
+    summary="Routes for many planes as NDJSON",
+    description="Accepts NDJSON (one plane per line, "
+    "`Content-Type: application/x-ndjson`) or a JSON array of planes, "
+    f"up to {ROUTESET_BULK_MAX_PLANES}. "
+    "Streams one compact route per line as chunks are resolved.",
+)
+async def api_routeset_bulk(request: Request):
+    ndjson = request.headers.get("content-type", "").startswith("application/x-ndjson")
+    try:
+        planes = _parse_bulk_planes(await request.body(), ndjson)
+    except (ValueError, TypeError):
+        return Response(status_code=400, headers=CORS_HEADERS)
+    if not planes or len(planes) > ROUTESET_BULK_MAX_PLANES:
+        return Response(status_code=400, headers=CORS_HEADERS)
+
+    return StreamingResponse(
+        _stream_routes(planes), media_type="application/x-ndjson", headers=CORS_HEADERS
+    )
+
+
+@router.options("/0/routeset/bulk", include_in_schema=False)
 @router.options("/0/routeset", include_in_schema=False)
 async def api_routeset_options():
     return Response(status_code=200, headers=CORS_HEADERS)
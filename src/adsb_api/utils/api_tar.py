@@ -2,19 +2,37 @@
 # boom!
 
 import asyncio
-import base64
+import math
 import time
 import traceback
+import zipfile
+from io import BytesIO
 
 import aiohttp
 from async_timeout import timeout
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Query, Request
 from fastapi.responses import FileResponse, Response
 from fastapi_cache.decorator import cache
 from playwright.async_api import async_playwright
 
-from adsb_api.utils.dependencies import browser, redisVRS
-from adsb_api.utils.settings import REAPI_ENDPOINT
+from adsb_api.utils import timing
+from adsb_api.utils.dependencies import (
+    browser,
+    redisVRS,
+    screenshotJobs,
+    screenshotPrerenderer,
+    staticMap,
+)
+from adsb_api.utils.images import MEDIA_TYPES, etag, image_variants
+from adsb_api.utils.models import ScreenshotBatchRequest
+from adsb_api.utils.settings import (
+    REAPI_ENDPOINT,
+    SCREENSHOT_BATCH_MAX,
+    SCREENSHOT_FORMATS,
+    SCREENSHOT_PRERENDER_TAB_WAIT,
+    SCREENSHOT_SIZES,
+    SCREENSHOT_TTL,
+)
 
 router = APIRouter(
     prefix="/0",
@@ -37,6 +55,34 @@ async def close_http_session():
         _http_session = None
 
 
+def _pick_variant(
+    request: Request, size: int | None, fmt: str | None
+) -> tuple[int, str] | None:
+    """(size, format) from the query, else by Accept; None if we do not generate it."""
+    size = size or SCREENSHOT_SIZES[0]
+    if fmt is None:
+        accept = request.headers.get("accept", "")
+        fmt = (
+            "webp"
+            if "image/webp" in accept and "webp" in SCREENSHOT_FORMATS
+            else SCREENSHOT_FORMATS[0]
+        )
+    if size not in SCREENSHOT_SIZES or fmt not in SCREENSHOT_FORMATS:
+        return None
+    return size, fmt
+
+
+def _image_response(request: Request, data: bytes, fmt: str) -> Response:
+    headers = {
+        "ETag": etag(data),
+        "Cache-Control": f"public, max-age={SCREENSHOT_TTL}",
+        "Vary": "Accept",
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return Response(data, media_type=MEDIA_TYPES[fmt], headers=headers)
+
+
 @router.get(
     "/screenshot/",
     responses={200: {"content": {"image/png": {}}}},
@@ -50,140 +96,232 @@ async def close_http_session():
     include_in_schema=False,
 )
 async def get_new_screenshot(
+    request: Request,
     icao: str,
     trace: bool = False,
+    size: int | None = None,
+    fmt: str | None = Query(None, alias="format"),
+    debug: bool = False,
 ) -> Response:
-    icaos = icao.lower().split(",")
-    for icao in icaos:
-        if len(icao) == 6:
-            if all(c in "0123456789abcdef" for c in icao):
-                continue
-        elif len(icao) == 7:
-            if icao[0] != "~":
-                return Response(status_code=400)
-            if all(c in "0123456789abcdef" for c in icao[1:]):
-                continue
-        return Response(status_code=400)
+    spans = timing.collect()
+    response = await _screenshot(request, icao, trace, size, fmt)
+    if debug:
+        response.headers["Server-Timing"] = timing.server_timing(spans)
+    return response
+
 
+async def _find_bounds(
+    icaos: list[str],
+) -> tuple[tuple[float, float, float, float], list[dict]] | None:
+    """(min_lat, min_lon, max_lat, max_lon) around the aircraft from re-api, and those
+    with a position, or None without a fix."""
     min_lat, min_lon, max_lat, max_lon = False, False, False, False
+    positioned = []
     # get the min and max lat/lon from re-api
     session = await get_http_session()
-    async with session.get(f"{REAPI_ENDPOINT}/?find_hex={','.join(icaos)}") as response:
-        data = await response.json()
+    with timing.span("find_hex"):
+        async with session.get(
+            f"{REAPI_ENDPOINT}/?find_hex={','.join(icaos)}"
+        ) as response:
+            data = await response.json()
         for aircraft in data["aircraft"]:
             if not aircraft.get("lat") or not aircraft.get("lon"):
                 continue
+            positioned.append(aircraft)
             min_lat = min(min_lat, aircraft["lat"]) if min_lat else aircraft["lat"]
             min_lon = min(min_lon, aircraft["lon"]) if min_lon else aircraft["lon"]
             max_lat = max(max_lat, aircraft["lat"]) if max_lat else aircraft["lat"]
             max_lon = max(max_lon, aircraft["lon"]) if max_lon else aircraft["lon"]
-    # if they are still not set, return 404. we can't get a fix, so we can't get a screenshot. sorry.
     if not min_lat or not min_lon or not max_lat or not max_lon:
-        return Response(status_code=404)
+        return None
     # make sure, in case of 1 aircraft, that we have a 1km box
     if len(icaos) == 1:
         min_lat, min_lon = min_lat - 0.005, min_lon - 0.005
         max_lat, max_lon = max_lat + 0.005, max_lon + 0.005
+    return (min_lat, min_lon, max_lat, max_lon), positioned
+
 
+async def _render_png(
+    tab,
+    icaos: list[str],
+    bounds: tuple[float, float, float, float],
+    deselect: bool = False,
+) -> bytes:
+    """Select the aircraft in a pooled tab, fit the view to bounds, wait and capture.
+
+    With deselect, planes selected by a previous render on the same tab are
+    dropped first.
+    """
+    min_lat, min_lon, max_lat, max_lon = bounds
+    icao = ",".join(icaos)
+    try:
+        start_js = "deselectAllPlanes();" if deselect else ""
+        start_js += (
+            "window._alol_mapcentered = false;window._alol_maploaded = false;"
+            "window._alol_viewadjusted = false;window._are_tiles_loaded = false;"
+            "window._alol_loading = 0; window._alol_loaded = 0;"
+            "window._alol_viewadjusted=false;"
+        )
+        other_planes_js = "".join(
+            [
+                f'selectPlaneByHex("{icao}", {{noDeselect: true}});'
+                for icao in icaos
+            ]
+        )
+        # function adjustViewSelectedPlanes(maxLat, maxLon, minLat, minLon) {
+        other_planes_js += f"""
+            window.__alol_adjustViewSelectedPlanes = function() {{
+                let maxLat = {max_lat}; let maxLon = {max_lon};
+                let minLat = {min_lat}; let minLon = {min_lon};
+                let topRight = ol.proj.fromLonLat([maxLon, maxLat]);
+                let bottomLeft = ol.proj.fromLonLat([minLon, minLat]);
+                let newCenter = [
+                    (topRight[0] + bottomLeft[0]) / 2,
+                    (topRight[1] + bottomLeft[1]) / 2,
+                ];
+                let longerSide = Math.max(
+                    Math.abs(topRight[0] - bottomLeft[0]),
+                    Math.abs(topRight[1] - bottomLeft[1]),
+                );
+                longerSide = Math.max(longerSide, 60 * 1000);
+                let newZoom = Math.floor(Math.log2(6e7 / longerSide));
+                console.log('newCenter: ' + newCenter);
+                console.log('newZoom: ' + newZoom);
+                if(newZoom > 13) newZoom = 13;
+                OLMap.getView().setCenter(newCenter);
+                OLMap.getView().setZoom(newZoom);
+                window._alol_viewadjusted = true;
+                window._alolCheckReady();
+            }};
+            window.__alol_adjustViewSelectedPlanes();
+        """
+        print(f"js: {start_js + other_planes_js}")
+        with timing.span("select_planes"):
+            await tab.evaluate(start_js + other_planes_js)
+
+        # wait ...
+
+        try:
+            # One promise resolved by the page's own map and tile events
+            with timing.span("map_ready"):
+                ready = await tab.evaluate(
+                    "timeout => window.__alolReady(timeout)", 10000
+                )
+            if not ready:
+                print(f"{icao} waiting: not ready after 10s")
+        except Exception as e:
+            traceback.print_exc()
+            print(f"{icao} waiting: {e}")
+    except Exception as e:
+        traceback.print_exc()
+        print(f"{icao} inner: {e}")
+    with timing.span("capture"):
+        return await tab.screenshot(type="png")
+
+
+async def _store_variants(cache_key: str, png: bytes) -> dict[tuple[int, str], bytes]:
+    # Every variant comes from this one render; store raw bytes
+    with timing.span("encode"):
+        variants = await asyncio.to_thread(
+            image_variants, png, SCREENSHOT_SIZES, SCREENSHOT_FORMATS
+        )
+    with timing.span("cache_write"):
+        pipe = redisVRS.redis.pipeline(transaction=False)
+        for (vsize, vfmt), data in variants.items():
+            pipe.set(f"{cache_key}:{vsize}:{vfmt}", data, ex=SCREENSHOT_TTL)
+        await pipe.execute()
+    return variants
+
+
+async def prerender(icaos: list[str], min_ttl: int = 0) -> bool:
+    """Render and cache a screenshot ahead of demand.
+
+    Skipped (False) if the cached copy outlives min_ttl, the aircraft has no
+    fix, no tab is to be had soon, or another request or replica is rendering
+    it already. The job is claimed only once a tab is in hand, so users never
+    wait on a claim held by a prerender that is still queueing for a tab.
+    """
     cache_key = f"screenshot:{':'.join(icaos)}"
+    variant = f"{cache_key}:{SCREENSHOT_SIZES[0]}:{SCREENSHOT_FORMATS[0]}"
+    if browser.saturated() or await redisVRS.redis_ro.ttl(variant) > min_ttl:
+        return False
+    if (found := await _find_bounds(icaos)) is None:
+        return False
+    bounds, _ = found
+    token = None
+    try:
+        async with browser.get_tab(wait=SCREENSHOT_PRERENDER_TAB_WAIT) as tab:
+            if not (token := await screenshotJobs.claim(cache_key)):
+                return False
+            async with timeout(10):
+                png = await _render_png(tab, icaos, bounds)
+        await _store_variants(cache_key, png)
+        return True
+    finally:
+        if token:
+            await screenshotJobs.finish(cache_key, token)
 
-    if not trace:
-        if cached_screenshot := await redisVRS.redis.get(cache_key):
-            print(f"cached! {icao}")
-            cached_screenshot = base64.b64decode(cached_screenshot)
-            return Response(cached_screenshot, media_type="image/png")
 
-        slept = 0
+def _valid_icao(icao: str) -> bool:
+    if len(icao) == 6:
+        return all(c in "0123456789abcdef" for c in icao)
+    if len(icao) == 7:
+        return icao[0] == "~" and all(c in "0123456789abcdef" for c in icao[1:])
+    return False
 
-        while slept < 60:
-            lock = await redisVRS.redis.setnx(f"{cache_key}:lock", 1)
-            if lock:
-                # set expiry
-                await redisVRS.redis.expire(f"{cache_key}:lock", 10)
-                break
 
-            screen = await redisVRS.redis.get(cache_key)
+async def _screenshot(
+    request: Request, icao: str, trace: bool, size: int | None, fmt: str | None
+) -> Response:
+    icaos = icao.lower().split(",")
+    if not all(map(_valid_icao, icaos)):
+        return Response(status_code=400)
+    if (variant := _pick_variant(request, size, fmt)) is None:
+        return Response(status_code=400)
+    size, fmt = variant
+    screenshotPrerenderer.record(icaos)
 
-            if screen:
-                break
-            else:
-                slept += 1
-                print(f"waiting for lock or screenshot {icaos} {slept}")
-                await asyncio.sleep(1)
+    # if we can't get a fix, we can't get a screenshot. sorry.
+    if (found := await _find_bounds(icaos)) is None:
+        return Response(status_code=404)
+    bounds, aircraft = found
+
+    cache_key = f"screenshot:{':'.join(icaos)}"
 
-        if screen := await redisVRS.redis.get(cache_key):
-            print(f"cached! {icao}")
-            screen = base64.b64decode(screen)
-            return Response(screen, media_type="image/png")
+    token = None
+    if not trace:
+        # Either someone (on any replica) renders it for us, or we claim the job
+        try:
+            with timing.span("job_wait"):
+                cached, token = await screenshotJobs.acquire(
+                    cache_key, f"{cache_key}:{size}:{fmt}"
+                )
+            if cached:
+                print(f"cached! {icao}")
+                return _image_response(request, cached, fmt)
+        except asyncio.TimeoutError:
+            print(f"gave up waiting for {icaos}")
+            return Response("sorry, no screenshots", media_type="text/plain")
 
     # otherwise, let's get to work
     print(f"locked! {icao} {trace}")
 
     # run this in asyncio-timeout context
     try:
+        if not trace and browser.saturated():
+            # No tab free: draw it ourselves rather than queue behind the browsers
+            with timing.span("static_render"):
+                screenshot = await staticMap.render(aircraft, bounds)
+            variants = await _store_variants(cache_key, screenshot)
+            return _image_response(request, variants[size, fmt], fmt)
         async with browser.get_tab() as tab:
             async with timeout(10):
                 if trace:
                     await tab.context.tracing.start(screenshots=True, snapshots=True)
-                try:
-                    start_js = "window._alol_mapcentered = false;window._alol_maploaded = false;window._alol_viewadjusted = false;window._are_tiles_loaded = false;window._alol_loading = 0; window._alol_loaded = 0;window._alol_viewadjusted=false;"
-                    other_planes_js = "".join(
-                        [
-                            f'selectPlaneByHex("{icao}", {{noDeselect: true}});'
-                            for icao in icaos
-                        ]
-                    )
-                    if min_lat and min_lon and max_lat and max_lon:
-                        # function adjustViewSelectedPlanes(maxLat, maxLon, minLat, minLon) {
-                        other_planes_js += f"""
-                            window.__alol_adjustViewSelectedPlanes = function() {{
-                                let maxLat = {max_lat}; let maxLon = {max_lon}; let minLat = {min_lat}; let minLon = {min_lon};
-                                let topRight = ol.proj.fromLonLat([maxLon, maxLat]);
-                                let bottomLeft = ol.proj.fromLonLat([minLon, minLat]);
-                                let newCenter = [(topRight[0] + bottomLeft[0]) / 2, (topRight[1] + bottomLeft[1]) / 2];
-                                let longerSide = Math.max(Math.abs(topRight[0] - bottomLeft[0]), Math.abs(topRight[1] - bottomLeft[1]));
-                                longerSide = Math.max(longerSide, 60 * 1000);
-                                let newZoom = Math.floor(Math.log2(6e7 / longerSide));
-                                console.log('newCenter: ' + newCenter);
-                                console.log('newZoom: ' + newZoom);
-                                if(newZoom > 13) newZoom = 13;
-                                OLMap.getView().setCenter(newCenter);
-                                OLMap.getView().setZoom(newZoom);
-                                window._alol_viewadjusted = true;
-                            }};
-                            window.__alol_adjustViewSelectedPlanes();
-                        """
-                    print(f"js: {start_js + other_planes_js}")
-                    await tab.evaluate(start_js + other_planes_js)
-
-                    # wait ...
-
-                    try:
-                        await tab.wait_for_function(
-                            """
-                            window._alol_maploaded === true &&
-                            window._alol_mapcentered === true &&
-                            window._are_tiles_loaded === true &&
-                            window._alol_viewadjusted === true &&
-                            SelPlanes.length > 0 &&
-                            window.planesAreGood()
-                            """,
-                            timeout=10000,
-                            polling=25,
-                        )
-
-                    except Exception as e:
-                        traceback.print_exc()
-                        print(f"{icao} waiting: {e}")
-                except Exception as e:
-                    traceback.print_exc()
-                    print(f"{icao} inner: {e}")
-                screenshot = await tab.screenshot(type="png")
-                screenshot_b64 = base64.b64encode(screenshot).decode()
+                screenshot = await _render_png(tab, icaos, bounds)
                 if not trace:
-                    await redisVRS.redis.set(cache_key, screenshot_b64, ex=20)
-                    await redisVRS.redis.delete(f"{cache_key}:lock")
-                    return Response(screenshot, media_type="image/png")
+                    variants = await _store_variants(cache_key, screenshot)
+                    return _image_response(request, variants[size, fmt], fmt)
                 else:
                     await tab.context.tracing.stop(path=f"/tmp/trace-{icao}.zip")
                     return FileResponse(
@@ -193,5 +331,151 @@ async def get_new_screenshot(
     except Exception as e:
         traceback.print_exc()
         print(f"{icao} outer: {e}")
-        await redisVRS.redis.delete(f"{cache_key}:lock")
         return Response("sorry, no screenshots", media_type="text/plain")
+    finally:
+        if token:
+            await screenshotJobs.finish(cache_key, token)
+
+
+def _tour(aircraft: list[dict]) -> list[dict]:
+    """Nearest-neighbour order, so consecutive renders on one tab reuse its tiles."""
+    if not aircraft:
+        return []
+    left, tour = aircraft[1:], [aircraft[0]]
+    while left:
+        last = tour[-1]
+        lat, lon, k = last["lat"], last["lon"], math.cos(math.radians(last["lat"]))
+        nearest = min(
+            left, key=lambda ac: (ac["lat"] - lat) ** 2 + ((ac["lon"] - lon) * k) ** 2
+        )
+        left.remove(nearest)
+        tour.append(nearest)
+    return tour
+
+
+@router.post(
+    "/screenshot/batch",
+    responses={200: {"content": {"application/zip": {}}}},
+    response_class=Response,
+    include_in_schema=False,
+)
+async def get_screenshot_batch(
+    body: ScreenshotBatchRequest,
+    size: int | None = None,
+    fmt: str | None = Query(None, alias="format"),
+) -> Response:
+    """Zip of one screenshot per icao ({icao}.{format}), rendered back to back.
+
+    Cached screenshots are reused and new ones are cached per icao. Aircraft
+    without a position (or whose render fails) are listed in X-Missing.
+    """
+    icaos = list(dict.fromkeys(icao.lower() for icao in body.icaos))
+    if (
+        not icaos
+        or len(icaos) > SCREENSHOT_BATCH_MAX
+        or not all(map(_valid_icao, icaos))
+    ):
+        return Response(status_code=400)
+    size = size or SCREENSHOT_SIZES[0]
+    fmt = fmt or SCREENSHOT_FORMATS[0]
+    if size not in SCREENSHOT_SIZES or fmt not in SCREENSHOT_FORMATS:
+        return Response(status_code=400)
+    for icao in icaos:
+        screenshotPrerenderer.record([icao])
+
+    # One re-api lookup and one cache read for the whole batch
+    session = await get_http_session()
+    with timing.span("find_hex"):
+        async with session.get(
+            f"{REAPI_ENDPOINT}/?find_hex={','.join(icaos)}"
+        ) as response:
+            data = await response.json()
+    aircraft = {
+        ac["hex"]: ac for ac in data["aircraft"] if ac.get("lat") and ac.get("lon")
+    }
+    keys = [f"screenshot:{icao}:{size}:{fmt}" for icao in icaos]
+    stored = await redisVRS.redis_ro.mget(keys)
+    images = {icao: image for icao, image in zip(icaos, stored) if image}
+
+    tried, tokens = set(), {}
+
+    async def render(ac: dict, render_png) -> None:
+        # Claim per aircraft, just before rendering, so claims do not expire queued
+        cache_key = f"screenshot:{ac['hex']}"
+        token = tokens.pop(ac["hex"], None) or await screenshotJobs.claim(cache_key)
+        if not token:
+            return
+        tried.add(ac["hex"])
+        try:
+            lat, lon = ac["lat"], ac["lon"]
+            bounds = (lat - 0.005, lon - 0.005, lat + 0.005, lon + 0.005)
+            png = await render_png([ac["hex"]], bounds)
+            images[ac["hex"]] = (await _store_variants(cache_key, png))[size, fmt]
+        except asyncio.TimeoutError:
+            raise  # through get_tab(), so it counts against the browser
+        except Exception as e:
+            traceback.print_exc()
+            print(f"batch: {ac['hex']}: {e}")
+        finally:
+            await screenshotJobs.finish(cache_key, token)
+
+    async def static_png(icaos, bounds):
+        with timing.span("static_render"):
+            return await staticMap.render([aircraft[icaos[0]]], bounds)
+
+    async def render_all(todo: list[dict]):
+        if todo and not browser.saturated():
+            try:
+                async with browser.get_tab() as tab:
+                    async def tab_png(icaos, bounds):
+                        # Same tab throughout: drop the previous aircraft, no full reset
+                        async with timeout(10):
+                            return await _render_png(tab, icaos, bounds, deselect=True)
+
+                    while todo:
+                        await render(todo[0], tab_png)
+                        todo.pop(0)
+            except Exception as e:
+                traceback.print_exc()
+                print(f"batch: {e}")
+        # No tab to be had, or a render timed out on it: draw the rest ourselves
+        for ac in todo:
+            await render(ac, static_png)
+
+    todo = [aircraft[i] for i in icaos if i in aircraft and i not in images]
+    await render_all(_tour(todo))
+
+    # Rendered elsewhere (another request or replica held the job): wait for all of
+    # those at once, so the batch waits one timeout at most rather than one each
+    others = [i for i in icaos if i in aircraft and i not in images and i not in tried]
+    waited = await asyncio.gather(
+        *(
+            screenshotJobs.acquire(
+                f"screenshot:{icao}", f"screenshot:{icao}:{size}:{fmt}", timeout=10
+            )
+            for icao in others
+        ),
+        return_exceptions=True,
+    )
+    for icao, result in zip(others, waited):
+        if isinstance(result, tuple):
+            cached, token = result
+            if cached:
+                images[icao] = cached
+            else:
+                tokens[icao] = token  # the other renderer gave up: the job is ours
+        elif not isinstance(result, asyncio.TimeoutError):
+            print(f"batch: {icao}: {result}")
+    await render_all(_tour([aircraft[icao] for icao in tokens]))
+
+    out = BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_STORED) as zf:
+        for icao in icaos:
+            if icao in images:
+                zf.writestr(f"{icao}.{fmt}", images[icao])
+    missing = [icao for icao in icaos if icao not in images]
+    return Response(
+        out.getvalue(),
+        media_type="application/zip",
+        headers={"X-Missing": ",".join(missing)},
+    )
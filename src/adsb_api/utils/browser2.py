@@ -1,14 +1,17 @@
 import asyncio
 import logging
+import math
 import traceback
+from collections import defaultdict, deque
 from contextlib import asynccontextmanager
 from os import getenv
 from typing import Optional
 
-import backoff
 from async_timeout import timeout
 from playwright.async_api import Page, async_playwright
 
+from adsb_api.utils import timing
+
 
 class _SimpleBackgroundTaskMixin:
     """Mixin for classes that run background tasks without Redis locking."""
@@ -65,83 +68,206 @@ SCREEN_SIZE = {
     "height": int(getenv("BROWSER2_SCREEN_HEIGHT", SCREEN_SIZE["height"])),
 }
 
+# Pool autoscaling bounds and targets
+MIN_TABS = int(getenv("BROWSER2_MIN_TABS", 2))
+MAX_TABS = int(getenv("BROWSER2_MAX_TABS", 4))
+# Seconds a tab must sit idle (and the pool be quiet) before it is closed
+SCALE_DOWN_COOLDOWN = float(getenv("BROWSER2_SCALE_DOWN_COOLDOWN", 60))
+# Add a tab when p95 time spent waiting for one goes above this (seconds)
+TARGET_ACQUIRE_P95 = float(getenv("BROWSER2_TARGET_ACQUIRE_P95", 0.25))
+# Window for the acquire / render time samples and the request rate (seconds)
+STATS_WINDOW = float(getenv("BROWSER2_STATS_WINDOW", 60))
+
+# CDP browsers to spread tabs over (comma separated)
+CDP_ENDPOINTS = getenv("BROWSER2_CDP_ENDPOINTS", "ws://localhost:3000/?timeout=12000000").split(",")
+CDP_CONNECT_TIMEOUT = float(getenv("BROWSER2_CDP_CONNECT_TIMEOUT", 10))
+# Drain and replace a browser after this many render timeouts in a row
+MAX_RENDER_TIMEOUTS = int(getenv("BROWSER2_MAX_RENDER_TIMEOUTS", 3))
+
+
+def _p95(samples) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[int(0.95 * (len(ordered) - 1))]
+
+
+class CDPBrowser:
+    """One CDP endpoint of the fleet and its health counters."""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.browser = None
+        self.tabs = set()
+        self.busy = 0  # tabs on this browser checked out
+        self.draining = False  # no new renders; replaced once in-flight ones finish
+        # connects, connect_failures, render_timeouts, crashes, replaced
+        self.stats = defaultdict(int)
+        self._timeouts_in_row = 0
+        self._failures_in_row = 0
+        self._retry_at = 0.0
+
+    @property
+    def name(self) -> str:
+        return self.endpoint.split("?")[0]
+
+    def is_connected(self) -> bool:
+        return self.browser is not None and self.browser.is_connected()
+
+    @property
+    def healthy(self) -> bool:
+        return self.is_connected() and not self.draining
+
+
+class _IdleTabs:
+    """Idle tabs; get() hands out the one with the lowest key (least-loaded browser)."""
+
+    def __init__(self, key):
+        self._tabs = []
+        self._available = asyncio.Event()
+        self.key = key
+
+    def qsize(self) -> int:
+        return len(self._tabs)
+
+    def empty(self) -> bool:
+        return not self._tabs
+
+    def put_nowait(self, tab):
+        self._tabs.append(tab)
+        self._available.set()
+
+    def get_nowait(self):
+        tab = min(self._tabs, key=self.key)
+        self._tabs.remove(tab)
+        return tab
+
+    async def get(self):
+        while not self._tabs:
+            self._available.clear()
+            await self._available.wait()
+        return self.get_nowait()
+
+    def take(self, predicate) -> list:
+        """Remove and return the idle tabs matching predicate."""
+        taken = [t for t in self._tabs if predicate(t)]
+        self._tabs = [t for t in self._tabs if not predicate(t)]
+        return taken
+
+
 class BrowserTabPool(_SimpleBackgroundTaskMixin):
     def __init__(
         self,
         url: str,
-        min_tabs: int = 2,
-        max_tabs: int = 4,
+        min_tabs: int = MIN_TABS,
+        max_tabs: int = MAX_TABS,
         tab_ttl: int = 600,
         tab_max_uses: int = 200,
+        scale_down_cooldown: float = SCALE_DOWN_COOLDOWN,
+        target_acquire_p95: float = TARGET_ACQUIRE_P95,
+        endpoints: list[str] = CDP_ENDPOINTS,
         before_add_to_pool_cb=None,
         before_return_to_pool_cb=None,
     ):
         super().__init__()
         self.p = None
-        self.browser = None
+        self.browsers = [CDPBrowser(endpoint) for endpoint in endpoints]
         self.url = url
         self.min_tabs = min_tabs
         self.max_tabs = max_tabs
         self.tab_ttl = tab_ttl
         self.tab_max_uses = tab_max_uses
-        self.pool = asyncio.Queue()
+        self.pool = _IdleTabs(
+            key=lambda tab: (not tab.__browser.healthy, tab.__browser.busy)
+        )
         self._active_tabs = set()
         self.before_add_to_pool_cb = before_add_to_pool_cb
         self.before_return_to_pool_cb = before_return_to_pool_cb
         self._total_tabs = (
             0  # Tracks the total number of tabs being created, in the pool, and active
         )
+        self.scale_down_cooldown = scale_down_cooldown
+        self.target_acquire_p95 = target_acquire_p95
+        self.waiters = 0  # get_tab callers with no tab yet
+        self.busy = 0  # tabs checked out
+        # (finished_at, seconds) samples, trimmed to STATS_WINDOW
+        self._acquire_times = deque()
+        self._render_times = deque()
+        self._last_busy = 0.0  # last time a request had to wait or every tab was in use
+        self._scaling: Optional[asyncio.Task] = None
         self.logger = logging.getLogger(__name__)
         logging.basicConfig(level=logging.INFO)  # Change the log level as necessary
 
-    @backoff.on_exception(backoff.expo, Exception)
     async def initialize(self):
-        self.logger.info("Initializing browser...")
+        self.logger.info("Initializing browsers...")
 
         if not self.p:
             self.p = await async_playwright().__aenter__()
             self.logger.info("Playwright object created.")
-        if self.browser:
-            # Old browser detected. Clean up...
-            self.logger.info("Old browser detected. Cleaning up...")
-            try:
-                self._active_tabs = set()
-                self.pool = asyncio.Queue()
-                self._total_tabs = 0
-                await self.browser.close()
-            except Exception as e:
-                self.logger.error("Error while closing old browser: %s", e)
-
-        self.browser = await self.p.chromium.connect_over_cdp(
-            "ws://localhost:3000/?timeout=12000000"
-        )
+        await asyncio.gather(*[self._connect(b) for b in self.browsers])
         for _ in range(self.min_tabs):
             try:
                 await self._add_tab_to_pool()
             except Exception as e:
                 self.logger.error("Error while adding tab to pool: %s", e)
 
+    async def _connect(self, b: CDPBrowser):
+        """Connect one endpoint, backing off exponentially per browser on failure."""
+        now = asyncio.get_event_loop().time()
+        if now < b._retry_at:
+            return
+        try:
+            async with timeout(CDP_CONNECT_TIMEOUT):
+                b.browser = await self.p.chromium.connect_over_cdp(b.endpoint)
+        except Exception as e:
+            b.stats["connect_failures"] += 1
+            b._failures_in_row += 1
+            b._retry_at = now + min(60, 2 ** b._failures_in_row)
+            self.logger.error("Failed to connect to %s: %s", b.name, e)
+            return
+        b.stats["connects"] += 1
+        b._failures_in_row = b._timeouts_in_row = 0
+        b.draining = False
+        self.logger.info("Connected to %s", b.name)
+
     async def _add_tab_to_pool(self):
-        # Check if browser is healthy, if not, return
-        if not self.browser.is_connected():
-            self.logger.error("Browser is not connected. Not adding tab to pool...")
+        # New tabs go to the healthy browser with the fewest tabs
+        b = min(
+            (b for b in self.browsers if b.healthy),
+            key=lambda b: len(b.tabs),
+            default=None,
+        )
+        if b is None:
+            self.logger.error("No browser is connected. Not adding tab to pool...")
+            return
         # Edge Case: Prevent the creation of more tabs than max_tabs
         if self._total_tabs >= self.max_tabs:
             return
         self._total_tabs += 1  # Increment _total_tabs when a new tab is being created
         self.logger.info("Total number of tabs after addition: %s", self._total_tabs)
-        context = await self.browser.new_context(
-            base_url=self.url,
-            viewport=SCREEN_SIZE,
-            screen=SCREEN_SIZE,
-        )
-        tab = await context.new_page()
+        try:
+            with timing.span("tab_create", "browser"):
+                context = await b.browser.new_context(
+                    base_url=self.url,
+                    viewport=SCREEN_SIZE,
+                    screen=SCREEN_SIZE,
+                )
+                tab = await context.new_page()
+        except Exception:
+            self._total_tabs -= 1
+            b.stats["connect_failures"] += 1
+            raise
+        tab.__browser = b
         tab.__use_count = 0
-        tab.__created_at = asyncio.get_event_loop().time()
-        await tab.goto(self.url)
+        tab.__removed = False
+        tab.__created_at = tab.__last_used = asyncio.get_event_loop().time()
+        b.tabs.add(tab)
+        with timing.span("tab_goto", "browser"):
+            await tab.goto(self.url)
 
         if self.before_add_to_pool_cb:
-            is_tab_good_to_go = await self.before_add_to_pool_cb(tab)
+            with timing.span("tab_setup", "browser"):
+                is_tab_good_to_go = await self.before_add_to_pool_cb(tab)
             if not is_tab_good_to_go:
                 self.logger.error("Tab is not good to go. Removing tab from pool...")
                 await self._remove_tab(tab)
@@ -150,7 +276,8 @@ class BrowserTabPool(_SimpleBackgroundTaskMixin):
             await self.before_return_to_pool_cb(tab)
 
         self.logger.info(
-            "Tab added to pool. Total number of tabs: %s / min: %s, max: %s",
+            "Tab added to pool on %s. Total number of tabs: %s / min: %s, max: %s",
+            b.name,
             self._total_tabs,
             self.min_tabs,
             self.max_tabs,
@@ -160,39 +287,128 @@ class BrowserTabPool(_SimpleBackgroundTaskMixin):
         self._active_tabs.add(tab)
 
     async def _remove_tab(self, tab, reason=None):
+        if tab.__removed:
+            return  # already closed and counted, e.g. by enforce_tab_limits
+        tab.__removed = True
         self.logger.info("Removing tab from pool... Reason: %s", reason or "Unknown")
 
-        if tab and not tab.is_closed():
-            self.logger.info("Tab is open, proceeding to close it.")
-            await tab.close()
+        tab.__browser.tabs.discard(tab)
         if tab in self._active_tabs:
             self._active_tabs.remove(tab)
         self._total_tabs -= 1
+        if tab.__browser.is_connected() and not tab.is_closed():
+            self.logger.info("Tab is open, proceeding to close it.")
+            try:
+                await tab.close()
+            except Exception as e:
+                self.logger.error("Error while closing tab: %s", e)
+
+    def saturated(self) -> bool:
+        """No tab to be had soon: no healthy browser, or all tabs busy and no room."""
+        if not any(b.healthy for b in self.browsers):
+            return True
+        return self.pool.empty() and self._total_tabs >= self.max_tabs
 
     async def is_tab_healthy(self, tab: Page):
-        # Checks if the browser is connected and the tab is not closed
-        return self.browser.is_connected() and not tab.is_closed()
+        # Browser connected and not draining, tab not closed
+        return tab.__browser.healthy and not tab.is_closed()
 
     async def release_tab(self, tab):
         self.logger.info("Tab use count before release: %s", tab.__use_count)
         self.logger.info("Releasing tab back to pool...")
         if self.before_return_to_pool_cb:
-            await self.before_return_to_pool_cb(tab)
+            with timing.span("tab_recycle", "browser"):
+                await self.before_return_to_pool_cb(tab)
         tab.__use_count += 1
+        tab.__last_used = asyncio.get_event_loop().time()
         self.pool.put_nowait(tab)
 
+    def _trim_samples(self, now: float):
+        for samples in (self._acquire_times, self._render_times):
+            while samples and samples[0][0] < now - STATS_WINDOW:
+                samples.popleft()
+
+    def target_tabs(self) -> int:
+        """Tabs needed for current demand, between min_tabs and max_tabs.
+
+        Enough for what is in use plus everyone waiting, and for the recent
+        request rate at the p95 render time (Little's law); one more while the
+        p95 acquire time is above target.
+        """
+        now = asyncio.get_event_loop().time()
+        self._trim_samples(now)
+        rate = len(self._render_times) / STATS_WINDOW
+        render_p95 = _p95([t for _, t in self._render_times])
+        target = max(self.busy + self.waiters, math.ceil(rate * render_p95))
+        if _p95([t for _, t in self._acquire_times]) > self.target_acquire_p95:
+            target = max(target, self._total_tabs + 1)
+        return max(self.min_tabs, min(self.max_tabs, target))
+
+    def stats(self) -> dict:
+        now = asyncio.get_event_loop().time()
+        self._trim_samples(now)
+        return {
+            "tabs": self._total_tabs,
+            "tabs_idle": self.pool.qsize(),
+            "tabs_busy": self.busy,
+            "tabs_target": self.target_tabs(),
+            "tabs_min": self.min_tabs,
+            "tabs_max": self.max_tabs,
+            "waiters": self.waiters,
+            "utilisation": self.busy / self._total_tabs if self._total_tabs else 0.0,
+            "acquire_seconds_p95": _p95([t for _, t in self._acquire_times]),
+            "render_seconds_p95": _p95([t for _, t in self._render_times]),
+        }
+
     async def reconcile_pool(self):
-        # Edge Case: Ensures that the pool always has at least min_tabs and not more than max_tabs
-        if not self.browser or not self.browser.is_connected():
-            self.logger.error("Browser is not connected. Not reconciling pool...")
+        # Scale between min_tabs and max_tabs following target_tabs
+        if not any(b.healthy for b in self.browsers):
+            self.logger.error("No browser is connected. Not reconciling pool...")
             return
-        while self._total_tabs < self.max_tabs:
+        target = self.target_tabs()
+        while self._total_tabs < target:
             self.logger.info(
-                "Current pool size: %s, total tabs: %s",
+                "Scaling up. Current pool size: %s, total tabs: %s, target: %s",
                 self.pool.qsize(),
                 self._total_tabs,
+                target,
             )
+            before = self._total_tabs
             await self._add_tab_to_pool()
+            if self._total_tabs <= before:
+                break  # tab failed to come up; retry on the next run
+        await self._scale_down(target)
+
+    async def _scale_down(self, target: int):
+        """Close tabs idle for longer than the cool-down, down to target."""
+        now = asyncio.get_event_loop().time()
+        if (
+            self._total_tabs <= target
+            or now - self._last_busy < self.scale_down_cooldown
+        ):
+            return
+        idle = []
+        while not self.pool.empty():
+            idle.append(self.pool.get_nowait())
+        excess = self._total_tabs - target
+        expired = [
+            t
+            for t in sorted(idle, key=lambda t: t.__last_used)
+            if now - t.__last_used >= self.scale_down_cooldown
+        ][:excess]
+        # Hand the rest back before awaiting, so get_tab never sees a falsely empty pool
+        for tab in idle:
+            if tab not in expired:
+                self.pool.put_nowait(tab)
+        for tab in expired:
+            await self._remove_tab(tab, "idle")
+
+    def _scale_up_soon(self):
+        # Do not wait for the next reconcile run when requests are queueing
+        if self._total_tabs < self.max_tabs and (
+            self._scaling is None or self._scaling.done()
+        ):
+            self._scaling = asyncio.create_task(self.reconcile_pool())
 
     async def enforce_tab_limits(self):
         # Edge Case: Closes tabs after a certain number of uses
@@ -203,45 +419,100 @@ class BrowserTabPool(_SimpleBackgroundTaskMixin):
                 await self._remove_tab(tab, "maximum age")
 
     @asynccontextmanager
-    async def get_tab(self) -> Optional:
+    async def get_tab(self, wait: float | None = None) -> Optional:
+        """A healthy tab for one render; asyncio.TimeoutError if none within wait s."""
         self.logger.info("Retrieving tab from pool...")
+        loop = asyncio.get_event_loop()
+        started = loop.time()
 
-        while True:
-            self.logger.info("Waiting for tab...")
-            tab = await self.pool.get()
-            if await self.is_tab_healthy(tab):
-                self.logger.info("Tab retrieved from pool!")
-                break
-            else:
-                await self._remove_tab(tab, "Unhealthy hot")
-
+        self.waiters += 1
+        try:
+            while True:
+                self.logger.info("Waiting for tab...")
+                if self.pool.empty():
+                    self._last_busy = loop.time()
+                    self._scale_up_soon()
+                left = None if wait is None else max(started + wait - loop.time(), 0)
+                tab = await asyncio.wait_for(self.pool.get(), left)
+                if await self.is_tab_healthy(tab):
+                    self.logger.info("Tab retrieved from pool!")
+                    break
+                else:
+                    await self._remove_tab(tab, "Unhealthy hot")
+        finally:
+            self.waiters -= 1
+
+        acquired = loop.time()
+        self._acquire_times.append((acquired, acquired - started))
+        timing.observe("browser", "tab_acquire", acquired - started)
+        b = tab.__browser
+        self.busy += 1
+        b.busy += 1
         try:
             yield tab
+            b._timeouts_in_row = 0
+        except asyncio.TimeoutError:
+            b.stats["render_timeouts"] += 1
+            b._timeouts_in_row += 1
+            if b._timeouts_in_row >= MAX_RENDER_TIMEOUTS and not b.draining:
+                self.logger.error(
+                    "%s timed out %s renders in a row. Draining...",
+                    b.name,
+                    b._timeouts_in_row,
+                )
+                b.draining = True
+            raise
         finally:
+            self.busy -= 1
+            b.busy -= 1
+            self._render_times.append((loop.time(), loop.time() - acquired))
             if await self.is_tab_healthy(tab):
                 await self.release_tab(tab)
             else:
                 await self._remove_tab(tab, "Unhealthy after use")
 
-    # Handle browser launch errors
-    @backoff.on_exception(backoff.expo, Exception, max_tries=10)
-    async def reconcile_browser(self):
-        if not self.p or not self.browser or not self.browser.is_connected():
-            # clean up existing tabs before creating new browser
-            for tab in list(
-                self._active_tabs
-            ):  # make a copy of the set to avoid RuntimeError during iteration
-                await self._remove_tab(tab)
-            try:
-                if not self.p:
-                    self.p = await async_playwright().__aenter__()
-                if not self.browser or not self.browser.is_connected():
-                    await self.initialize()
-            except Exception as e:
-                self.logger.error("Failed to reconcile browser. Reason: %s", e)
-                self.browser = None
-                self.p = None
-                await self.initialize()
+    async def reconcile_browsers(self):
+        """Reconnect crashed browsers and replace drained ones once idle."""
+        if not self.p:
+            self.p = await async_playwright().__aenter__()
+        for b in self.browsers:
+            if b.browser is not None and not b.browser.is_connected():
+                self.logger.error("%s disconnected. Dropping its tabs...", b.name)
+                b.stats["crashes"] += 1
+                b.browser = None
+            if b.draining:
+                # Idle tabs go now; busy ones finish and are removed on release
+                for tab in self.pool.take(lambda tab: tab.__browser is b):
+                    await self._remove_tab(tab, "browser draining")
+                if b.busy:
+                    continue
+                self.logger.info("Replacing drained browser %s", b.name)
+                b.stats["replaced"] += 1
+                old, b.browser = b.browser, None
+                if old:
+                    try:
+                        await old.close()
+                    except Exception as e:
+                        self.logger.error("Error while closing %s: %s", b.name, e)
+            if b.browser is None:
+                for tab in self.pool.take(lambda tab: tab.__browser is b) + list(
+                    b.tabs
+                ):
+                    await self._remove_tab(tab, "browser gone")
+                await self._connect(b)
+
+    def browser_stats(self) -> list[dict]:
+        return [
+            {
+                "endpoint": b.name,
+                "connected": int(b.is_connected()),
+                "draining": int(b.draining),
+                "tabs": len(b.tabs),
+                "tabs_busy": b.busy,
+                **b.stats,
+            }
+            for b in self.browsers
+        ]
 
     @background_task(interval=2)
     async def _reconcile(self):
@@ -249,7 +520,7 @@ class BrowserTabPool(_SimpleBackgroundTaskMixin):
         await asyncio.gather(
             self.reconcile_pool(),
             self.enforce_tab_limits(),
-            self.reconcile_browser(),
+            self.reconcile_browsers(),
         )
 
     async def start(self):
@@ -266,9 +537,11 @@ class BrowserTabPool(_SimpleBackgroundTaskMixin):
     async def shutdown(self):
         self.logger.info("Shutting down...")
         await self.stop_bg_tasks()
-        for tab in self._active_tabs:
+        for tab in list(self._active_tabs):
             await self._remove_tab(tab)
-        await self.browser.close()
+        for b in self.browsers:
+            if b.browser:
+                await b.browser.close()
 
 
 async def before_add_to_pool_cb(page):
@@ -280,8 +553,9 @@ async def before_add_to_pool_cb(page):
         page.goto("?screenshot&zoom=6&hideButtons&hideSidebar&lat=82&lon=-5&nowebGL"),
     ]
     try:
-        async with timeout(5):
-            await asyncio.gather(*tasks)
+        with timing.span("setup_navigate", "browser"):
+            async with timeout(5):
+                await asyncio.gather(*tasks)
     except asyncio.TimeoutError:
         traceback.print_exc()
         return False
@@ -294,8 +568,9 @@ async def before_add_to_pool_cb(page):
         page.wait_for_function("typeof OLMap === 'object'", timeout=5000),
     ]
     try:
-        async with timeout(10):
-            await asyncio.gather(*tasks)
+        with timing.span("setup_app_loaded", "browser"):
+            async with timeout(10):
+                await asyncio.gather(*tasks)
     except asyncio.TimeoutError:
         traceback.print_exc()
         return False
@@ -341,6 +616,7 @@ async def before_add_to_pool_cb(page):
                     window._alol_loading = 0;
                     window._alol_loaded = 0;
                     window._are_tiles_loaded = true;
+                    window._alolCheckReady();
                 }
             }, 100);
         }
@@ -354,6 +630,35 @@ async def before_add_to_pool_cb(page):
             return true;
         }
 
+        // Readiness: resolved from the map / tile events instead of being polled
+        window._alolWaiters = [];
+        window._alolIsReady = function() {
+            return window._alol_maploaded === true &&
+                window._alol_mapcentered === true &&
+                window._are_tiles_loaded === true &&
+                window._alol_viewadjusted === true &&
+                SelPlanes.length > 0 &&
+                window.planesAreGood();
+        }
+        window._alolCheckReady = function() {
+            if (!window._alolWaiters.length || !window._alolIsReady()) { return; }
+            const waiters = window._alolWaiters;
+            window._alolWaiters = [];
+            waiters.forEach(done => done(true));
+        }
+        // Resolves true once everything is drawn, or false after timeoutMs
+        window.__alolReady = function(timeoutMs) {
+            return new Promise(resolve => {
+                if (window._alolIsReady()) { return resolve(true); }
+                const done = (ready) => { clearTimeout(timer); resolve(ready); };
+                const timer = setTimeout(() => {
+                    window._alolWaiters = window._alolWaiters.filter(w => w !== done);
+                    resolve(false);
+                }, timeoutMs);
+                window._alolWaiters.push(done);
+            });
+        }
+
         window.adjustViewSelectedPlanes = function () {
             if (SelPlanes.length < 1) { return; }
             let maxLat, maxLon, minLat, minLon = null;
@@ -396,27 +701,31 @@ async def before_add_to_pool_cb(page):
             OLMap.getView().setCenter(newCenter);
             OLMap.getView().setZoom(newZoom);
             window._alol_viewadjusted = true;
+            window._alolCheckReady();
         }
-
-
-
     """
     tasks = [
         page.evaluate(
             """$('#selected_infoblock')[0].remove(); $('.ol-zoom').remove(); $('.layer-switcher').remove(); function adjustInfoBlock(){}; toggleIsolation("on"); toggleMultiSelect("on"); reaper('all');"""
         ),
-        page.evaluate(
-            """
+        page.evaluate("""
         planespottersAPI=false; useRouteAPI=false; setPictureVisibility();
-        OLMap.addEventListener("moveend", () => {window._alol_mapcentered = true;});
-        OLMap.addEventListener("rendercomplete", () => {window._alol_maploaded = true;});
-        """
-        ),
+        // rendercomplete also follows trace loads, which is when planesAreGood() flips
+        OLMap.addEventListener("moveend", () => {
+            window._alol_mapcentered = true;
+            window._alolCheckReady && window._alolCheckReady();
+        });
+        OLMap.addEventListener("rendercomplete", () => {
+            window._alol_maploaded = true;
+            window._alolCheckReady && window._alolCheckReady();
+        });
+        """),
         page.evaluate(js_magic),
     ]
     try:
-        async with timeout(10):
-            await asyncio.gather(*tasks)
+        with timing.span("setup_inject", "browser"):
+            async with timeout(10):
+                await asyncio.gather(*tasks)
     except asyncio.TimeoutError:
         traceback.print_exc()
         return False
@@ -432,5 +741,6 @@ async def before_return_to_pool_cb(page):
         window._alol_viewadjusted = false;
         window._are_tiles_loaded = false;
         window._alol_loading = 0; window._alol_loaded = 0;
+        window._alolWaiters = [];
         """
     )
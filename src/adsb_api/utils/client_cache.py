@@ -0,0 +1,216 @@
+import asyncio
+import traceback
+from collections import defaultdict
+
+import redis.asyncio as redis
+
+from adsb_api.utils.cache import MISSING, TTLCache
+
+INVALIDATE_CHANNEL = b"__redis__:invalidate"
+
+
+class ClientSideCache:
+    """Process-local copy of hot Redis keys, kept fresh by server-assisted invalidation.
+
+    One connection subscribes to __redis__:invalidate, another turns on
+    CLIENT TRACKING in BCAST mode redirected to it, so Redis announces every
+    write, delete or expiry of a key under one of the prefixes (RESP2, redis 6+;
+    prefixes must not overlap). Values live in a bounded LRU, with a TTL as a
+    safety net. While the invalidation link is down nothing is cached.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        prefixes: list[str],
+        ttl: float = 300,
+        health_check_interval: float = 5,
+    ):
+        self.prefixes = tuple(prefixes)
+        self.health_check_interval = health_check_interval
+        self.active = False
+        self.stats = defaultdict(int)
+        self._entries = TTLCache(maxsize, ttl)
+        # key -> token of the read that may fill it
+        self._pending: dict[str, object] = {}
+        self._pool: redis.ConnectionPool | None = None
+        self._listener: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def start(self, url: str):
+        self._pool = redis.ConnectionPool.from_url(url)
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        if self._pool:
+            await self._pool.disconnect()
+
+    def wrap(self, r: redis.Redis) -> "CachedReads":
+        return CachedReads(r, self)
+
+    def cacheable(self, key: str) -> bool:
+        return self.active and key.startswith(self.prefixes)
+
+    @staticmethod
+    async def _command(conn, *args):
+        await conn.send_command(*args)
+        return await conn.read_response()
+
+    async def _listen(self):
+        while True:
+            listener = self._pool.make_connection()
+            tracker = self._pool.make_connection()
+            try:
+                redirect = await self._command(listener, "CLIENT", "ID")
+                await self._command(listener, "SUBSCRIBE", INVALIDATE_CHANNEL)
+                prefixes = [arg for p in self.prefixes for arg in ("PREFIX", p)]
+                tracking = ("ON", "REDIRECT", redirect, "BCAST", *prefixes)
+                await self._command(tracker, "CLIENT", "TRACKING", *tracking)
+                self.active, pinged = True, False
+                while True:
+                    message = await listener.read_response(
+                        timeout=self.health_check_interval
+                    )
+                    if message is None:
+                        # Quiet link: both connections (so tracking) must still answer
+                        if pinged:
+                            raise ConnectionError(
+                                "invalidation connection stopped answering"
+                            )
+                        await self._command(tracker, "PING")
+                        await listener.send_command("PING")
+                        pinged = True
+                    elif message[0] == b"pong":
+                        pinged = False
+                    elif message[0] == b"message" and message[1] == INVALIDATE_CHANNEL:
+                        self.invalidate(message[2])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[ClientSideCache] invalidation link error: {e}")
+                traceback.print_exc()
+                self.stats["reconnects"] += 1
+            finally:
+                # Invalidations may have been missed: start over empty
+                self.active = False
+                self.invalidate(None)
+                await asyncio.gather(
+                    listener.disconnect(), tracker.disconnect(), return_exceptions=True
+                )
+            await asyncio.sleep(1)
+
+    def invalidate(self, keys: list[bytes] | None):
+        """Drop the given keys, or everything (None: FLUSHALL, or the link is gone)."""
+        if keys is None:
+            self.stats["flushes"] += 1
+            self._entries.clear()
+            self._pending.clear()
+            return
+        for key in keys:
+            key = key.decode()
+            self.stats["invalidations"] += 1
+            self._pending.pop(key, None)
+            for decoded in (False, True):
+                self._entries.delete((decoded, key))
+                self._entries.delete((decoded, key, "hash"))
+
+    def lookup(self, entry: tuple):
+        return self._entries.get(entry)
+
+    def reserve(self, keys: list[str]) -> object:
+        """Mark keys as being read; an invalidation before fill() voids the read."""
+        token = object()
+        for key in keys:
+            self._pending[key] = token
+        return token
+
+    def fill(self, token: object, entries: dict[tuple, object]):
+        for entry, value in entries.items():
+            if self._pending.get(entry[1]) is token:
+                self._entries.set(entry, value)
+
+    def release(self, token: object, keys: list[str]):
+        for key in keys:
+            if self._pending.get(key) is token:
+                del self._pending[key]
+
+
+class CachedReads:
+    """A redis.asyncio.Redis reading tracked keys through a ClientSideCache.
+
+    GET / MGET / HGET / HMGET of keys under the cache's prefixes are served from it.
+
+    Everything else (writes, pipelines, scripts) goes straight to the wrapped client.
+    """
+
+    def __init__(self, r: redis.Redis, cache: ClientSideCache):
+        self._redis = r
+        self._cache = cache
+        kwargs = r.connection_pool.connection_kwargs
+        self._decoded = kwargs.get("decode_responses", False)
+
+    def __getattr__(self, name):
+        return getattr(self._redis, name)
+
+    async def get(self, key: str):
+        if not self._cache.cacheable(key):
+            return await self._redis.get(key)
+        return (await self.mget([key]))[0]
+
+    async def mget(self, keys: list[str]) -> list:
+        if not keys:
+            return []
+        values, misses = {}, []
+        for key in keys:
+            value = MISSING
+            if self._cache.cacheable(key):
+                value = self._cache.lookup((self._decoded, key))
+            if value is not MISSING:
+                values[key] = value
+            else:
+                misses.append(key)
+        self._cache.stats["hit"] += len(values)
+        if misses:
+            tracked = [k for k in misses if self._cache.cacheable(k)]
+            self._cache.stats["miss"] += len(tracked)
+            token = self._cache.reserve(tracked)
+            try:
+                fetched = dict(zip(misses, await self._redis.mget(misses)))
+                self._cache.fill(
+                    token, {(self._decoded, k): fetched[k] for k in tracked}
+                )
+            finally:
+                self._cache.release(token, tracked)
+            values.update(fetched)
+        return [values[k] for k in keys]
+
+    async def hget(self, key: str, field: str):
+        if not self._cache.cacheable(key):
+            return await self._redis.hget(key, field)
+        return (await self.hmget(key, [field]))[0]
+
+    async def hmget(self, key: str, fields: list[str]) -> list:
+        if not self._cache.cacheable(key):
+            return await self._redis.hmget(key, fields)
+        entry = (self._decoded, key, "hash")
+        cached = self._cache.lookup(entry)
+        cached = {} if cached is MISSING else cached
+        misses = [f for f in fields if f not in cached]
+        self._cache.stats["miss" if misses else "hit"] += 1
+        if misses:
+            token = self._cache.reserve([key])
+            try:
+                # A new dict, so a voided read never leaks into the cached one
+                fetched = dict(zip(misses, await self._redis.hmget(key, misses)))
+                cached = {**cached, **fetched}
+                self._cache.fill(token, {entry: cached})
+            finally:
+                self._cache.release(token, [key])
+        return [cached[f] for f in fields]
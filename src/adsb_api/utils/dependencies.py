@@ -1,18 +1,38 @@
+from adsb_api.utils.client_cache import ClientSideCache
 from adsb_api.utils.provider import Provider
 from adsb_api.utils.provider import RedisVRS
 from adsb_api.utils.provider import FeederData
-from adsb_api.utils.settings import ENABLED_BG_TASKS
+from adsb_api.utils.photos import PlanespottersProxy
+from adsb_api.utils.redis_connections import RedisConnections
+from adsb_api.utils.screenshot_jobs import ScreenshotJobs
+from adsb_api.utils.prerender import ScreenshotPrerenderer
+from adsb_api.utils.settings import (
+    ENABLED_BG_TASKS,
+    REDIS_CLIENT_CACHE_PREFIXES,
+    REDIS_CLIENT_CACHE_SIZE,
+    REDIS_CLIENT_CACHE_TTL,
+)
+from adsb_api.utils.static_map import StaticMapRenderer
 from adsb_api.utils.browser2 import (
+    SCREEN_SIZE,
     BrowserTabPool,
     before_add_to_pool_cb,
     before_return_to_pool_cb,
 )
 
+redisConnections = RedisConnections()
 provider = Provider(enabled_bg_tasks=ENABLED_BG_TASKS)
 redisVRS = RedisVRS()
 feederData = FeederData()
+photos = PlanespottersProxy()
+clientCache = ClientSideCache(
+    REDIS_CLIENT_CACHE_SIZE, REDIS_CLIENT_CACHE_PREFIXES, ttl=REDIS_CLIENT_CACHE_TTL
+)
+screenshotJobs = ScreenshotJobs()
+screenshotPrerenderer = ScreenshotPrerenderer()
 browser = BrowserTabPool(
     url="https://adsb.lol/",
     before_add_to_pool_cb=before_add_to_pool_cb,
     before_return_to_pool_cb=before_return_to_pool_cb,
 )
+staticMap = StaticMapRenderer(size=(SCREEN_SIZE["width"], SCREEN_SIZE["height"]))
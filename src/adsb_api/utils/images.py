@@ -0,0 +1,42 @@
+import hashlib
+from io import BytesIO
+
+from PIL import Image
+
+MEDIA_TYPES = {"png": "image/png", "webp": "image/webp", "jpeg": "image/jpeg"}
+_SAVE_OPTIONS = {
+    "png": {"optimize": False},
+    "webp": {"quality": 80, "method": 4},
+    "jpeg": {"quality": 85},
+}
+
+
+def image_variants(
+    png: bytes, sizes: list[int], formats: list[str]
+) -> dict[tuple[int, str], bytes]:
+    """Encode one rendered PNG into every (size, format) combination.
+
+    The native size keeps the original PNG bytes as-is. CPU bound: run it in a thread.
+    """
+    source = Image.open(BytesIO(png)).convert("RGB")
+    variants = {}
+    for size in sizes:
+        img = (
+            source
+            if size == source.width
+            else source.resize(
+                (size, size * source.height // source.width), Image.LANCZOS
+            )
+        )
+        for fmt in formats:
+            if fmt == "png" and img is source:
+                variants[size, fmt] = png
+                continue
+            out = BytesIO()
+            img.save(out, format=fmt.upper(), **_SAVE_OPTIONS[fmt])
+            variants[size, fmt] = out.getvalue()
+    return variants
+
+
+def etag(data: bytes) -> str:
+    return '"' + hashlib.blake2b(data, digest_size=8).hexdigest() + '"'
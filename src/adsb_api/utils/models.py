@@ -1,23 +1,60 @@
 import orjson
 import typing
+from contextvars import ContextVar
+from urllib.parse import parse_qsl
 
 from fastapi.responses import Response
 from pydantic import BaseModel
-from typing import List, Optional, Union
+from typing import Iterable, List, NamedTuple, Optional, Union
 
 
 class ApiUuidRequest(BaseModel):
     version: str
 
 
-class PrettyJSONResponse(Response):
+class ScreenshotBatchRequest(BaseModel):
+    icaos: List[str]
+
+
+_pretty_json: ContextVar[bool] = ContextVar("pretty_json", default=False)
+
+
+class CompactJSONResponse(Response):
+    """Compact JSON, or sorted and indented when the request asked for ?pretty=1.
+
+    Already serialized JSON (e.g. cached bytes from Redis) can be spliced in
+    as-is by wrapping it in orjson.Fragment. Pretty output re-decodes the
+    whole body, Fragments included, so they get sorted and indented too.
+    """
+
     media_type = "application/json"
 
     def render(self, content: typing.Any) -> bytes:
-        return orjson.dumps(
-            content,
-            option=orjson.OPT_SORT_KEYS | orjson.OPT_INDENT_2,
+        if _pretty_json.get():
+            return orjson.dumps(
+                orjson.loads(orjson.dumps(content)),
+                option=orjson.OPT_SORT_KEYS | orjson.OPT_INDENT_2,
+            )
+        return orjson.dumps(content)
+
+
+class PrettyJSONMiddleware:
+    """ASGI middleware exposing ?pretty=1 to CompactJSONResponse."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        qs = scope.get("query_string", b"")
+        if scope["type"] != "http" or b"pretty" not in qs:
+            return await self.app(scope, receive, send)
+        token = _pretty_json.set(
+            dict(parse_qsl(qs.decode("latin-1"))).get("pretty") in ("1", "true")
         )
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _pretty_json.reset(token)
 
 
 class V2Response_LastPosition(BaseModel):
@@ -106,3 +143,66 @@ class PlaneInstance(BaseModel):
 
 class PlaneList(BaseModel):
     planes: list[PlaneInstance] | None = None
+
+
+class Plane(NamedTuple):
+    """Slotted record for hot request parsing; unpacks as (callsign, lat, lng)."""
+
+    callsign: str
+    lat: float
+    lng: float
+
+
+# PlaneList, inlined for endpoints that parse their body with parse_plane_list
+PLANE_LIST_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "planes": {
+                            "type": "array",
+                            "items": PlaneInstance.model_json_schema(),
+                        }
+                    },
+                }
+            }
+        },
+    }
+}
+
+
+def valid_position(lat: float, lng: float) -> bool:
+    """In range, which also rules out NaN and inf (they have no H3 cell)."""
+    return -90 <= lat <= 90 and -180 <= lng <= 180
+
+
+def parse_planes(items: Iterable) -> list[Plane]:
+    """Validate decoded plane objects.
+
+    Raises ValueError on anything PlaneInstance would reject, and on
+    positions outside the globe.
+    """
+    new, planes = tuple.__new__, []
+    try:
+        for item in items:
+            callsign, lat, lng = item["callsign"], item["lat"], item["lng"]
+            if type(callsign) is not str or type(lat) is bool or type(lng) is bool:
+                raise ValueError(f"invalid plane: {item!r}")
+            plane = new(Plane, (callsign, float(lat), float(lng)))
+            if not valid_position(plane.lat, plane.lng):
+                raise ValueError(f"invalid position: {item!r}")
+            planes.append(plane)
+    except (TypeError, KeyError) as e:
+        raise ValueError(f"invalid plane list: {e!r}")
+    return planes
+
+
+def parse_plane_list(body: bytes) -> list[Plane]:
+    """Fast path for a PlaneList body ({"planes": [...]}), no Pydantic models."""
+    data = orjson.loads(body)
+    if not isinstance(data, dict) or not isinstance(data.get("planes"), list):
+        raise ValueError("expected an object with a planes list")
+    return parse_planes(data["planes"])
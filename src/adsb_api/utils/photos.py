@@ -0,0 +1,111 @@
+import asyncio
+import re
+import time
+import traceback
+
+import aiohttp
+
+from adsb_api.utils.settings import REDIS_KEY_PLANESPOTTERS
+
+PLANESPOTTERS_URL = "https://api.planespotters.net/pub/photos/hex/{hex}"
+NOT_FOUND = b'{"error":"not found"}'
+_HEX = re.compile(r"^~?[0-9a-f]{6}$")
+
+
+class PlanespottersProxy:
+    """Caching proxy for planespotters.net photos by hex.
+
+    Entries are stored as b"<fresh_until>\\n<raw body>" under one key per hex, so
+    hits are served without re-encoding. Stale entries are served while a single
+    background fetch per hex refreshes them; misses and upstream errors are
+    cached briefly so they do not hammer planespotters.net.
+    """
+
+    def __init__(
+        self, ttl: int = 3600, stale_ttl: int = 86400, negative_ttl: int = 300
+    ):
+        self.redis = self._session = None
+        self.connections = None
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._refreshing: set[asyncio.Task] = set()
+
+    async def connect(self):
+        self.redis = self.connections.primary
+        self._session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=5, connect=2)
+        )
+
+    async def shutdown(self):
+        # Stop every fetch before closing the session under it
+        tasks = [*self._refreshing, *self._inflight.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._session:
+            await self._session.close()
+
+    async def get(self, hex: str, reg: str = "", icao_type: str = "") -> bytes:
+        hex = hex.strip().lower()
+        if not _HEX.match(hex):
+            return NOT_FOUND
+
+        if cached := await self.redis.get(f"{REDIS_KEY_PLANESPOTTERS}:{hex}"):
+            fresh_until, body = cached.split(b"\n", 1)
+            if int(fresh_until) < time.time():
+                task = asyncio.create_task(
+                    self._single_flight(hex, reg, icao_type, stale=body)
+                )
+                self._refreshing.add(task)
+                task.add_done_callback(self._refreshing.discard)
+            return body
+        return await self._single_flight(hex, reg, icao_type)
+
+    async def _single_flight(
+        self, hex: str, reg: str, icao_type: str, stale: bytes | None = None
+    ) -> bytes:
+        """One upstream fetch per hex and process; concurrent callers share it."""
+        if (task := self._inflight.get(hex)) is None:
+            task = self._inflight[hex] = asyncio.create_task(
+                self._refresh(hex, reg, icao_type, stale)
+            )
+            task.add_done_callback(lambda _: self._inflight.pop(hex, None))
+        return await asyncio.shield(task)
+
+    async def _refresh(
+        self, hex: str, reg: str, icao_type: str, stale: bytes | None
+    ) -> bytes:
+        key = f"{REDIS_KEY_PLANESPOTTERS}:{hex}"
+        body = await self._fetch_upstream(hex, reg, icao_type)
+        if body is None:
+            if stale is not None:
+                # Keep serving the stale copy, but back off before asking upstream again
+                await self.redis.set(
+                    key,
+                    f"{int(time.time()) + self.negative_ttl}\n".encode() + stale,
+                    keepttl=True,
+                )
+                return stale
+            body, fresh, ex = NOT_FOUND, self.negative_ttl, self.negative_ttl
+        else:
+            fresh, ex = self.ttl, self.ttl + self.stale_ttl
+        await self.redis.set(
+            key, f"{int(time.time()) + fresh}\n".encode() + body, ex=ex
+        )
+        return body
+
+    async def _fetch_upstream(self, hex: str, reg: str, icao_type: str) -> bytes | None:
+        try:
+            async with self._session.get(
+                PLANESPOTTERS_URL.format(hex=hex),
+                params={"icaoType": icao_type, "reg": reg},
+            ) as r:
+                if r.status == 200:
+                    return await r.read()
+                print(f"[PlanespottersProxy] {hex}: HTTP {r.status}")
+        except Exception as e:
+            print(f"[PlanespottersProxy] {hex}: {e}")
+            traceback.print_exc()
+        return None
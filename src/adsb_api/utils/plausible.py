@@ -1,6 +1,8 @@
 from functools import lru_cache
 from math import asin, cos, radians, sin, sqrt
 
+import numpy as np
+
 EARTH_RADIUS = 6371000  # meters
 
 
@@ -17,6 +19,23 @@ def _distance(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
     return EARTH_RADIUS * 2 * asin(sqrt(_hav_distance(lat1, lng1, lat2, lng2)))
 
 
+def segment_lengths_nm(airports: list[dict]) -> list[float]:
+    """Great circle length of each leg between consecutive airports, in nm."""
+    return [
+        round(
+            _distance(
+                radians(a["lat"]),
+                radians(a["lon"]),
+                radians(b["lat"]),
+                radians(b["lon"]),
+            )
+            / 1852,
+            1,
+        )
+        for a, b in zip(airports, airports[1:])
+    ]
+
+
 @lru_cache(maxsize=512)
 def _plausible_sync(pos_lat: float, pos_lng: float,
                    a_lat: float, a_lng: float,
@@ -57,3 +76,62 @@ async def plausible(pos_lat: float, pos_lng: float,
         airport_a_lat, airport_a_lon,
         airport_b_lat, airport_b_lon
     )
+
+
+def _np_hav_distance(lat1, lng1, lat2, lng2):
+    """Angular great circle distance (radians) between arrays of points."""
+    h = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * np.arcsin(np.sqrt(np.clip(h, 0, 1)))
+
+
+def _np_bearing(lat1, lng1, lat2, lng2):
+    """Initial bearing (radians) from point 1 to point 2."""
+    dlng = lng2 - lng1
+    return np.arctan2(
+        np.sin(dlng) * np.cos(lat2),
+        np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(dlng),
+    )
+
+
+def plausible_batch(
+    positions: list[tuple[float, float]], routes: list[list[dict]]
+) -> list[bool]:
+    """Check many positions against their routes in one vectorized pass.
+
+    positions[i] is the (lat, lng) of plane i and routes[i] its list of airports
+    (dicts with "lat" and "lon"). A plane is plausible if, for any leg A-B of its
+    route, it is within the threshold of A or B, or its cross-track distance from
+    the great circle A-B is within the threshold while its along-track distance
+    lies between A and B. The threshold is 50nm or 20% of the leg length.
+    """
+    plane_idx, seg = [], []
+    for i, airports in enumerate(routes):
+        for a, b in zip(airports, airports[1:]):
+            plane_idx.append(i)
+            seg.append((*positions[i], a["lat"], a["lon"], b["lat"], b["lon"]))
+    if not seg:
+        return [False] * len(positions)
+
+    coords = np.radians(np.array(seg, dtype=np.float64))
+    p_lat, p_lng, a_lat, a_lng, b_lat, b_lng = coords.T
+
+    d_ab = _np_hav_distance(a_lat, a_lng, b_lat, b_lng)
+    d_ap = _np_hav_distance(a_lat, a_lng, p_lat, p_lng)
+    d_bp = _np_hav_distance(b_lat, b_lng, p_lat, p_lng)
+    threshold = np.maximum(50 * 1852, 0.20 * d_ab * EARTH_RADIUS) / EARTH_RADIUS
+
+    bearing_ap = _np_bearing(a_lat, a_lng, p_lat, p_lng)
+    delta = bearing_ap - _np_bearing(a_lat, a_lng, b_lat, b_lng)
+    cross_track = np.arcsin(np.clip(np.sin(d_ap) * np.sin(delta), -1, 1))
+    along_cos = np.clip(np.cos(d_ap) / np.cos(cross_track), -1, 1)
+    along_track = np.arccos(along_cos) * np.sign(np.cos(delta))
+
+    ok = (d_ap <= threshold) | (d_bp <= threshold) | (
+        (np.abs(cross_track) <= threshold) & (along_track >= 0) & (along_track <= d_ab)
+    )
+    result = np.zeros(len(positions), dtype=bool)
+    np.logical_or.at(result, np.array(plane_idx), ok)
+    return result.tolist()
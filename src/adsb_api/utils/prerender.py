@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import traceback
+from collections import Counter, defaultdict
+
+import aiohttp
+import orjson
+
+from adsb_api.utils.browser2 import _SimpleBackgroundTaskMixin, background_task
+from adsb_api.utils.settings import (
+    REAPI_ENDPOINT,
+    SCREENSHOT_PRERENDER_INTERVAL,
+    SCREENSHOT_PRERENDER_MIN_REQUESTS,
+    SCREENSHOT_PRERENDER_SQUAWKS,
+    SCREENSHOT_PRERENDER_TABS,
+    SCREENSHOT_PRERENDER_TOP,
+)
+
+
+class ScreenshotPrerenderer(_SimpleBackgroundTaskMixin):
+    """Keeps screenshots of hot aircraft cached ahead of demand.
+
+    Hot means squawking an emergency code, or requested at least min_requests
+    times recently (counts halve every cycle). Renders share the browser pool
+    with user requests: at most tab_budget at a time, and none while user
+    requests are waiting for a tab. Duplicate work across replicas is avoided
+    by the screenshot job claim and the cache TTL check in render.
+    """
+
+    def __init__(
+        self,
+        top_n: int = SCREENSHOT_PRERENDER_TOP,
+        tab_budget: int = SCREENSHOT_PRERENDER_TABS,
+        min_requests: float = SCREENSHOT_PRERENDER_MIN_REQUESTS,
+        squawks: list[str] = SCREENSHOT_PRERENDER_SQUAWKS,
+    ):
+        super().__init__()
+        self.top_n = top_n
+        self.tab_budget = tab_budget
+        self.min_requests = min_requests
+        self.squawks = squawks
+        self.requests = Counter()  # decayed request counts per icao set ("hex1,hex2")
+        self.stats = defaultdict(int)
+        self.render = self.pool = self._session = None
+        self.logger = logging.getLogger(__name__)
+
+    def record(self, icaos: list[str]):
+        self.requests[",".join(icaos)] += 1
+
+    async def start(self, render, pool):
+        """render(icaos, min_ttl) -> bool renders and caches one screenshot.
+
+        pool is the BrowserTabPool.
+        """
+        self.render, self.pool = render, pool
+        self._session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=5, connect=2)
+        )
+        if not self._bg_task_handles:
+            await self.start_bg_tasks()
+
+    async def stop(self):
+        await self.stop_bg_tasks()
+        if self._session:
+            await self._session.close()
+
+    async def _emergencies(self) -> list[str]:
+        async def fetch(squawk):
+            async with self._session.get(
+                f"{REAPI_ENDPOINT}?all&filter_squawk={squawk}"
+            ) as r:
+                if r.status != 200:
+                    print(f"[ScreenshotPrerenderer] re-api {squawk}: HTTP {r.status}")
+                    return []
+                return [
+                    ac["hex"]
+                    for ac in (await r.json(loads=orjson.loads)).get("aircraft", [])
+                    if ac.get("lat") is not None
+                ]
+
+        return [
+            hex
+            for hexes in await asyncio.gather(*map(fetch, self.squawks))
+            for hex in hexes
+        ]
+
+    def hot(self, emergencies: list[str]) -> list[str]:
+        """Up to top_n icao sets: emergencies first, then the most requested."""
+        popular = [
+            key for key, n in self.requests.most_common() if n >= self.min_requests
+        ]
+        return list(dict.fromkeys([*emergencies, *popular]))[: self.top_n]
+
+    def _decay(self):
+        for key in list(self.requests):
+            self.requests[key] /= 2
+            if self.requests[key] < 0.5:
+                del self.requests[key]
+
+    @background_task(interval=SCREENSHOT_PRERENDER_INTERVAL)
+    async def _prerender(self):
+        targets = self.hot(await self._emergencies())
+        self._decay()
+        if self.pool.saturated():
+            # No tab to be had soon: prerenders would only queue up as user demand
+            self.stats["saturated"] += 1
+            return
+        budget = asyncio.Semaphore(self.tab_budget)
+
+        async def one(key):
+            async with budget:
+                if self.pool.waiters:
+                    # Users are queueing for tabs: they go first
+                    self.stats["deferred"] += 1
+                    return
+                try:
+                    # Re-render only copies that would expire before the next cycle
+                    rendered = await self.render(
+                        key.split(","), min_ttl=SCREENSHOT_PRERENDER_INTERVAL
+                    )
+                    self.stats["rendered" if rendered else "skipped"] += 1
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    traceback.print_exc()
+                    print(f"[ScreenshotPrerenderer] {key}: {e}")
+
+        await asyncio.gather(*map(one, targets))
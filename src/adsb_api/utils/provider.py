@@ -3,23 +3,143 @@ import csv
 import gzip
 import hashlib
 import re
+import time
 import traceback
 import uuid
+from collections import defaultdict
 from datetime import datetime
 from functools import lru_cache
 from socket import gethostname
 
 import aiodns
 import aiohttp
+import h3
 import humanhash
 import orjson
 import redis.asyncio as redis
 
+from adsb_api.utils.airports import AirportIndex
+from adsb_api.utils.cache import MISSING, TTLCache
+from adsb_api.utils.plausible import plausible_batch, segment_lengths_nm
 from adsb_api.utils.reapi import ReAPI
-from adsb_api.utils.settings import (INGEST_DNS, INGEST_HTTP_PORT, MLAT_SERVERS, REAPI_ENDPOINT, REDIS_KEY_BEAST_CLIENTS, REDIS_KEY_BEAST_RECEIVERS, REDIS_KEY_HUB_AIRCRAFT, REDIS_KEY_MLAT_CLIENTS, REDIS_KEY_MLAT_SYNC, REDIS_KEY_MLAT_TOTALCOUNT, SALT_MLAT, SALT_MY, STATS_URL)
+from adsb_api.utils.settings import (
+    INGEST_DNS,
+    INGEST_HTTP_PORT,
+    MLAT_SERVERS,
+    REAPI_ENDPOINT,
+    REDIS_KEY_BEAST_BY_IP,
+    REDIS_KEY_BEAST_CLIENTS,
+    REDIS_KEY_BEAST_COUNT,
+    REDIS_KEY_BEAST_RECEIVERS,
+    REDIS_KEY_HUB_AIRCRAFT,
+    REDIS_KEY_MLAT_BY_IP,
+    REDIS_KEY_MLAT_CLIENTS,
+    REDIS_KEY_MLAT_COUNT,
+    REDIS_KEY_MLAT_SYNC,
+    REDIS_KEY_MLAT_TOTALCOUNT,
+    REDIS_KEY_RECEIVER_AIRCRAFT,
+    REDIS_KEY_VRS_AIRPORT,
+    REDIS_KEY_VRS_AIRPORTS,
+    REDIS_KEY_VRS_INDEX,
+    REDIS_KEY_VRS_LIVE,
+    REDIS_KEY_VRS_PLAUSIBLE,
+    REDIS_KEY_VRS_ROUTE,
+    REDIS_KEY_VRS_ROUTES_VERSION,
+    ROUTE_CACHE_SIZE,
+    ROUTE_PLAUSIBLE_H3_RES,
+    ROUTE_WARMER_INTERVAL,
+    SALT_MLAT,
+    SALT_MY,
+    STATS_URL,
+)
 
 _HOSTNAME = gethostname()
-_UNKNOWN_ROUTE = {"callsign": "", "number": "unknown", "airline_code": "unknown", "airport_codes": "unknown", "_airport_codes_iata": "unknown", "_airports": []}
+_UNKNOWN_ROUTE = {
+    "callsign": "",
+    "number": "unknown",
+    "airline_code": "unknown",
+    "airport_codes": "unknown",
+    "_airport_codes_iata": "unknown",
+    "_airports": [],
+    "_segment_lengths_nm": [],
+}
+
+
+_LIVE_FIELDS = ("hex", "lat", "lon", "alt_baro", "gs", "track", "squawk", "seen")
+
+
+def _parse_airport(row: str) -> dict | None:
+    try:
+        icao, n, _, i, l, c, la, lo, a = next(csv.reader([row]))
+        return {
+            "name": n,
+            "icao": icao,
+            "iata": i,
+            "location": l,
+            "countryiso2": c,
+            "lat": float(la),
+            "lon": float(lo),
+            "alt_feet": float(a),
+            "alt_meters": round(float(a) * 0.3048, 2),
+        }
+    except (ValueError, StopIteration, csv.Error):
+        return None
+
+
+def _join_route(row: str, airports: dict[str, dict]) -> dict | None:
+    """Join a VRS routes.csv row with its airports into a ready-to-serve route."""
+    try:
+        callsign, _, num, airline, codes = row.split(",")
+    except ValueError:
+        return None
+    route = {
+        **_UNKNOWN_ROUTE,
+        "callsign": callsign,
+        "number": num,
+        "airline_code": airline,
+        "airport_codes": codes,
+    }
+    if codes == "unknown":
+        return route
+
+    ap_data = [airports.get(a) for a in codes.split("-")]
+    route["_airports"] = [a for a in ap_data if a]
+    route["_airport_codes_iata"] = "-".join(
+        d["iata"] if d and len(ap) == 4 and d["iata"] else ap
+        for ap, d in zip(codes.split("-"), ap_data)
+    )
+    route["_segment_lengths_nm"] = segment_lengths_nm(route["_airports"])
+    return route
+
+
+def _route_index_keys(route: dict) -> set[str]:
+    """Secondary index entries for a joined route.
+
+    Its airline, each airport and each ordered airport pair.
+    """
+    keys = set()
+    if route["airline_code"] not in ("", "unknown"):
+        keys.add(f"airline:{route['airline_code']}")
+    if route["airport_codes"] != "unknown":
+        codes = route["airport_codes"].split("-")
+        keys.update(f"airport:{c}" for c in codes)
+        keys.update(
+            f"pair:{a}-{b}"
+            for i, a in enumerate(codes)
+            for b in codes[i + 1 :]
+            if a != b
+        )
+    return keys
+
+
+def with_field(obj: bytes, key: str, value: bytes) -> bytes:
+    """Append an already serialized field to a serialized JSON object."""
+    return obj[:-1] + b',"' + key.encode() + b'":' + value + b"}"
+
+
+def with_plausible(route: bytes, plausible: bool) -> bytes:
+    """Splice the plausible flag into a serialized route without re-encoding it."""
+    return route[:-1] + (b',"plausible":true}' if plausible else b',"plausible":false}')
 
 
 async def _locked(r: redis.Redis, name: str, ttl: int, coro):
@@ -31,14 +151,32 @@ async def _locked(r: redis.Redis, name: str, ttl: int, coro):
             await r.eval("if redis.call('get', KEYS[1]):find(ARGV[1]) == 1 then return redis.call('del', KEYS[1]) end", 1, f"lock:{name}", f"{_HOSTNAME}:")
 
 
-class Base: ...
+class Base:
+    """Redis access: self.redis is the primary, self.redis_ro for read-only lookups."""
+
+    connections = None
+
+    @property
+    def redis_ro(self):
+        """A replica when one is configured and up, else the primary.
+
+        Read it once per lookup.
+        """
+        r = self.connections.replica() if self.connections else None
+        return self.redis if r is None else r
+
 
-def _background_task(interval: int, lock: str, lock_expire: int, success_interval: int | None = None):
+def _background_task(
+    interval: int,
+    lock: str | None,
+    lock_expire: int,
+    success_interval: int | None = None,
+):
     """Decorator to mark a method as a background task.
 
     Args:
         interval: Default sleep interval between runs (seconds)
-        lock: Redis lock name prefix
+        lock: Redis lock name prefix, or None to run in every process
         lock_expire: Lock TTL (seconds)
         success_interval: Optional sleep interval when task returns True
     """
@@ -86,11 +224,16 @@ class BackgroundTaskMixin:
         success_interval = config.get("success_interval")
 
         while True:
+            result = None
             try:
                 async def _():
                     return await coro()
 
-                result = await _locked(self.redis, lock, lock_expire, _)
+                result = (
+                    await _locked(self.redis, lock, lock_expire, _)
+                    if lock
+                    else await coro()
+                )
             except Exception as e:
                 print(f"[{self.__class__.__name__}] Task {name} error: {e}")
                 traceback.print_exc()
@@ -124,26 +267,101 @@ def _humanhash(uuid: str, salt: str) -> str:
     return humanhash.humanize(_salty(uuid, salt).replace("-", ""), words=4)
 
 
+_MLAT_CLIENT_FIELDS = (
+    "user",
+    "privacy",
+    "connection",
+    "peer_count",
+    "bad_sync_timeout",
+    "outlier_percent",
+)
+
+
+def _mlat_client_view(c: dict) -> dict:
+    o = {k: c[k] for k in _MLAT_CLIENT_FIELDS if k in c}
+    u = c.get("uuid")
+    if isinstance(u, list) and u:
+        o["uuid"] = u[0][:13] + "-..."
+    elif isinstance(u, str):
+        o["uuid"] = u[:13] + "-..."
+    else:
+        o["uuid"] = None
+    return o
+
+
+def _beast_by_ip(clients: list[dict]) -> dict[str, bytes]:
+    """Serialized public view of the beast clients, per source IP."""
+    by_ip = defaultdict(list)
+    for c in clients:
+        by_ip[c["ip"]].append({k: v for k, v in c.items() if not k.startswith("_")})
+    return {ip: orjson.dumps(v) for ip, v in by_ip.items()}
+
+
+def _mlat_by_ip(clients: dict[str, dict]) -> dict[str, bytes]:
+    """Serialized public view of the mlat clients of every server, per source IP."""
+    by_ip = defaultdict(list)
+    for d in clients.values():
+        for c in d.values():
+            if ip := c.get("source_ip"):
+                by_ip[ip].append(_mlat_client_view(c))
+    return {ip: orjson.dumps(v) for ip, v in by_ip.items()}
+
+
+def _replace_hash(pipe, key: str, mapping: dict, ex: int):
+    pipe.delete(key)
+    if mapping:
+        pipe.hset(key, mapping=mapping)
+        pipe.expire(key, ex)
+
+
 class Provider(BackgroundTaskMixin, Base):
     # Redis helpers for JSON data
+    def _json_set(self, pipe, key: str, obj, ex: int):
+        """Queue a JSON blob and a fresh {key}:version stamp for re-decoding readers."""
+        pipe.set(key, orjson.dumps(obj), ex=ex)
+        pipe.set(f"{key}:version", time.time_ns(), ex=ex)
+
     async def _json_get(self, key: str):
-        data = await self.redis.get(key)
-        return orjson.loads(data) if data else None
+        return (await self._json_gets([key])).get(key)
 
     async def _json_gets(self, keys: list[str]) -> dict:
-        """Get multiple JSON values in parallel."""
-        vals = await self.redis.mget(keys)
-        return {k: orjson.loads(v) for k, v in zip(keys, vals) if v}
+        """Get multiple JSON values, decoded at most once per written version.
+
+        Values may be shared between requests: treat them as read-only.
+        """
+        r = self.redis_ro  # versions and blobs from the same server
+        versions = await r.mget([f"{k}:version" for k in keys])
+        out, stale = {}, []
+        for k, v in zip(keys, versions):
+            cached = self._snapshots.get(k)
+            if v is not None and cached is not None and cached[0] == v:
+                out[k] = cached[1]
+            else:
+                stale.append((k, v))
+        self.snapshot_stats["hit"] += len(out)
+        self.snapshot_stats["miss"] += len(stale)
+        if stale:
+            for (k, v), blob in zip(stale, await r.mget([k for k, _ in stale])):
+                if not blob:
+                    self._snapshots.pop(k, None)
+                    continue
+                out[k] = orjson.loads(blob)
+                if v is not None:
+                    self._snapshots[k] = (v, out[k])
+        return out
+
     def __init__(self, enabled_bg_tasks):
         super().__init__()
+        # key -> (version, decoded value)
+        self._snapshots: dict[str, tuple[bytes, object]] = {}
+        self.snapshot_stats = defaultdict(int)
         self.ReAPI = ReAPI(REAPI_ENDPOINT)
         self.redis = self.resolver = None
-        self.redis_connection_string = None
         self.enabled_bg_tasks = enabled_bg_tasks
         self._session = None
 
     async def startup(self):
-        self.redis = await redis.from_url(self.redis_connection_string)
+        self.redis = self.connections.primary
         self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5, connect=1))
         self.resolver = aiodns.DNSResolver()
         await self.start_bg_tasks(self.enabled_bg_tasks)
@@ -177,8 +395,14 @@ class Provider(BackgroundTaskMixin, Base):
                     clients.extend(r.get("clients", []))
                     receivers.extend(r.get("receivers", []))
 
-            await self.redis.set(REDIS_KEY_BEAST_CLIENTS, orjson.dumps(self._dedupe(clients)), ex=15)
-            await self.redis.set(REDIS_KEY_BEAST_RECEIVERS, orjson.dumps(receivers), ex=15)
+            clients = self._dedupe(clients)
+            # Blobs, per-IP lists and the count for /0/me and /0/my, swapped in together
+            pipe = self.redis.pipeline()
+            self._json_set(pipe, REDIS_KEY_BEAST_CLIENTS, clients, ex=15)
+            self._json_set(pipe, REDIS_KEY_BEAST_RECEIVERS, receivers, ex=15)
+            pipe.set(REDIS_KEY_BEAST_COUNT, len(clients), ex=15)
+            _replace_hash(pipe, REDIS_KEY_BEAST_BY_IP, _beast_by_ip(clients), ex=15)
+            await pipe.execute()
             print(f"[_fetch_ingest] {len(clients)} clients, {len(receivers)} receivers")
         except Exception as e:
             print(f"[_fetch_ingest] Error: {e}")
@@ -244,41 +468,55 @@ class Provider(BackgroundTaskMixin, Base):
                 print(f"[_fetch_mlat] Error fetching from {srv}: {e}")
 
         await asyncio.gather(*(fetch(s) for s in MLAT_SERVERS))
-        await self.redis.set(REDIS_KEY_MLAT_SYNC, orjson.dumps(data), ex=15)
-        await self.redis.set(REDIS_KEY_MLAT_CLIENTS, orjson.dumps(clients), ex=15)
-        await self.redis.set(REDIS_KEY_MLAT_TOTALCOUNT, orjson.dumps({"UPDATED": datetime.now().strftime("%a %b %d %H:%M:%S UTC %Y"), **{sv: [len(d), 1337, 0] for sv, d in data.items()}}), ex=15)
+        pipe = self.redis.pipeline()
+        self._json_set(pipe, REDIS_KEY_MLAT_SYNC, data, ex=15)
+        self._json_set(pipe, REDIS_KEY_MLAT_CLIENTS, clients, ex=15)
+        totals = {"UPDATED": datetime.now().strftime("%a %b %d %H:%M:%S UTC %Y")}
+        totals.update((sv, [len(d), 1337, 0]) for sv, d in data.items())
+        self._json_set(pipe, REDIS_KEY_MLAT_TOTALCOUNT, totals, ex=15)
+        pipe.set(REDIS_KEY_MLAT_COUNT, sum(len(d) for d in clients.values()), ex=15)
+        _replace_hash(pipe, REDIS_KEY_MLAT_BY_IP, _mlat_by_ip(clients), ex=15)
+        await pipe.execute()
 
     async def get_clients_per_client_ip(self, ip: str) -> list:
-        clients = await self._json_get(REDIS_KEY_BEAST_CLIENTS) or []
-        return [{k: v for k, v in c.items() if not k.startswith("_")} for c in clients if c["ip"] == ip]
+        clients = await self.redis_ro.hget(REDIS_KEY_BEAST_BY_IP, ip)
+        return orjson.loads(clients) if clients else []
 
     async def mlat_clients_to_list(self, ip: str) -> list:
-        keys = ("user", "privacy", "connection", "peer_count", "bad_sync_timeout", "outlier_percent")
-        mlat_clients = await self._json_get(REDIS_KEY_MLAT_CLIENTS) or {}
-        r = []
-        for d in mlat_clients.values():
-            for c in d.values():
-                if c.get("source_ip") == ip:
-                    o = {k: c[k] for k in keys if k in c}
-                    u = c.get("uuid")
-                    if isinstance(u, list) and u:
-                        o["uuid"] = u[0][:13] + "-..."
-                    elif isinstance(u, str):
-                        o["uuid"] = u[:13] + "-..."
-                    else:
-                        o["uuid"] = None
-                    r.append(o)
-        return r
+        clients = await self.redis_ro.hget(REDIS_KEY_MLAT_BY_IP, ip)
+        return orjson.loads(clients) if clients else []
+
+    async def get_me(self, ip: str) -> tuple[list, list, dict]:
+        """Beast and mlat clients from ip, and the beast / mlat / aircraft counts.
+
+        One round-trip.
+        """
+        pipe = self.redis_ro.pipeline(transaction=False)
+        pipe.hget(REDIS_KEY_BEAST_BY_IP, ip)
+        pipe.hget(REDIS_KEY_MLAT_BY_IP, ip)
+        pipe.mget([REDIS_KEY_BEAST_COUNT, REDIS_KEY_MLAT_COUNT, REDIS_KEY_HUB_AIRCRAFT])
+        beast, mlat, counts = await pipe.execute()
+        return (
+            orjson.loads(beast) if beast else [],
+            orjson.loads(mlat) if mlat else [],
+            dict(zip(("beast", "mlat", "aircraft"), (int(c or 0) for c in counts))),
+        )
 
 
 class RedisVRS(BackgroundTaskMixin, Base):
     def __init__(self):
         super().__init__()
         self.redis = self._session = None
-        self.redis_connection_string = None
+        self._route_cache = TTLCache(ROUTE_CACHE_SIZE, ttl=1200)
+        self._routes_version = None
+        self._routes_version_checked = 0.0
+        self.cache_stats = defaultdict(int)
+        self.airport_index = AirportIndex([])
+        self._airport_index_version = None
+        self._airport_index_checked = 0.0
 
     async def connect(self):
-        self.redis = await redis.from_url(self.redis_connection_string)
+        self.redis = self.connections.primary
         self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10))
 
     async def shutdown(self):
@@ -289,87 +527,297 @@ class RedisVRS(BackgroundTaskMixin, Base):
     async def dispatch_background_task(self):
         await self.start_bg_tasks()
 
-    @_background_task(interval=60, lock="vrs_csv", lock_expire=3600, success_interval=3600)
+    async def _download_rows(self, url: str) -> list[str] | None:
+        async with self._session.get(url) as r:
+            if r.status != 200:
+                print(f"[RedisVRS._loop] {url}: HTTP {r.status}")
+                return None
+            return gzip.decompress(await r.read()).decode().splitlines()
+
+    @_background_task(
+        interval=60, lock="vrs_joined", lock_expire=3600, success_interval=3600
+    )
     async def _loop(self):
-        for name, url in (("route", "https://vrs-standing-data.adsb.lol/routes.csv.gz"), ("airport", "https://vrs-standing-data.adsb.lol/airports.csv.gz")):
-            try:
-                async with self._session.get(url) as r:
-                    if r.status == 200:
-                        pipe = self.redis.pipeline()
-                        count = 0
-                        for row in gzip.decompress(await r.read()).decode().splitlines():
-                            pipe.set(f"vrs:{name}:{row.split(',')[0]}", row)
-                            count += 1
-                        await pipe.execute()
-                        print(f"[RedisVRS._loop] {name}: {count} rows")
-            except Exception as e:
-                print(f"[RedisVRS._loop] Error fetching {name}: {e}")
-                traceback.print_exc()
+        """Load VRS standing data, materializing joined route records once per load."""
+        try:
+            airport_rows = await self._download_rows("https://vrs-standing-data.adsb.lol/airports.csv.gz")
+            route_rows = await self._download_rows("https://vrs-standing-data.adsb.lol/routes.csv.gz")
+            if airport_rows is None or route_rows is None:
+                return False
+
+            airports = {a["icao"]: a for a in map(_parse_airport, airport_rows) if a}
+            version = str(time.time()).encode()
+            pipe = self.redis.pipeline()
+            for icao, airport in airports.items():
+                pipe.set(f"{REDIS_KEY_VRS_AIRPORT}:{icao}", orjson.dumps(airport))
+            pipe.set(REDIS_KEY_VRS_AIRPORTS, orjson.dumps(list(airports.values())))
+            pipe.set(f"{REDIS_KEY_VRS_AIRPORTS}:version", version)
+            await pipe.execute()
+            self.airport_index, self._airport_index_version = (
+                AirportIndex(list(airports.values())),
+                version,
+            )
+            print(f"[RedisVRS._loop] airport: {len(airports)} rows")
+
+            pipe, count, index = self.redis.pipeline(), 0, defaultdict(list)
+            for row in route_rows:
+                if route := _join_route(row, airports):
+                    pipe.set(
+                        f"{REDIS_KEY_VRS_ROUTE}:{route['callsign']}",
+                        orjson.dumps(route),
+                    )
+                    for key in _route_index_keys(route):
+                        index[key].append(route["callsign"])
+                    count += 1
+            pipe.set(REDIS_KEY_VRS_ROUTES_VERSION, version)
+            # Entries for routes dropped from the dataset age out, nothing scans
+            for key, callsigns in index.items():
+                pipe.set(
+                    f"{REDIS_KEY_VRS_INDEX}:{key}",
+                    orjson.dumps(callsigns),
+                    ex=7 * 86400,
+                )
+            await pipe.execute()
+            print(f"[RedisVRS._loop] route: {count} rows, {len(index)} index keys")
+        except Exception as e:
+            print(f"[RedisVRS._loop] Error loading standing data: {e}")
+            traceback.print_exc()
+            return False
         return True
 
-    async def mget(self, keys: list[str]) -> list:
-        return [v.decode() if v else None for v in await self.redis.mget(keys)] if keys else []
-
     async def get_airport(self, icao: str) -> dict | None:
-        d = await self.redis.get(f"vrs:airport:{icao}")
-        if not d:
-            return None
-        try:
-            _, n, _, i, l, c, la, lo, a = list(csv.reader([d.decode()]))[0]
-            return {"name": n, "icao": icao, "iata": i, "location": l, "countryiso2": c, "lat": float(la), "lon": float(lo), "alt_feet": float(a), "alt_meters": round(float(a) * 0.3048, 2)}
-        except (ValueError, IndexError, csv.Error):
-            return None
+        d = await self.redis_ro.get(f"{REDIS_KEY_VRS_AIRPORT}:{icao}")
+        return orjson.loads(d) if d else None
+
+    async def get_airport_index(self) -> AirportIndex:
+        """This process's airport index, rebuilt when a new dataset is published."""
+        if time.monotonic() - self._airport_index_checked > 60:
+            self._airport_index_checked = time.monotonic()
+            version = await self.redis.get(f"{REDIS_KEY_VRS_AIRPORTS}:version")
+            if version and version != self._airport_index_version:
+                if blob := await self.redis.get(REDIS_KEY_VRS_AIRPORTS):
+                    self.airport_index, self._airport_index_version = (
+                        AirportIndex(orjson.loads(blob)),
+                        version,
+                    )
+                    print(
+                        f"[RedisVRS] airport index: {len(self.airport_index)} airports"
+                    )
+        return self.airport_index
+
+    @_background_task(
+        interval=ROUTE_WARMER_INTERVAL,
+        lock="route_warmer",
+        lock_expire=ROUTE_WARMER_INTERVAL * 2,
+    )
+    async def _warm_routes(self):
+        """Publish the airborne callsigns, fill the shared plausible layer for them."""
+        async with self._session.get(f"{REAPI_ENDPOINT}?all&jv2") as r:
+            if r.status != 200:
+                print(f"[RedisVRS._warm_routes] re-api: HTTP {r.status}")
+                return
+            aircraft = (await r.json(loads=orjson.loads)).get("ac", [])
+
+        planes, live = [], {}
+        for ac in aircraft:
+            if (
+                (cs := ac.get("flight", "").strip())
+                and ac.get("lat") is not None
+                and ac.get("lon") is not None
+            ):
+                planes.append((cs, ac["lat"], ac["lon"]))
+                live[cs] = orjson.dumps({k: ac[k] for k in _LIVE_FIELDS if k in ac})
+        for i in range(0, len(planes), 1000):
+            await self.resolve_routes(planes[i:i + 1000], count_stats=False)
+
+        pipe = self.redis.pipeline()
+        pipe.delete(REDIS_KEY_VRS_LIVE)
+        if live:
+            pipe.hset(REDIS_KEY_VRS_LIVE, mapping=live)
+            pipe.expire(REDIS_KEY_VRS_LIVE, ROUTE_WARMER_INTERVAL * 3)
+        await pipe.execute()
+        print(f"[RedisVRS._warm_routes] {len(planes)} airborne callsigns")
+
+    @_background_task(interval=ROUTE_WARMER_INTERVAL, lock=None, lock_expire=0)
+    async def _warm_local_routes(self):
+        """Load this process's route layer for the callsigns _warm_routes published.
+
+        So interactive calls hit it in every process, not only the lock holder.
+        """
+        callsigns = [
+            cs.decode() for cs in await self.redis_ro.hkeys(REDIS_KEY_VRS_LIVE)
+        ]
+        for i in range(0, len(callsigns), 1000):
+            await self._get_route_entries(callsigns[i:i + 1000], count_stats=False)
+
+    async def get_indexed_routes(
+        self,
+        index: str,
+        key: str,
+        live: bool = False,
+        offset: int = 0,
+        limit: int = 1000,
+    ) -> list[bytes]:
+        """Serialized routes from a secondary index (airport, airline or pair).
+
+        With live, only airborne ones, each carrying a "live" object with the
+        aircraft's current position.
+        """
+        r = self.redis_ro
+        blob = await r.get(f"{REDIS_KEY_VRS_INDEX}:{index}:{key}")
+        callsigns = orjson.loads(blob) if blob else []
+        if live and callsigns:
+            live_values = await r.hmget(REDIS_KEY_VRS_LIVE, callsigns)
+            positions = dict(zip(callsigns, live_values))
+            callsigns = [cs for cs in callsigns if positions[cs]]
+        callsigns = callsigns[offset:offset + limit]
+        if not callsigns:
+            return []
+        routes = await r.mget([f"{REDIS_KEY_VRS_ROUTE}:{cs}" for cs in callsigns])
+        if live:
+            return [
+                with_field(r, "live", positions[cs])
+                for cs, r in zip(callsigns, routes)
+                if r
+            ]
+        return [r for r in routes if r]
+
+    async def _check_routes_version(self):
+        """Forget this process's joined routes once a new dataset is published.
+
+        Checked every 10 s at most.
+        """
+        if time.monotonic() - self._routes_version_checked < 10:
+            return
+        self._routes_version_checked = time.monotonic()
+        version = await self.redis_ro.get(REDIS_KEY_VRS_ROUTES_VERSION)
+        if version != self._routes_version:
+            self._route_cache.clear()
+            self._routes_version = version
+
+    async def _get_route_entries(
+        self, callsigns: list[str], count_stats: bool = True
+    ) -> dict[str, tuple[bytes, list | None]]:
+        """Route layer, position independent.
+
+        (serialized route, airports to check or None) per callsign.
+        """
+        await self._check_routes_version()
+        entries, misses = {}, []
+        for cs in callsigns:
+            if (entry := self._route_cache.get(cs)) is MISSING:
+                misses.append(cs)
+            else:
+                entries[cs] = entry
+        if count_stats:
+            self.cache_stats["route", "hit"] += len(entries)
+            self.cache_stats["route", "miss"] += len(misses)
+
+        if misses:
+            keys = [f"{REDIS_KEY_VRS_ROUTE}:{cs}" for cs in misses]
+            vals = await self.redis_ro.mget(keys)
+            for cs, v in zip(misses, vals):
+                if v:
+                    route = orjson.loads(v)
+                    known = route["airport_codes"] != "unknown"
+                    entry = (v, route["_airports"] if known else None)
+                else:
+                    entry = (orjson.dumps({**_UNKNOWN_ROUTE, "callsign": cs}), None)
+                self._route_cache.set(cs, entry)
+                entries[cs] = entry
+        return entries
+
+    async def resolve_routes(
+        self, planes: list[tuple[str, float, float]], count_stats: bool = True
+    ) -> dict[str, bytes]:
+        """Serialized routes with their plausible flag, keyed by callsign.
+
+        planes are (callsign, lat, lng) tuples.
+
+        Plausibility is cached per (callsign, H3 cell) and computed at the cell center,
+        so it follows the aircraft while the joined route itself is cached per callsign.
+        """
+        entries = await self._get_route_entries(
+            list(dict.fromkeys(cs for cs, _, _ in planes)), count_stats
+        )
+        checks = {
+            (cs, h3.latlng_to_cell(lat, lng, ROUTE_PLAUSIBLE_H3_RES)): entries[cs]
+            for cs, lat, lng in planes
+            if entries[cs][1] is not None
+        }
+        keys = list(checks)
+        vals = []
+        if keys:
+            prefix = REDIS_KEY_VRS_PLAUSIBLE
+            vals = await self.redis_ro.mget([f"{prefix}:{cs}:{c}" for cs, c in keys])
+
+        flags, todo = {}, []
+        for key, v in zip(keys, vals):
+            if v is None:
+                todo.append(key)
+            else:
+                flags[key[0]] = v == b"1"
+        if count_stats:
+            self.cache_stats["plausible", "hit"] += len(keys) - len(todo)
+            self.cache_stats["plausible", "miss"] += len(todo)
+
+        if todo:
+            results = plausible_batch(
+                [h3.cell_to_latlng(cell) for _, cell in todo],
+                [checks[key][1] for key in todo],
+            )
+            pipe = self.redis.pipeline(transaction=False)
+            for (cs, cell), is_plausible in zip(todo, results):
+                flags[cs] = is_plausible
+                pipe.set(
+                    f"{REDIS_KEY_VRS_PLAUSIBLE}:{cs}:{cell}",
+                    b"1" if is_plausible else b"0",
+                    ex=1200 if is_plausible else 60,
+                )
+            await pipe.execute()
+
+        return {
+            cs: with_plausible(route, flags[cs]) if cs in flags else route
+            for cs, (route, _) in entries.items()
+        }
 
-    async def _route(self, callsign: str, vrsroute: str) -> dict:
-        _, _, num, airline, airports = vrsroute.split(",")
-        route = {**_UNKNOWN_ROUTE, "callsign": callsign, "number": num, "airline_code": airline, "airport_codes": airports}
-        if airports == "unknown":
-            return route
 
-        ap_data = await asyncio.gather(*(self.get_airport(a) for a in airports.split("-")))
-        route["_airports"] = [a for a in ap_data if a]
-        route["_airport_codes_iata"] = airports
+class _ReceiverView:
+    """Aircraft one receiver sees now, each serialized once per cycle and shared."""
 
-        for ap, data in zip(airports.split("-"), ap_data):
-            if data and len(ap) == 4 and data.get("iata"):
-                route["_airport_codes_iata"] = route["_airport_codes_iata"].replace(ap, data["iata"])
-        return route
+    __slots__ = ("aircraft",)
 
-    async def get_route(self, callsign: str) -> dict:
-        v = await self.redis.get(f"vrs:route:{callsign}")
-        return await self._route(callsign, v.decode()) if v else {**_UNKNOWN_ROUTE, "callsign": callsign}
+    def __init__(self):
+        self.aircraft: dict[str, bytes] = {}
 
-    async def get_routes_bulk(self, callsigns: list[str]) -> dict:
-        if not callsigns:
-            return {}
-        vals = await self.mget([f"vrs:route:{cs}" for cs in callsigns])
-        # Parallel _route() calls instead of sequential
-        pairs = [(cs, v) for cs, v in zip(callsigns, vals) if v]
-        results = await asyncio.gather(*(self._route(cs, v) for cs, v in pairs))
-        return {cs: route for (cs, _), route in zip(pairs, results)}
-
-    async def get_cached_route(self, callsign: str) -> dict | None:
-        v = await self.redis.get(f"vrs:routecache:{callsign}")
-        return orjson.loads(v) if v else None
-
-    async def get_cached_routes_bulk(self, callsigns: list[str]) -> dict:
-        if not callsigns:
-            return {}
-        vals = await self.mget([f"vrs:routecache:{cs}" for cs in callsigns])
-        return {cs: (orjson.loads(v) if v else None) for cs, v in zip(callsigns, vals)}
+    def blob(self) -> bytes:
+        # Comma-joined records: blobs of several receivers concatenate into one array
+        return b",".join(self.aircraft.values())
 
-    async def cache_route(self, callsign: str, plausible: bool, route: dict):
-        await self.redis.set(f"vrs:routecache:{callsign}", orjson.dumps(route), ex=1200 if plausible else 60)
+
+def _receiver_views(ingests: list[dict]) -> dict[str, _ReceiverView]:
+    """Inverted index receiver -> aircraft from each ingest's aircraft.json."""
+    views = {}
+    for data in ingests:
+        for ac in data.get("aircraft", []):
+            receivers = ac.pop("recentReceiverIds", None)
+            if not receivers:
+                continue
+            record = orjson.dumps(ac)
+            for r in receivers:
+                if (view := views.get(r)) is None:
+                    view = views[r] = _ReceiverView()
+                view.aircraft[ac["hex"]] = record
+    return views
 
 
 class FeederData(BackgroundTaskMixin, Base):
     def __init__(self):
         super().__init__()
         self.redis = self._session = self._resolver = None
-        self.redis_connection_string = None
 
     async def connect(self):
-        self.redis = await redis.from_url(self.redis_connection_string)
+        self.redis = self.connections.primary
         self._resolver = aiodns.DNSResolver()
         self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5, connect=1))
 
@@ -386,27 +834,21 @@ class FeederData(BackgroundTaskMixin, Base):
             async with asyncio.timeout(10):
                 ips = [x.host for x in await self._resolver.query(INGEST_DNS, "A")]
                 results = await asyncio.gather(*(self._fetch(ip) for ip in ips), return_exceptions=True)
-                pipe, recv_ingest = self.redis.pipeline(), {}
-
+                ingests = []
                 for ip, data in zip(ips, results):
                     if isinstance(data, Exception):
                         print(f"[FeederData._loop] Error from {ip}: {data}")
                         continue
-                    if not data:
-                        continue
-                    for ac in data.get("aircraft", []):
-                        for r in ac.get("recentReceiverIds", []):
-                            recv_ingest[r] = ip
-                            pipe.zadd(f"receiver_ac:{r}", {ac["hex"]: int(asyncio.get_event_loop().time())})
-
-                now = int(asyncio.get_event_loop().time())
-                for r, ip in recv_ingest.items():
-                    pipe.zremrangebyscore(f"receiver_ac:{r}", "-1", now - 60)
-                    pipe.expire(f"receiver_ac:{r}", 30)
-                    pipe.set(f"receiver_ingest:{r}", ip, ex=30)
+                    if data:
+                        ingests.append(data)
+
+                views = _receiver_views(ingests)
+                pipe = self.redis.pipeline(transaction=False)
+                for r, view in views.items():
+                    pipe.set(f"{REDIS_KEY_RECEIVER_AIRCRAFT}:{r}", view.blob(), ex=30)
                 await pipe.execute()
                 total_ac = sum(len(d.get("aircraft", [])) for d in results if isinstance(d, dict) and d)
-                print(f"[FeederData._loop] {total_ac} aircraft, {len(recv_ingest)} receivers")
+                print(f"[FeederData._loop] {total_ac} aircraft, {len(views)} receivers")
         except Exception as e:
             print(f"[FeederData._loop] Error: {e}")
             traceback.print_exc()
@@ -415,17 +857,37 @@ class FeederData(BackgroundTaskMixin, Base):
         try:
             async with self._session.get(f"http://{ip}:{INGEST_HTTP_PORT}/aircraft.json") as r:
                 if r.status == 200:
-                    return await r.json()
+                    return await r.json(loads=orjson.loads)
         except Exception as e:
             print(f"[_fetch] Error fetching from {ip}: {e}")
         return None
 
-    async def get_aircraft(self, receiver: str) -> list | None:
-        ingest = await self.redis.get(f"receiver_ingest:{receiver}")
-        if not ingest:
-            return None
-        hexes = await self.redis.zrange(f"receiver_ac:{receiver}", "-1", "+inf", byscore=True)
-        if not hexes:
+    @staticmethod
+    async def _my_receivers(r, uids: list[str]) -> list[str]:
+        """Receiver ids behind these my.adsb.lol uids."""
+        if not uids:
             return []
-        results = await asyncio.gather(*(self.redis.get(f"ac:{ingest.decode()}:{h.decode()}") for h in hexes))
-        return [orjson.loads(r) for r in results if r]
+        values = await r.mget([f"my:{uid}" for uid in uids])
+        return [v[:18].decode() for v in values if v]
+
+    async def get_my_aircraft(self, uids: list[str]) -> bytes:
+        """Serialized JSON array of the aircraft seen by the receivers behind the uids.
+
+        Two MGETs on one server: uid -> receiver, then receiver -> aircraft blob.
+        """
+        r = self.redis_ro
+        receivers = await self._my_receivers(r, uids)
+        if not receivers:
+            return b"[]"
+        keys = [f"{REDIS_KEY_RECEIVER_AIRCRAFT}:{rid}" for rid in receivers]
+        blobs = await r.mget(keys)
+        return b"[" + b",".join(blob for blob in blobs if blob) + b"]"
+
+    async def get_my_receiver(self, uids: list[str]) -> list | None:
+        """Receiver record of the first of these uids that has one."""
+        r = self.redis_ro
+        receivers = await self._my_receivers(r, uids)
+        if not receivers:
+            return None
+        records = await r.mget([f"receiver:{rid}" for rid in receivers])
+        return next((orjson.loads(rdata) for rdata in records if rdata), None)
@@ -0,0 +1,105 @@
+import asyncio
+import traceback
+from collections import defaultdict
+
+import redis.asyncio as redis
+
+from adsb_api.utils.settings import (
+    REDIS_HEALTH_CHECK_INTERVAL,
+    REDIS_HOST,
+    REDIS_MAX_CONNECTIONS,
+    REDIS_REPLICAS,
+)
+
+
+class RedisConnections:
+    """The process's Redis clients: one sized, health-checked pool per server.
+
+    primary takes writes and every read that must see them at once (locks,
+    job claims). replica() hands out healthy replicas round-robin for
+    read-only lookups; with no replica configured, or none up, callers fall
+    back to the primary.
+    """
+
+    def __init__(
+        self,
+        url: str = REDIS_HOST,
+        replica_urls: list[str] = REDIS_REPLICAS,
+        max_connections: int = REDIS_MAX_CONNECTIONS,
+        health_check_interval: int = REDIS_HEALTH_CHECK_INTERVAL,
+    ):
+        self.url = url
+        self.replica_urls = [u for u in replica_urls if u]
+        self.max_connections = max_connections
+        self.health_check_interval = health_check_interval
+        self.route_reads = bool(self.replica_urls)
+        self.primary: redis.Redis | None = None
+        self.replicas: list[redis.Redis] = []
+        self.stats = defaultdict(int)
+        self._healthy: list[redis.Redis] = []
+        self._next = 0
+        self._checker: asyncio.Task | None = None
+
+    def _client(self, url: str) -> redis.Redis:
+        return redis.Redis(
+            connection_pool=redis.BlockingConnectionPool.from_url(
+                url,
+                max_connections=self.max_connections,
+                timeout=5,
+                health_check_interval=self.health_check_interval,
+            )
+        )
+
+    async def connect(self):
+        if self.primary is None:
+            self.primary = self._client(self.url)
+            self.replicas = [self._client(u) for u in self.replica_urls]
+        if self.replicas and self._checker is None:
+            await self._check_replicas()
+            self._checker = asyncio.create_task(self._watch_replicas())
+
+    async def shutdown(self):
+        if self._checker:
+            self._checker.cancel()
+            await asyncio.gather(self._checker, return_exceptions=True)
+            self._checker = None
+        if self.primary:
+            clients = (self.primary, *self.replicas)
+            closing = [r.close(close_connection_pool=True) for r in clients]
+            await asyncio.gather(*closing, return_exceptions=True)
+
+    def healthy_replicas(self) -> int:
+        return len(self._healthy)
+
+    def replica(self) -> redis.Redis | None:
+        """Next healthy replica for a read-only lookup, or None to use the primary."""
+        if not self.route_reads or not self._healthy:
+            self.stats["primary"] += 1
+            return None
+        self.stats["replica"] += 1
+        self._next = (self._next + 1) % len(self._healthy)
+        return self._healthy[self._next]
+
+    async def _replica_up(self, r: redis.Redis) -> bool:
+        try:
+            info = await r.info("replication")
+        except Exception as e:
+            print(f"[RedisConnections] replica check: {e}")
+            return False
+        return info.get("role") == "slave" and info.get("master_link_status") == "up"
+
+    async def _check_replicas(self):
+        up = await asyncio.gather(*map(self._replica_up, self.replicas))
+        healthy = [r for r, ok in zip(self.replicas, up) if ok]
+        if len(healthy) != len(self._healthy):
+            print(f"[RedisConnections] {len(healthy)}/{len(self.replicas)} replicas up")
+        self._healthy = healthy
+
+    async def _watch_replicas(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            try:
+                await self._check_replicas()
+            except Exception as e:
+                print(f"[RedisConnections] health check error: {e}")
+                traceback.print_exc()
@@ -0,0 +1,144 @@
+import asyncio
+import time
+import traceback
+import uuid
+from collections import defaultdict
+from socket import gethostname
+
+import redis.asyncio as redis
+
+from adsb_api.utils.settings import (
+    REDIS_CHANNEL_SCREENSHOT_DONE,
+    REDIS_KEY_SCREENSHOT_JOBS,
+)
+
+# Drop the claim (and its queue entry) only while it still holds the caller's token
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    redis.call('del', KEYS[1])
+    return redis.call('zrem', KEYS[2], ARGV[2])
+end
+return 0
+"""
+
+
+class ScreenshotJobs:
+    """Cross-replica render jobs for screenshots.
+
+    A job (one per cache key, i.e. per icao set) is claimed with SET NX, so only
+    one replica renders it. Each claim carries a random token and only its
+    holder can release it, so a renderer whose claim expired cannot drop a
+    newer one. When the image is cached, or the renderer gives up, the cache
+    key is published on a single channel; each process holds one subscription
+    and wakes its local waiters immediately.
+    """
+
+    def __init__(self, claim_ttl: int = 15):
+        self.redis: redis.Redis | None = None
+        self.claim_ttl = claim_ttl
+        self._waiters: dict[str, set[asyncio.Future]] = defaultdict(set)
+        self._listener: asyncio.Task | None = None
+        self.rendering = 0
+        self.stats = defaultdict(int)
+
+    async def start(self, r: redis.Redis):
+        self.redis = r
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    async def _listen(self):
+        while True:
+            try:
+                pubsub = self.redis.pubsub()
+                await pubsub.subscribe(REDIS_CHANNEL_SCREENSHOT_DONE)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._wake(message["data"].decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[ScreenshotJobs] listener error: {e}")
+                traceback.print_exc()
+                # Notifications may have been missed: let every waiter re-check
+                for key in list(self._waiters):
+                    self._wake(key)
+                await asyncio.sleep(1)
+
+    def _wake(self, cache_key: str):
+        for fut in self._waiters.pop(cache_key, ()):
+            if not fut.done():
+                fut.set_result(None)
+
+    def waiting(self) -> int:
+        return sum(len(w) for w in self._waiters.values())
+
+    async def queue_depth(self) -> int:
+        """Jobs claimed and not yet finished across all replicas."""
+        return await self.redis.zcount(REDIS_KEY_SCREENSHOT_JOBS, time.time(), "+inf")
+
+    async def claim(self, cache_key: str) -> str | None:
+        """Claim the job; returns the token to finish it with, or None if taken."""
+        token = f"{gethostname()}:{uuid.uuid4()}"
+        if not await self.redis.set(
+            f"{cache_key}:job", token, nx=True, ex=self.claim_ttl
+        ):
+            return None
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zadd(REDIS_KEY_SCREENSHOT_JOBS, {cache_key: time.time() + self.claim_ttl})
+        pipe.zremrangebyscore(REDIS_KEY_SCREENSHOT_JOBS, "-inf", time.time())
+        await pipe.execute()
+        self.stats["claimed"] += 1
+        self.rendering += 1
+        return token
+
+    async def finish(self, cache_key: str, token: str):
+        """Release the job and notify waiters, whether or not an image was cached."""
+        self.rendering -= 1
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.eval(
+            _RELEASE_SCRIPT,
+            2,
+            f"{cache_key}:job",
+            REDIS_KEY_SCREENSHOT_JOBS,
+            token,
+            cache_key,
+        )
+        pipe.publish(REDIS_CHANNEL_SCREENSHOT_DONE, cache_key)
+        await pipe.execute()
+
+    async def acquire(
+        self, cache_key: str, result_key: str | None = None, timeout: float = 60
+    ) -> tuple[bytes | None, str | None]:
+        """Wait for a cached image or claim the job.
+
+        Returns (image, None) if an image appears under result_key (default:
+        cache_key), or (None, token) once this caller owns the job and must
+        render it (then call finish with the token).
+        """
+        deadline = asyncio.get_running_loop().time() + timeout
+        while True:
+            # Register before checking, so a notification in between is not lost
+            fut = asyncio.get_running_loop().create_future()
+            self._waiters[cache_key].add(fut)
+            try:
+                if cached := await self.redis.get(result_key or cache_key):
+                    return cached, None
+                if token := await self.claim(cache_key):
+                    return None, token
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    self.stats["timeouts"] += 1
+                    raise asyncio.TimeoutError(cache_key)
+                self.stats["waits"] += 1
+                # A crashed renderer never notifies: its claim expires after claim_ttl
+                await asyncio.wait([fut], timeout=min(remaining, self.claim_ttl))
+            finally:
+                self._waiters[cache_key].discard(fut)
+                if not self._waiters[cache_key]:
+                    self._waiters.pop(cache_key, None)
@@ -7,6 +7,12 @@ INSECURE = os.getenv("ADSBLOL_INSECURE") is not None
 ENDPOINTS = os.getenv("ADSBLOL_ENDPOINTS", "").split(",")
 REDIS_HOST = os.getenv("ADSBLOL_REDIS_HOST", "redis://redis")
 REDIS_TTL = int(os.getenv("ADSBLOL_REDIS_TTL", "5"))
+# Read-only lookups are spread over these replicas (comma separated URLs) when up
+REDIS_REPLICAS = os.getenv("ADSBLOL_REDIS_REPLICAS", "").split(",")
+REDIS_MAX_CONNECTIONS = int(os.getenv("ADSBLOL_REDIS_MAX_CONNECTIONS", "64"))
+REDIS_HEALTH_CHECK_INTERVAL = int(
+    os.getenv("ADSBLOL_REDIS_HEALTH_CHECK_INTERVAL", "15")
+)
 REAPI_ENDPOINT = os.getenv(
     "ADSBLOL_REAPI_ENDPOINT", "http://reapi-readsb:30152/re-api/"
 )
@@ -19,6 +25,46 @@ ENABLED_BG_TASKS = os.getenv(
     "ADSBLOL_ENABLED_BG_TASKS", "_fetch_hub_stats,_fetch_ingest,_fetch_mlat"
 ).split(",")
 
+# Route lookups: process-local joined route cache, H3 resolution of the plausible cache
+ROUTE_CACHE_SIZE = int(os.getenv("ADSBLOL_ROUTE_CACHE_SIZE", "50000"))
+ROUTE_PLAUSIBLE_H3_RES = int(os.getenv("ADSBLOL_ROUTE_PLAUSIBLE_H3_RES", "4"))
+ROUTE_WARMER_INTERVAL = int(os.getenv("ADSBLOL_ROUTE_WARMER_INTERVAL", "30"))
+ROUTESET_BULK_MAX_PLANES = int(os.getenv("ADSBLOL_ROUTESET_BULK_MAX_PLANES", "10000"))
+# Opt-in client-side cache of Redis reads (CLIENT TRACKING, redis 6+); 0 disables it
+REDIS_CLIENT_CACHE_SIZE = int(os.getenv("ADSBLOL_REDIS_CLIENT_CACHE_SIZE", "0"))
+REDIS_CLIENT_CACHE_TTL = int(os.getenv("ADSBLOL_REDIS_CLIENT_CACHE_TTL", "300"))
+REDIS_CLIENT_CACHE_PREFIXES = os.getenv(
+    "ADSBLOL_REDIS_CLIENT_CACHE_PREFIXES", "vrs:,beast:,mlat:"
+).split(",")
+
+# Screenshot variants generated from each render (sizes in px, native size first)
+SCREENSHOT_SIZES = [
+    int(s) for s in os.getenv("ADSBLOL_SCREENSHOT_SIZES", "256,128,64").split(",")
+]
+SCREENSHOT_FORMATS = os.getenv("ADSBLOL_SCREENSHOT_FORMATS", "png,webp,jpeg").split(",")
+SCREENSHOT_TTL = int(os.getenv("ADSBLOL_SCREENSHOT_TTL", "20"))
+# Speculative rendering of emergency squawks and the most requested aircraft
+SCREENSHOT_PRERENDER_INTERVAL = int(
+    os.getenv("ADSBLOL_SCREENSHOT_PRERENDER_INTERVAL", "15")
+)
+SCREENSHOT_PRERENDER_TOP = int(os.getenv("ADSBLOL_SCREENSHOT_PRERENDER_TOP", "5"))
+SCREENSHOT_PRERENDER_TABS = int(os.getenv("ADSBLOL_SCREENSHOT_PRERENDER_TABS", "1"))
+SCREENSHOT_PRERENDER_MIN_REQUESTS = float(
+    os.getenv("ADSBLOL_SCREENSHOT_PRERENDER_MIN_REQUESTS", "3")
+)
+SCREENSHOT_PRERENDER_SQUAWKS = os.getenv(
+    "ADSBLOL_SCREENSHOT_PRERENDER_SQUAWKS", "7500,7600,7700"
+).split(",")
+# Seconds a prerender queues for a tab before giving up (under the 15 s job claim)
+SCREENSHOT_PRERENDER_TAB_WAIT = float(
+    os.getenv("ADSBLOL_SCREENSHOT_PRERENDER_TAB_WAIT", "5")
+)
+SCREENSHOT_BATCH_MAX = int(os.getenv("ADSBLOL_SCREENSHOT_BATCH_MAX", "25"))
+# Browserless fallback renderer: slippy map tiles (cached on disk) and recent traces
+STATIC_MAP_TILE_URL = os.getenv("ADSBLOL_STATIC_MAP_TILE_URL", "https://tile.openstreetmap.org/{z}/{x}/{y}.png")
+STATIC_MAP_TILE_DIR = os.getenv("ADSBLOL_STATIC_MAP_TILE_DIR", "/tmp/adsblol-tiles")
+STATIC_MAP_TRACE_URL = os.getenv("ADSBLOL_STATIC_MAP_TRACE_URL", "https://adsb.lol/data/traces/{suffix}/trace_recent_{hex}.json")
+
 MLAT_SERVERS = os.getenv(
     "ADSBLOL_MLAT_SERVERS",
     "mlat-mlat-server-0a,mlat-mlat-server-0b,mlat-mlat-server-0c",
@@ -27,7 +73,22 @@ MLAT_SERVERS = os.getenv(
 # Redis key constants (single source of truth)
 REDIS_KEY_BEAST_CLIENTS = "beast:clients"
 REDIS_KEY_BEAST_RECEIVERS = "beast:receivers"
+REDIS_KEY_BEAST_BY_IP = "beast:by_ip"
+REDIS_KEY_BEAST_COUNT = "beast:clients_count"
 REDIS_KEY_MLAT_SYNC = "mlat:sync_json"
 REDIS_KEY_MLAT_CLIENTS = "mlat:clients"
+REDIS_KEY_MLAT_BY_IP = "mlat:by_ip"
+REDIS_KEY_MLAT_COUNT = "mlat:clients_count"
 REDIS_KEY_MLAT_TOTALCOUNT = "mlat:totalcount"
 REDIS_KEY_HUB_AIRCRAFT = "hub:aircraft_totalcount"
+REDIS_KEY_RECEIVER_AIRCRAFT = "receiver_aircraft"
+REDIS_KEY_PLANESPOTTERS = "planespotters"
+REDIS_KEY_SCREENSHOT_JOBS = "screenshot:jobs"
+REDIS_CHANNEL_SCREENSHOT_DONE = "screenshot:done"
+REDIS_KEY_VRS_ROUTE = "vrs:joined_route"
+REDIS_KEY_VRS_ROUTES_VERSION = "vrs:routes_version"
+REDIS_KEY_VRS_AIRPORT = "vrs:airport_json"
+REDIS_KEY_VRS_AIRPORTS = "vrs:airports"
+REDIS_KEY_VRS_PLAUSIBLE = "vrs:plausible"
+REDIS_KEY_VRS_INDEX = "vrs:idx"
+REDIS_KEY_VRS_LIVE = "vrs:live"
@@ -0,0 +1,202 @@
+import asyncio
+import math
+import os
+from io import BytesIO
+
+import aiohttp
+import orjson
+from PIL import Image, ImageDraw, ImageFont
+
+from adsb_api.utils.settings import (
+    STATIC_MAP_TILE_DIR,
+    STATIC_MAP_TILE_URL,
+    STATIC_MAP_TRACE_URL,
+)
+
+TILE_SIZE = 256
+MAX_ZOOM = 13
+_BACKGROUND = (170, 211, 223)  # sea blue, for tiles we could not get
+_ICON_FILL, _ICON_OUTLINE = (255, 204, 0), (0, 0, 0)
+_TRAIL = (64, 64, 200)
+# Plane silhouette pointing north, in px around its centre
+_ICON = [
+    (0, -9), (2, -3), (9, 1), (9, 3), (2, 1), (1, 6), (4, 9),
+    (-4, 9), (-1, 6), (-2, 1), (-9, 3), (-9, 1), (-2, -3),
+]
+
+
+def to_pixel(lat: float, lon: float, zoom: int) -> tuple[float, float]:
+    """Web Mercator pixel coordinates of (lat, lon) at zoom."""
+    scale = TILE_SIZE * 2**zoom
+    lat = max(min(lat, 85.0511), -85.0511)
+    y = math.log(math.tan(math.pi / 4 + math.radians(lat) / 2))
+    return (lon + 180) / 360 * scale, (1 - y / math.pi) / 2 * scale
+
+
+def fit_zoom(bounds: tuple[float, float, float, float]) -> int:
+    """Same framing as the tar1090 tab: zoom from the box's longer side in metres."""
+    min_lat, min_lon, max_lat, max_lon = bounds
+    (x0, y0), (x1, y1) = to_pixel(min_lat, min_lon, 0), to_pixel(max_lat, max_lon, 0)
+    metres_per_px = 2 * math.pi * 6378137 / TILE_SIZE
+    longer_side = max(
+        abs(x1 - x0) * metres_per_px, abs(y1 - y0) * metres_per_px, 60 * 1000
+    )
+    return min(math.floor(math.log2(6e7 / longer_side)), MAX_ZOOM)
+
+
+def compose(
+    tiles: dict[tuple[int, int], bytes | None],
+    origin: tuple[float, float],
+    zoom: int,
+    size: tuple[int, int],
+    aircraft: list[dict],
+    trails: dict[str, list[tuple[float, float]]],
+) -> bytes:
+    """Draw tiles, trails, icons and labels into a PNG. CPU bound: run in a thread."""
+    ox, oy = origin
+    img = Image.new("RGB", size, _BACKGROUND)
+    for (tx, ty), data in tiles.items():
+        if data:
+            try:
+                img.paste(
+                    Image.open(BytesIO(data)).convert("RGB"),
+                    (round(tx * TILE_SIZE - ox), round(ty * TILE_SIZE - oy)),
+                )
+            except Exception as e:
+                print(f"[StaticMap] bad tile {zoom}/{tx}/{ty}: {e}")
+    draw = ImageDraw.Draw(img)
+
+    def px(lat, lon):
+        x, y = to_pixel(lat, lon, zoom)
+        return x - ox, y - oy
+
+    for points in trails.values():
+        if len(points) > 1:
+            draw.line([px(lat, lon) for lat, lon in points], fill=_TRAIL, width=2)
+
+    font = ImageFont.load_default()
+    for ac in aircraft:
+        cx, cy = px(ac["lat"], ac["lon"])
+        angle = math.radians(ac.get("track") or ac.get("true_heading") or 0)
+        cos, sin = math.cos(angle), math.sin(angle)
+        draw.polygon(
+            [(cx + x * cos - y * sin, cy + x * sin + y * cos) for x, y in _ICON],
+            fill=_ICON_FILL,
+            outline=_ICON_OUTLINE,
+        )
+        label = (ac.get("flight") or "").strip() or ac["hex"].lstrip("~").upper()
+        left, top, right, bottom = draw.textbbox((cx + 11, cy - 16), label, font=font)
+        draw.rectangle((left - 2, top - 1, right + 2, bottom + 1), fill=(255, 255, 255))
+        draw.text((cx + 11, cy - 16), label, fill=(0, 0, 0), font=font)
+
+    out = BytesIO()
+    img.save(out, format="PNG")
+    return out.getvalue()
+
+
+def _read_tile(path: str) -> bytes | None:
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _write_tile(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class StaticMapRenderer:
+    """Browserless screenshots: cached slippy map tiles plus server-side overlays.
+
+    Tiles are fetched once from tile_url and kept under tile_dir; trails come
+    from the aircraft's recent trace. Used when no browser tab is available.
+    """
+
+    def __init__(
+        self,
+        size: tuple[int, int] = (256, 256),
+        tile_url: str = STATIC_MAP_TILE_URL,
+        tile_dir: str = STATIC_MAP_TILE_DIR,
+        trace_url: str = STATIC_MAP_TRACE_URL,
+    ):
+        self.size = size
+        self.tile_url = tile_url
+        self.tile_dir = tile_dir
+        self.trace_url = trace_url
+        self._session = None
+
+    async def connect(self):
+        os.makedirs(self.tile_dir, exist_ok=True)
+        self._session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=5, connect=2),
+            headers={"User-Agent": "adsb.lol api static map (https://adsb.lol)"},
+        )
+
+    async def shutdown(self):
+        if self._session:
+            await self._session.close()
+
+    async def _tile(self, z: int, x: int, y: int) -> bytes | None:
+        if not 0 <= y < 2**z:
+            return None
+        x %= 2**z
+        path = os.path.join(self.tile_dir, str(z), str(x), f"{y}.png")
+        if (data := await asyncio.to_thread(_read_tile, path)) is not None:
+            return data
+        try:
+            async with self._session.get(self.tile_url.format(z=z, x=x, y=y)) as r:
+                if r.status != 200:
+                    print(f"[StaticMap] tile {z}/{x}/{y}: HTTP {r.status}")
+                    return None
+                data = await r.read()
+        except Exception as e:
+            print(f"[StaticMap] tile {z}/{x}/{y}: {e}")
+            return None
+        await asyncio.to_thread(_write_tile, path, data)
+        return data
+
+    async def _trail(self, hex: str) -> list[tuple[float, float]]:
+        try:
+            async with self._session.get(
+                self.trace_url.format(suffix=hex[-2:], hex=hex)
+            ) as r:
+                if r.status != 200:
+                    return []
+                trace = orjson.loads(await r.read()).get("trace", [])
+        except Exception as e:
+            print(f"[StaticMap] trace {hex}: {e}")
+            return []
+        return [(point[1], point[2]) for point in trace]
+
+    async def render(
+        self, aircraft: list[dict], bounds: tuple[float, float, float, float]
+    ) -> bytes:
+        """PNG of the aircraft (re-api entries with lat / lon), framed like the tab."""
+        zoom = fit_zoom(bounds)
+        min_lat, min_lon, max_lat, max_lon = bounds
+        x0, y0 = to_pixel(max_lat, min_lon, zoom)
+        x1, y1 = to_pixel(min_lat, max_lon, zoom)
+        width, height = self.size
+        origin = ((x0 + x1 - width) / 2, (y0 + y1 - height) / 2)
+        left, top = origin
+        tx0, tx1 = math.floor(left / TILE_SIZE), math.floor((left + width) / TILE_SIZE)
+        ty0, ty1 = math.floor(top / TILE_SIZE), math.floor((top + height) / TILE_SIZE)
+        cells = [(tx, ty) for tx in range(tx0, tx1 + 1) for ty in range(ty0, ty1 + 1)]
+        tiles, trails = await asyncio.gather(
+            asyncio.gather(*[self._tile(zoom, tx, ty) for tx, ty in cells]),
+            asyncio.gather(*[self._trail(ac["hex"]) for ac in aircraft]),
+        )
+        return await asyncio.to_thread(
+            compose,
+            dict(zip(cells, tiles)),
+            origin,
+            zoom,
+            self.size,
+            aircraft,
+            {ac["hex"]: t for ac, t in zip(aircraft, trails)},
+        )
@@ -0,0 +1,75 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# (stage, seconds) spans of the current request, when one is collecting them
+_spans: ContextVar[list | None] = ContextVar("timing_spans", default=None)
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram with fixed buckets."""
+
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name: str, labels: str) -> list[str]:
+        out, cumulative = [], 0
+        for le, n in zip((*self.buckets, "+Inf"), self.counts):
+            cumulative += n
+            out.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+        out.append(f"{name}_sum{{{labels}}} {self.sum:.6f}")
+        out.append(f"{name}_count{{{labels}}} {self.count}")
+        return out
+
+
+histograms: dict[tuple[str, str], Histogram] = {}
+
+
+def observe(pipeline: str, stage: str, seconds: float):
+    if (h := histograms.get((pipeline, stage))) is None:
+        h = histograms[pipeline, stage] = Histogram()
+    h.observe(seconds)
+    if (spans := _spans.get()) is not None:
+        spans.append((stage, seconds))
+
+
+@contextmanager
+def span(stage: str, pipeline: str = "screenshot"):
+    """Time the block into the (pipeline, stage) histogram, also on failure."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(pipeline, stage, time.perf_counter() - start)
+
+
+def collect() -> list:
+    """Record this request's spans, and those of tasks it spawns from now on."""
+    spans = []
+    _spans.set(spans)
+    return spans
+
+
+def server_timing(spans: list) -> str:
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in spans)
+
+
+def metrics_lines() -> list[str]:
+    return [
+        line
+        for (pipeline, stage), h in sorted(histograms.items())
+        for line in h.lines(
+            "adsb_api_stage_seconds", f'pipeline="{pipeline}",stage="{stage}"'
+        )
+    ]
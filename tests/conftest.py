@@ -1,4 +1,56 @@
 from unittest import mock
 
+import pytest
+
 # Gotta do this in order for test to work when FastAPI cache is being used
 mock.patch("fastapi_cache.decorator.cache", lambda *args, **kwargs: lambda f: f).start()
+
+
+class FakeRedis:
+    """Just enough of redis.asyncio.Redis for unit tests."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def mget(self, keys):
+        return [self.data.get(k) for k in keys]
+
+    async def set(self, key, value, ex=None, nx=False, keepttl=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value if isinstance(value, bytes) else str(value).encode()
+        return True
+
+    async def hget(self, key, field):
+        return self.data.get(key, {}).get(field)
+
+    async def hkeys(self, key):
+        return [f.encode() for f in self.data.get(key, {})]
+
+    async def hmget(self, key, fields):
+        return [self.data.get(key, {}).get(f) for f in fields]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis: FakeRedis):
+        self.redis, self.ops = redis, []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.ops.append((name, args, kwargs))
+
+    async def execute(self):
+        return [
+            await getattr(self.redis, name)(*args, **kwargs)
+            for name, args, kwargs in self.ops
+        ]
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
@@ -0,0 +1,77 @@
+import random
+
+import h3
+import pytest
+
+from adsb_api.utils.airports import AirportIndex
+
+
+def _airport(icao: str, iata: str, name: str, lat: float, lon: float) -> dict:
+    return {
+        "name": name,
+        "icao": icao,
+        "iata": iata,
+        "location": "",
+        "countryiso2": "",
+        "lat": lat,
+        "lon": lon,
+        "alt_feet": 0.0,
+        "alt_meters": 0.0,
+    }
+
+
+AIRPORTS = [
+    _airport("EGLL", "LHR", "London Heathrow", 51.4706, -0.461941),
+    _airport("EGKK", "LGW", "London Gatwick", 51.148102, -0.190278),
+    _airport("EGSS", "STN", "London Stansted", 51.885, 0.235),
+    _airport("EHAM", "AMS", "Schiphol", 52.308601, 4.76389),
+    _airport("KJFK", "JFK", "John F Kennedy Intl", 40.639751, -73.778925),
+    _airport("ZZ01", "", "Middle of nowhere", -45.0, 170.0),
+]
+
+
+def test_nearest():
+    index = AirportIndex(AIRPORTS)
+
+    result = index.nearest(51.5, -0.1, limit=3)
+    assert [a["icao"] for a in result] == ["EGLL", "EGKK", "EGSS"]
+    assert result[0]["distance_km"] < result[1]["distance_km"]
+    assert index.nearest(51.5, -0.1, limit=10, radius_km=100) == result
+    assert index.nearest(0.0, 0.0) == []
+
+
+def test_nearest_matches_brute_force():
+    rnd = random.Random(1)
+    airports = [
+        _airport(
+            f"X{i:03}", "", f"Airport {i}", rnd.uniform(-80, 80), rnd.uniform(-180, 180)
+        )
+        for i in range(2000)
+    ]
+    index = AirportIndex(airports)
+
+    for _ in range(50):
+        lat, lon = rnd.uniform(-80, 80), rnd.uniform(-180, 180)
+        expected = sorted(
+            (d, a["icao"])
+            for a in airports
+            if (d := h3.great_circle_distance((lat, lon), (a["lat"], a["lon"]), "km"))
+            <= 1000
+        )[:5]
+        assert [
+            a["icao"] for a in index.nearest(lat, lon, limit=5, radius_km=1000)
+        ] == [icao for _, icao in expected]
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("egll", ["EGLL"]),
+        ("JFK", ["KJFK"]),
+        ("london", ["EGKK", "EGLL", "EGSS"]),
+        ("london h", ["EGLL"]),
+        ("nope", []),
+    ],
+)
+def test_search(query, expected):
+    assert [a["icao"] for a in AirportIndex(AIRPORTS).search(query)] == expected
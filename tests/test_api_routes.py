@@ -0,0 +1,101 @@
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+from adsb_api.app import app
+from adsb_api.utils.dependencies import redisVRS
+
+
+@pytest.fixture
+def test_client(fake_redis, monkeypatch):
+    monkeypatch.setattr(redisVRS, "redis", fake_redis)
+    redisVRS._route_cache.clear()
+    return TestClient(app)
+
+
+def test_routeset_bulk_ndjson(test_client):
+    body = b"\n".join(
+        orjson.dumps({"callsign": f"TEST{i}", "lat": 1.0, "lng": 2.0})
+        for i in range(250)
+    )
+    response = test_client.post(
+        "/api/0/routeset/bulk",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [orjson.loads(line) for line in response.content.splitlines()]
+    assert [r["callsign"] for r in lines] == [f"TEST{i}" for i in range(250)]
+    assert lines[0]["airport_codes"] == "unknown"
+
+
+def test_routeset_bulk_json_array(test_client):
+    response = test_client.post(
+        "/api/0/routeset/bulk", json=[{"callsign": "TEST1", "lat": 1.0, "lng": 2.0}]
+    )
+
+    assert response.status_code == 200
+    assert orjson.loads(response.content)["callsign"] == "TEST1"
+
+
+def test_routeset_bulk_invalid(test_client):
+    assert test_client.post("/api/0/routeset/bulk", content=b"[{").status_code == 400
+    assert (
+        test_client.post(
+            "/api/0/routeset/bulk", json=[{"callsign": "TEST1"}]
+        ).status_code
+        == 400
+    )
+    assert test_client.post("/api/0/routeset/bulk", json=[]).status_code == 400
+
+
+def test_routeset_invalid(test_client):
+    for body in (b"[{", b"[]", b'{"planes": [{"callsign": "TEST1"}]}'):
+        response = test_client.post("/api/0/routeset", content=body)
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"] == ["body"]
+    assert test_client.post("/api/0/routeset", json={"planes": []}).status_code == 400
+
+
+def test_routeset_compact_and_pretty(test_client):
+    body = {"planes": [{"callsign": "TEST1", "lat": 1.0, "lng": 2.0}]}
+
+    compact = test_client.post("/api/0/routeset", json=body)
+    assert compact.status_code == 200
+    assert b"\n" not in compact.content
+    assert orjson.loads(compact.content)[0]["callsign"] == "TEST1"
+
+    pretty = test_client.post("/api/0/routeset?pretty=1", json=body)
+    # Routes are Fragments: they are indented too, not spliced in verbatim
+    assert pretty.content.startswith(b"[\n  {\n    ")
+    assert orjson.loads(pretty.content) == orjson.loads(compact.content)
+
+
+def test_routes_reject_nan_positions(test_client):
+    nan = {"callsign": "TEST1", "lat": "nan", "lng": 2.0}
+    assert (
+        test_client.post("/api/0/routeset", json={"planes": [nan]}).status_code == 422
+    )
+    assert test_client.post("/api/0/routeset/bulk", json=[nan]).status_code == 400
+    assert test_client.get("/api/0/route/TEST1/nan/2").status_code == 400
+    assert test_client.get("/api/0/route/TEST1/1/inf").status_code == 400
+    assert test_client.get("/api/0/route/TEST1/1/2").status_code == 200
+
+
+def test_unknown_callsign_keeps_full_route_shape(test_client):
+    single = orjson.loads(test_client.get("/api/0/route/NOPE1/1/2").content)
+    assert single == {
+        "callsign": "NOPE1",
+        "number": "unknown",
+        "airline_code": "unknown",
+        "airport_codes": "unknown",
+        "_airport_codes_iata": "unknown",
+        "_airports": [],
+        "_segment_lengths_nm": [],
+    }
+    body = {"planes": [{"callsign": "NOPE1", "lat": 1.0, "lng": 2.0}]}
+    assert orjson.loads(test_client.post("/api/0/routeset", json=body).content) == [
+        single
+    ]
@@ -0,0 +1,128 @@
+import asyncio
+import zipfile
+from contextlib import asynccontextmanager
+from io import BytesIO
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from adsb_api.app import app
+from adsb_api.utils import api_tar
+from adsb_api.utils.api_tar import _tour, _valid_icao
+
+
+def test_valid_icao():
+    assert _valid_icao("4ca7b4") and _valid_icao("~4ca7b4")
+    assert not any(map(_valid_icao, ["4CA7B4Z", "4ca7b", "x4ca7b4"]))
+
+
+def test_tour_visits_neighbours_in_turn():
+    aircraft = [
+        {"hex": "a", "lat": 51.0, "lon": 0.0},
+        {"hex": "far", "lat": 40.0, "lon": -74.0},
+        {"hex": "b", "lat": 51.1, "lon": 0.1},
+        {"hex": "c", "lat": 51.2, "lon": 0.3},
+    ]
+    assert [ac["hex"] for ac in _tour(aircraft)] == ["a", "b", "c", "far"]
+    assert _tour([]) == []
+
+
+def test_screenshot_batch_rejects_bad_requests():
+    client = TestClient(app)
+
+    def post(icaos, query=""):
+        return client.post(f"/0/screenshot/batch{query}", json={"icaos": icaos})
+
+    assert post([]).status_code == 400
+    assert post(["nothex"]).status_code == 400
+    assert post(["4ca7b4"] * 2 + [f"{i:06x}" for i in range(100)]).status_code == 400
+    assert post(["4ca7b4"], "?format=gif").status_code == 400
+
+
+class FakeTabs:
+    def __init__(self):
+        self.timeouts = 0
+
+    def saturated(self):
+        return False
+
+    @asynccontextmanager
+    async def get_tab(self):
+        try:
+            yield object()
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+
+
+class FakeJobs:
+    """Jobs of held are claimed elsewhere; their renderer gives up."""
+
+    def __init__(self, held):
+        self.held, self.finished = held, []
+
+    async def claim(self, cache_key):
+        return None if cache_key in self.held else f"ours:{cache_key}"
+
+    async def acquire(self, cache_key, result_key, timeout):
+        self.held.discard(cache_key)
+        return None, f"taken over:{cache_key}"
+
+    async def finish(self, cache_key, token):
+        self.finished.append((cache_key, token))
+
+
+def test_screenshot_batch_falls_back_and_takes_over(monkeypatch):
+    icaos = ["aaaaaa", "bbbbbb", "cccccc"]
+    positions = [{"hex": h, "lat": 51, "lon": 1 + i / 10} for i, h in enumerate(icaos)]
+
+    class Reply:
+        async def json(self):
+            return {"aircraft": positions}
+
+    @asynccontextmanager
+    async def get(url):
+        yield Reply()
+
+    async def session():
+        return SimpleNamespace(get=get)
+
+    rendered = []
+
+    async def render_png(tab, icaos, bounds, deselect=False):
+        if icaos == ["aaaaaa"]:
+            raise asyncio.TimeoutError()
+        rendered.append(("tab", icaos[0]))
+        return b"tab"
+
+    async def static_render(aircraft, bounds):
+        rendered.append(("static", aircraft[0]["hex"]))
+        return b"static"
+
+    async def store_variants(cache_key, png):
+        variants = api_tar.SCREENSHOT_SIZES, api_tar.SCREENSHOT_FORMATS
+        return {(size, fmt): png for size in variants[0] for fmt in variants[1]}
+
+    async def mget(keys):
+        return [None] * len(keys)
+
+    tabs, jobs = FakeTabs(), FakeJobs({"screenshot:cccccc"})
+    monkeypatch.setattr(api_tar, "get_http_session", session)
+    monkeypatch.setattr(api_tar, "browser", tabs)
+    monkeypatch.setattr(api_tar, "screenshotJobs", jobs)
+    monkeypatch.setattr(api_tar, "staticMap", SimpleNamespace(render=static_render))
+    redis_ro = SimpleNamespace(mget=mget)
+    monkeypatch.setattr(api_tar, "redisVRS", SimpleNamespace(redis_ro=redis_ro))
+    monkeypatch.setattr(api_tar, "_render_png", render_png)
+    monkeypatch.setattr(api_tar, "_store_variants", store_variants)
+
+    response = TestClient(app).post("/0/screenshot/batch", json={"icaos": icaos})
+
+    assert response.status_code == 200 and response.headers["X-Missing"] == ""
+    # The tab timeout reached get_tab(); the rest of the tour was drawn statically
+    assert tabs.timeouts == 1
+    assert rendered == [("static", "aaaaaa"), ("static", "bbbbbb"), ("tab", "cccccc")]
+    # The job another request gave up on was rendered under the taken-over claim
+    assert ("screenshot:cccccc", "taken over:screenshot:cccccc") in jobs.finished
+    with zipfile.ZipFile(BytesIO(response.content)) as zf:
+        assert zf.read("aaaaaa.png") == b"static" and zf.read("cccccc.png") == b"tab"
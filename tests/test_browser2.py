@@ -0,0 +1,152 @@
+import asyncio
+
+import pytest
+
+from adsb_api.utils.browser2 import BrowserTabPool, CDPBrowser, _p95
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+    async def close(self):
+        self.connected = False
+
+
+class FakeTab:
+    def __init__(self, b: CDPBrowser):
+        self._BrowserTabPool__browser = b
+        self._BrowserTabPool__removed = False
+        self._BrowserTabPool__last_used = 0.0
+        self._BrowserTabPool__use_count = 0
+        b.tabs.add(self)
+
+    def is_closed(self):
+        return False
+
+    async def close(self):
+        pass
+
+
+def _pool(endpoints, **kwargs):
+    pool = BrowserTabPool("https://adsb.lol/", endpoints=endpoints, **kwargs)
+    pool.p = object()
+    for b in pool.browsers:
+        b.browser = FakeBrowser()
+    return pool
+
+
+def test_p95():
+    assert _p95([]) == 0.0
+    assert _p95(range(101)) == 95
+
+
+@pytest.mark.asyncio
+async def test_target_tabs():
+    pool = BrowserTabPool(
+        "https://adsb.lol/", min_tabs=1, max_tabs=6, target_acquire_p95=0.5
+    )
+    now = asyncio.get_event_loop().time()
+    assert pool.target_tabs() == 1
+
+    pool.busy, pool.waiters = 2, 3
+    assert pool.target_tabs() == 5
+    pool.waiters = 10
+    assert pool.target_tabs() == 6
+
+    # 120 renders/min at 2s p95 keeps ~4 tabs busy
+    pool.busy = pool.waiters = 0
+    pool._render_times.extend((now, 2.0) for _ in range(120))
+    assert pool.target_tabs() == 4
+
+    # Slow acquires: one more than we have
+    pool._render_times.clear()
+    pool._total_tabs = 2
+    pool._acquire_times.extend((now, 1.0) for _ in range(10))
+    assert pool.target_tabs() == 3
+
+
+@pytest.mark.asyncio
+async def test_scale_down_idle_after_cooldown():
+    pool = _pool(["ws://a"], min_tabs=1, max_tabs=4, scale_down_cooldown=10)
+    now = asyncio.get_event_loop().time()
+    tabs = [FakeTab(pool.browsers[0]) for _ in range(3)]
+    for i, tab in enumerate(tabs):
+        # the last one was used recently
+        tab._BrowserTabPool__last_used = now - 20 + i * 15
+        pool.pool.put_nowait(tab)
+        pool._active_tabs.add(tab)
+    pool._total_tabs = 3
+
+    await pool._scale_down(1)
+    assert pool._total_tabs == 2 and pool.pool.qsize() == 2
+
+    # Recently busy pool: nothing is closed
+    pool._last_busy = now
+    await pool._scale_down(1)
+    assert pool._total_tabs == 2
+
+
+@pytest.mark.asyncio
+async def test_routes_to_least_loaded_healthy_browser():
+    pool = _pool(["ws://a", "ws://b"])
+    a, b = pool.browsers
+    for browser in (a, a, b):
+        tab = FakeTab(browser)
+        pool.pool.put_nowait(tab)
+        pool._active_tabs.add(tab)
+    pool._total_tabs = 3
+
+    async with pool.get_tab() as t1:
+        async with pool.get_tab() as t2:
+            assert {t1._BrowserTabPool__browser, t2._BrowserTabPool__browser} == {a, b}
+    b.draining = True
+    async with pool.get_tab() as t3:
+        assert t3._BrowserTabPool__browser is a
+
+
+@pytest.mark.asyncio
+async def test_get_tab_wait_is_bounded():
+    pool = _pool(["ws://a"], max_tabs=1)
+    pool._total_tabs = 1  # the only tab is busy elsewhere
+
+    with pytest.raises(asyncio.TimeoutError):
+        async with pool.get_tab(wait=0.05):
+            pass
+    assert pool.waiters == 0 and pool.busy == 0
+
+
+@pytest.mark.asyncio
+async def test_drain_and_replace_after_render_timeouts():
+    pool = _pool(["ws://a", "ws://b"])
+    a, b = pool.browsers
+    for browser in (a, a, b):
+        tab = FakeTab(browser)
+        pool.pool.put_nowait(tab)
+        pool._active_tabs.add(tab)
+    pool._total_tabs = 3
+    a.busy = -10  # always the least loaded, so every render goes to it
+
+    for _ in range(3):
+        with pytest.raises(asyncio.TimeoutError):
+            async with pool.get_tab():
+                raise asyncio.TimeoutError()
+    assert a.draining and a.stats["render_timeouts"] == 3
+    # The tab that timed out last is dropped on release, not returned to the pool
+    assert pool._total_tabs == 2
+
+    a.busy = 0
+    reconnected = []
+
+    async def connect(browser):
+        reconnected.append(browser)
+        browser.browser = FakeBrowser()
+        browser.draining = False
+
+    pool._connect = connect
+    await pool.reconcile_browsers()
+    assert reconnected == [a] and a.stats["replaced"] == 1
+    assert pool._total_tabs == 1 and not a.tabs and b.tabs
@@ -0,0 +1,25 @@
+from unittest import mock
+
+from adsb_api.utils.cache import MISSING, TTLCache
+
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_expiry():
+    cache = TTLCache(maxsize=10, ttl=5)
+    with mock.patch("adsb_api.utils.cache.time.monotonic", return_value=100.0):
+        cache.set("a", None)
+        cache.set("b", 1, ttl=60)
+    with mock.patch("adsb_api.utils.cache.time.monotonic", return_value=110.0):
+        assert cache.get("a") is MISSING
+        assert cache.get("b") == 1
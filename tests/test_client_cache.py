@@ -0,0 +1,153 @@
+import asyncio
+
+import pytest
+
+from adsb_api.utils.client_cache import INVALIDATE_CHANNEL, ClientSideCache
+
+
+def _cache(fake_redis):
+    cache = ClientSideCache(maxsize=10, prefixes=["vrs:"])
+    cache.active = True  # as if the invalidation link were up
+    fake_redis.connection_pool = type("Pool", (), {"connection_kwargs": {}})()
+    return cache, cache.wrap(fake_redis)
+
+
+@pytest.mark.asyncio
+async def test_cached_reads(fake_redis):
+    cache, r = _cache(fake_redis)
+    fake_redis.data.update({"vrs:a": b"1", "other": b"2", "vrs:h": {"f": b"3"}})
+
+    assert await r.mget(["vrs:a", "other", "vrs:missing"]) == [b"1", b"2", None]
+    fake_redis.data.update(
+        {"vrs:a": b"changed", "other": b"changed", "vrs:h": {"f": b"changed"}}
+    )
+    # Tracked keys (also absent ones) come from memory, others from Redis
+    assert await r.mget(["vrs:a", "other", "vrs:missing"]) == [b"1", b"changed", None]
+    assert await r.hget("vrs:h", "f") == b"changed"
+    fake_redis.data["vrs:h"]["f"] = b"3"
+    assert await r.hmget("vrs:h", ["f"]) == [b"changed"]
+    assert (cache.stats["hit"], cache.stats["miss"]) == (3, 3)
+
+    cache.invalidate([b"vrs:a", b"vrs:h"])
+    assert await r.get("vrs:a") == b"changed"
+    assert await r.hget("vrs:h", "f") == b"3"
+
+    # Untracked keys keep their plain GET (and its errors)
+    async def no_mget(keys):
+        raise AssertionError("untracked GET became an MGET")
+
+    fake_redis.mget = no_mget
+    assert await r.get("other") == b"changed"
+    del fake_redis.mget
+
+    # While the link is down nothing is served from memory
+    cache.active = False
+    fake_redis.data["vrs:a"] = b"new"
+    assert await r.get("vrs:a") == b"new"
+
+
+@pytest.mark.asyncio
+async def test_invalidation_during_read_voids_it(fake_redis):
+    cache, r = _cache(fake_redis)
+    fake_redis.data["vrs:a"] = b"old"
+    mget = fake_redis.mget
+
+    async def racing_mget(keys):
+        values = await mget(keys)
+        fake_redis.data["vrs:a"] = b"new"
+        cache.invalidate([b"vrs:a"])
+        return values
+
+    fake_redis.mget = racing_mget
+    assert await r.get("vrs:a") == b"old"
+    fake_redis.mget = mget
+    assert await r.get("vrs:a") == b"new"
+    assert len(cache) == 1 and not cache._pending
+
+
+class FakeConnection:
+    """One RESP2 connection of the invalidation link.
+
+    Replies to commands, and pushes messages once subscribed.
+    """
+
+    def __init__(self):
+        self.sent, self.replies, self.messages = [], [], asyncio.Queue()
+        self.subscribed, self.answer_pings, self.disconnected = False, True, False
+
+    async def send_command(self, *args):
+        self.sent.append(args)
+        if args[0] == "PING" and self.subscribed:
+            if self.answer_pings:
+                self.messages.put_nowait([b"pong", b""])
+            return
+        self.subscribed |= args[0] == "SUBSCRIBE"
+        if args[0] == "SUBSCRIBE":
+            self.replies.append([b"subscribe", args[1], 1])
+        else:
+            replies = {("CLIENT", "ID"): 7, ("PING",): b"PONG"}
+            self.replies.append(replies.get(args[:2], b"OK"))
+
+    async def read_response(self, timeout=None):
+        if self.replies:
+            return self.replies.pop(0)
+        try:
+            return await asyncio.wait_for(self.messages.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def disconnect(self):
+        self.disconnected = True
+
+
+class FakePool:
+    def __init__(self):
+        self.connections = []
+
+    def make_connection(self):
+        self.connections.append(FakeConnection())
+        return self.connections[-1]
+
+
+async def _until(condition):
+    for _ in range(200):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+@pytest.mark.asyncio
+async def test_listen_invalidation_link():
+    cache = ClientSideCache(
+        maxsize=10, prefixes=["vrs:", "beast:"], health_check_interval=0.05
+    )
+    cache._pool = pool = FakePool()
+    task = asyncio.create_task(cache._listen())
+    try:
+        await _until(lambda: cache.active)
+        listener, tracker = pool.connections
+        assert listener.sent == [("CLIENT", "ID"), ("SUBSCRIBE", INVALIDATE_CHANNEL)]
+        prefixes = ("PREFIX", "vrs:", "PREFIX", "beast:")
+        tracking = ("CLIENT", "TRACKING", "ON", "REDIRECT", 7, "BCAST", *prefixes)
+        assert tracker.sent == [tracking]
+
+        cache._entries.set((False, "vrs:a"), b"1")
+        listener.messages.put_nowait([b"message", INVALIDATE_CHANNEL, [b"vrs:a"]])
+        await _until(lambda: not len(cache))
+
+        # Quiet link: both ends are pinged, and an answered ping keeps it up
+        await _until(lambda: ("PING",) in tracker.sent and ("PING",) in listener.sent)
+        await asyncio.sleep(0.12)
+        assert cache.active and not cache.stats["reconnects"]
+
+        # An unanswered ping drops the link: empty cache, none served until reconnected
+        listener.answer_pings = False
+        cache._entries.set((False, "vrs:b"), b"2")
+        await _until(lambda: not cache.active)
+        assert not len(cache) and listener.disconnected and tracker.disconnected
+        await _until(lambda: cache.active)
+        assert cache.stats["reconnects"] == 1 and len(pool.connections) == 4
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
@@ -0,0 +1,26 @@
+from io import BytesIO
+
+from PIL import Image
+
+from adsb_api.utils.images import etag, image_variants
+
+
+def _png(size=256):
+    out = BytesIO()
+    Image.new("RGB", (size, size), (10, 120, 200)).save(out, format="PNG")
+    return out.getvalue()
+
+
+def test_image_variants():
+    png = _png()
+    variants = image_variants(png, [256, 64], ["png", "webp", "jpeg"])
+
+    assert variants[256, "png"] is png
+    assert set(variants) == {(s, f) for s in (256, 64) for f in ("png", "webp", "jpeg")}
+    assert Image.open(BytesIO(variants[64, "webp"])).size == (64, 64)
+    assert Image.open(BytesIO(variants[64, "jpeg"])).format == "JPEG"
+
+
+def test_etag():
+    assert etag(b"abc") == etag(b"abc") != etag(b"abd")
+    assert etag(b"abc").startswith('"') and etag(b"abc").endswith('"')
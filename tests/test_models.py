@@ -0,0 +1,49 @@
+import orjson
+import pytest
+
+from adsb_api.utils.models import Plane, PlaneList, parse_plane_list, parse_planes
+
+
+def test_parse_plane_list_matches_pydantic():
+    body = orjson.dumps(
+        {
+            "planes": [
+                {"callsign": "BAW1", "lat": 51, "lng": "-0.5"},
+                {"callsign": "KLM2", "lat": 52.1, "lng": 4.7},
+            ]
+        }
+    )
+
+    planes = parse_plane_list(body)
+    assert planes == [Plane("BAW1", 51.0, -0.5), Plane("KLM2", 52.1, 4.7)]
+    assert [
+        (p.callsign, p.lat, p.lng) for p in PlaneList.model_validate_json(body).planes
+    ] == planes
+    assert not hasattr(planes[0], "__dict__")
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        b"[",
+        b"[]",
+        b"{}",
+        b'{"planes": null}',
+        b'{"planes": [1]}',
+        b'{"planes": [{"callsign": "A", "lat": 1}]}',
+        b'{"planes": [{"callsign": 1, "lat": 1, "lng": 1}]}',
+        b'{"planes": [{"callsign": "A", "lat": true, "lng": 1}]}',
+        b'{"planes": [{"callsign": "A", "lat": "x", "lng": 1}]}',
+        b'{"planes": [{"callsign": "A", "lat": [], "lng": 1}]}',
+        b'{"planes": [{"callsign": "A", "lat": "nan", "lng": 1}]}',
+        b'{"planes": [{"callsign": "A", "lat": 1, "lng": "-inf"}]}',
+        b'{"planes": [{"callsign": "A", "lat": 91, "lng": 1}]}',
+    ],
+)
+def test_parse_plane_list_rejects(body):
+    with pytest.raises(ValueError):
+        parse_plane_list(body)
+
+
+def test_parse_planes_empty():
+    assert parse_planes([]) == []
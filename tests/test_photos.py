@@ -0,0 +1,78 @@
+import asyncio
+import time
+
+import pytest
+
+from adsb_api.utils.photos import NOT_FOUND, PlanespottersProxy
+from adsb_api.utils.settings import REDIS_KEY_PLANESPOTTERS
+
+
+@pytest.fixture
+def proxy(fake_redis, monkeypatch):
+    proxy = PlanespottersProxy()
+    proxy.redis = fake_redis
+    proxy.calls = []
+
+    async def fetch(hex, reg, icao_type):
+        proxy.calls.append(hex)
+        await asyncio.sleep(0.01)
+        return proxy.upstream.get(hex)
+
+    proxy.upstream = {"4ca87c": b'{"photos":[]}'}
+    monkeypatch.setattr(proxy, "_fetch_upstream", fetch)
+    return proxy
+
+
+@pytest.mark.asyncio
+async def test_single_flight_and_normalized_key(proxy):
+    results = await asyncio.gather(
+        *(
+            proxy.get(h, reg=str(i))
+            for i, h in enumerate(["4CA87C", "4ca87c ", "4ca87c"])
+        )
+    )
+
+    assert results == [b'{"photos":[]}'] * 3
+    assert proxy.calls == ["4ca87c"]
+    assert await proxy.get("4ca87c", icao_type="A320") == b'{"photos":[]}'
+    assert proxy.calls == ["4ca87c"]
+
+
+@pytest.mark.asyncio
+async def test_negative_cache(proxy, fake_redis):
+    assert await proxy.get("abcdef") == NOT_FOUND
+    assert await proxy.get("abcdef") == NOT_FOUND
+    assert proxy.calls == ["abcdef"]
+    assert await proxy.get("not-a-hex") == NOT_FOUND
+    assert proxy.calls == ["abcdef"]
+
+
+@pytest.mark.asyncio
+async def test_stale_while_revalidate(proxy, fake_redis):
+    key = f"{REDIS_KEY_PLANESPOTTERS}:4ca87c"
+    fake_redis.data[key] = f"{int(time.time()) - 1}\n".encode() + b'{"photos":["old"]}'
+
+    assert await proxy.get("4ca87c") == b'{"photos":["old"]}'
+    await asyncio.gather(*proxy._refreshing)
+    assert fake_redis.data[key].endswith(b'{"photos":[]}')
+
+    # A failed refresh keeps serving the stale copy
+    fake_redis.data[key] = f"{int(time.time()) - 1}\n".encode() + b'{"photos":["old"]}'
+    proxy.upstream.clear()
+    assert await proxy.get("4ca87c") == b'{"photos":["old"]}'
+    await asyncio.gather(*proxy._refreshing)
+    assert fake_redis.data[key].endswith(b'{"photos":["old"]}')
+    assert await proxy.get("4ca87c") == b'{"photos":["old"]}'
+    assert not proxy._refreshing and proxy.calls == ["4ca87c", "4ca87c"]
+
+
+@pytest.mark.asyncio
+async def test_shutdown_cancels_inflight_fetches(proxy):
+    request = asyncio.create_task(proxy.get("4ca87c"))
+    await asyncio.sleep(0)
+    fetch = proxy._inflight["4ca87c"]
+
+    await proxy.shutdown()
+    assert fetch.cancelled()
+    with pytest.raises(asyncio.CancelledError):
+        await request
@@ -0,0 +1,33 @@
+from adsb_api.utils.plausible import plausible_batch
+
+EGLL = {"lat": 51.4706, "lon": -0.461941}
+KJFK = {"lat": 40.639751, "lon": -73.778925}
+EHAM = {"lat": 52.308601, "lon": 4.76389}
+
+
+def test_on_route():
+    # Over the Atlantic, roughly on the EGLL-KJFK great circle
+    assert plausible_batch([(54.0, -30.0)], [[EGLL, KJFK]]) == [True]
+
+
+def test_near_endpoint():
+    assert plausible_batch([(51.8, 0.2)], [[EGLL, KJFK]]) == [True]
+
+
+def test_off_route():
+    # Abeam the route, but far south of it
+    assert plausible_batch([(35.0, -30.0)], [[EGLL, KJFK]]) == [False]
+    # On the great circle, but well beyond the destination
+    assert plausible_batch([(35.0, -100.0)], [[EGLL, KJFK]]) == [False]
+
+
+def test_multi_leg_and_many_planes():
+    positions = [(52.0, 2.0), (54.0, -30.0), (35.0, -30.0), (10.0, 10.0)]
+    routes = [[EHAM, EGLL, KJFK], [EHAM, EGLL, KJFK], [EHAM, EGLL, KJFK], [EGLL]]
+
+    assert plausible_batch(positions, routes) == [True, True, False, False]
+
+
+def test_no_segments():
+    assert plausible_batch([], []) == []
+    assert plausible_batch([(1.0, 1.0)], [[]]) == [False]
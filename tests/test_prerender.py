@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+
+import pytest
+
+from adsb_api.utils.prerender import ScreenshotPrerenderer
+
+
+def test_hot_emergencies_first_then_popular():
+    p = ScreenshotPrerenderer(top_n=3, min_requests=2)
+    for icaos in (
+        ["aaaaaa"],
+        ["bbbbbb"],
+        ["bbbbbb"],
+        ["cccccc"],
+        ["cccccc"],
+        ["cccccc"],
+    ):
+        p.record(icaos)
+
+    assert p.hot(["eeeeee", "cccccc"]) == ["eeeeee", "cccccc", "bbbbbb"]
+    p._decay()
+    assert p.hot([]) == []
+    p._decay()
+    assert "aaaaaa" not in p.requests and "cccccc" in p.requests
+
+
+@pytest.mark.asyncio
+async def test_prerender_respects_waiting_users():
+    p = ScreenshotPrerenderer(top_n=5, min_requests=1)
+    rendered = []
+
+    async def render(icaos, min_ttl):
+        rendered.append(icaos)
+        return True
+
+    async def emergencies():
+        return ["eeeeee"]
+
+    saturated = False
+    pool = SimpleNamespace(waiters=0, saturated=lambda: saturated)
+    p.render, p.pool, p._emergencies = render, pool, emergencies
+    p.record(["aaaaaa", "bbbbbb"])
+    await p._prerender()
+    assert rendered == [["eeeeee"], ["aaaaaa", "bbbbbb"]] and p.stats["rendered"] == 2
+
+    p.pool.waiters = 1
+    p.record(["aaaaaa", "bbbbbb"])
+    await p._prerender()
+    assert p.stats["deferred"] == 2 and len(rendered) == 2
+
+    # No healthy browser: the cycle is skipped instead of queueing for a tab
+    p.pool.waiters, saturated = 0, True
+    await p._prerender()
+    assert p.stats["saturated"] == 1 and len(rendered) == 2
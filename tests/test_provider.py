@@ -0,0 +1,272 @@
+import orjson
+import pytest
+
+from adsb_api.utils.provider import (
+    FeederData,
+    Provider,
+    RedisVRS,
+    _UNKNOWN_ROUTE,
+    _beast_by_ip,
+    _join_route,
+    _mlat_by_ip,
+    _parse_airport,
+    _receiver_views,
+    _route_index_keys,
+    with_plausible,
+)
+from adsb_api.utils.settings import (
+    REDIS_KEY_BEAST_BY_IP,
+    REDIS_KEY_BEAST_CLIENTS,
+    REDIS_KEY_BEAST_COUNT,
+    REDIS_KEY_HUB_AIRCRAFT,
+    REDIS_KEY_RECEIVER_AIRCRAFT,
+    REDIS_KEY_VRS_INDEX,
+    REDIS_KEY_VRS_LIVE,
+    REDIS_KEY_VRS_ROUTE,
+    REDIS_KEY_VRS_ROUTES_VERSION,
+)
+
+
+AIRPORTS = {
+    a["icao"]: a
+    for a in map(
+        _parse_airport,
+        [
+            "EGLL,London Heathrow,,LHR,London,GB,51.4706,-0.461941,83",
+            'KJFK,"John F Kennedy, Intl",,JFK,New York,US,40.639751,-73.778925,13',
+            "EHAM,Schiphol,,AMS,Amsterdam,NL,52.308601,4.76389,-11",
+        ],
+    )
+}
+
+
+def test_parse_airport():
+    assert AIRPORTS["KJFK"]["name"] == "John F Kennedy, Intl"
+    assert AIRPORTS["EGLL"]["alt_meters"] == 25.3
+    assert (
+        _parse_airport(
+            "Code,Name,ICAO,IATA,Location,CountryISO2,Latitude,Longitude,AltitudeFeet"
+        )
+        is None
+    )
+
+
+def test_join_route():
+    route = _join_route("BAW1,BA,1,BAW,EHAM-EGLL-KJFK", AIRPORTS)
+
+    assert route["callsign"] == "BAW1"
+    assert route["_airport_codes_iata"] == "AMS-LHR-JFK"
+    assert [a["icao"] for a in route["_airports"]] == ["EHAM", "EGLL", "KJFK"]
+    assert len(route["_segment_lengths_nm"]) == 2
+    assert 2900 < route["_segment_lengths_nm"][1] < 3100
+
+
+def test_join_route_unknown_airports():
+    route = _join_route("XYZ1,XY,1,XYZ,EGLL-ZZZZ", AIRPORTS)
+
+    assert route["_airport_codes_iata"] == "LHR-ZZZZ"
+    assert route["_segment_lengths_nm"] == []
+    assert _join_route("XYZ2,XY,2,XYZ,unknown", AIRPORTS)["_airports"] == []
+
+
+def test_with_plausible():
+    route = orjson.dumps(_join_route("BAW1,BA,1,BAW,EGLL-KJFK", AIRPORTS))
+
+    assert orjson.loads(with_plausible(route, True))["plausible"] is True
+    assert orjson.loads(with_plausible(route, False))["plausible"] is False
+
+
+@pytest.mark.asyncio
+async def test_resolve_routes_caches_per_layer(fake_redis):
+    vrs = RedisVRS()
+    vrs.redis = fake_redis
+    fake_redis.data[f"{REDIS_KEY_VRS_ROUTE}:BAW1"] = orjson.dumps(
+        _join_route("BAW1,BA,1,BAW,EGLL-KJFK", AIRPORTS)
+    )
+
+    routes = await vrs.resolve_routes([("BAW1", 54.0, -30.0), ("NOPE1", 1.0, 1.0)])
+    assert orjson.loads(routes["BAW1"])["plausible"] is True
+    assert orjson.loads(routes["NOPE1"]) == {**_UNKNOWN_ROUTE, "callsign": "NOPE1"}
+    assert (
+        vrs.cache_stats["route", "miss"] == 2
+        and vrs.cache_stats["plausible", "miss"] == 1
+    )
+
+    # Same cell: both layers hit. Far away: route hit, plausible recomputed.
+    routes = await vrs.resolve_routes([("BAW1", 54.0, -30.0)])
+    assert orjson.loads(routes["BAW1"])["plausible"] is True
+    routes = await vrs.resolve_routes([("BAW1", 35.0, -30.0)])
+    assert orjson.loads(routes["BAW1"])["plausible"] is False
+    assert vrs.cache_stats["route", "hit"] == 2
+    assert (
+        vrs.cache_stats["plausible", "hit"] == 1
+        and vrs.cache_stats["plausible", "miss"] == 2
+    )
+
+
+def test_route_index_keys():
+    assert _route_index_keys(_join_route("BAW1,BA,1,BAW,EHAM-EGLL-KJFK", AIRPORTS)) == {
+        "airline:BAW",
+        "airport:EHAM",
+        "airport:EGLL",
+        "airport:KJFK",
+        "pair:EHAM-EGLL",
+        "pair:EHAM-KJFK",
+        "pair:EGLL-KJFK",
+    }
+    assert _route_index_keys(_join_route("N123,,,,unknown", AIRPORTS)) == set()
+
+
+@pytest.mark.asyncio
+async def test_get_indexed_routes_live(fake_redis):
+    vrs = RedisVRS()
+    vrs.redis = fake_redis
+    for row in ("BAW1,BA,1,BAW,EGLL-KJFK", "BAW3,BA,3,BAW,EGLL-KJFK"):
+        route = _join_route(row, AIRPORTS)
+        fake_redis.data[f"{REDIS_KEY_VRS_ROUTE}:{route['callsign']}"] = orjson.dumps(
+            route
+        )
+    fake_redis.data[f"{REDIS_KEY_VRS_INDEX}:pair:EGLL-KJFK"] = orjson.dumps(
+        ["BAW1", "BAW3"]
+    )
+    fake_redis.data[REDIS_KEY_VRS_LIVE] = {
+        "BAW3": orjson.dumps({"hex": "400001", "lat": 54.0, "lon": -30.0})
+    }
+
+    routes = [
+        orjson.loads(r) for r in await vrs.get_indexed_routes("pair", "EGLL-KJFK")
+    ]
+    assert [r["callsign"] for r in routes] == ["BAW1", "BAW3"]
+
+    routes = [
+        orjson.loads(r)
+        for r in await vrs.get_indexed_routes("pair", "EGLL-KJFK", live=True)
+    ]
+    assert [(r["callsign"], r["live"]["hex"]) for r in routes] == [("BAW3", "400001")]
+    assert await vrs.get_indexed_routes("airport", "EHAM") == []
+
+
+def test_receiver_views():
+    a1 = {"hex": "400001", "recentReceiverIds": ["r1", "r2"]}
+    a3 = {"hex": "400003", "alt_baro": 1000, "recentReceiverIds": ["r2"]}
+    views = _receiver_views([
+        {"aircraft": [a1, {"hex": "400002"}]},
+        {"aircraft": [a3]},
+    ])
+
+    assert set(views) == {"r1", "r2"}
+    r2 = orjson.loads(b"[" + views["r2"].blob() + b"]")
+    assert r2 == [{"hex": "400001"}, {"hex": "400003", "alt_baro": 1000}]
+    # One serialized record shared by every receiver that sees the aircraft
+    assert views["r1"].aircraft["400001"] is views["r2"].aircraft["400001"]
+
+
+@pytest.mark.asyncio
+async def test_get_my_aircraft_and_receiver(fake_redis):
+    feeder = FeederData()
+    feeder.redis = fake_redis
+    r1, r2 = "a" * 18, "b" * 18
+    fake_redis.data.update({
+        "my:uid1": f"{r1}extra".encode(), "my:uid2": r2.encode(),
+        f"{REDIS_KEY_RECEIVER_AIRCRAFT}:{r1}": b'{"hex":"400001"}',
+        f"{REDIS_KEY_RECEIVER_AIRCRAFT}:{r2}": b'{"hex":"400002"},{"hex":"400003"}',
+        f"receiver:{r2}": orjson.dumps([r2, 1.0, 2.0]),
+    })
+
+    aircraft = orjson.loads(await feeder.get_my_aircraft(["uid1", "nope", "uid2"]))
+    assert aircraft == [{"hex": "400001"}, {"hex": "400002"}, {"hex": "400003"}]
+    assert await feeder.get_my_aircraft(["nope"]) == b"[]"
+    assert await feeder.get_my_receiver(["uid1", "uid2"]) == [r2, 1.0, 2.0]
+    assert await feeder.get_my_receiver([]) is None
+
+
+def test_clients_by_ip():
+    beast = _beast_by_ip(
+        [
+            {"ip": "1.2.3.4", "_uuid": "secret", "ms": 5},
+            {"ip": "1.2.3.4", "_uuid": "s2", "ms": -1},
+            {"ip": "5.6.7.8", "_uuid": "s3", "ms": 1},
+        ]
+    )
+    assert orjson.loads(beast["1.2.3.4"]) == [
+        {"ip": "1.2.3.4", "ms": 5},
+        {"ip": "1.2.3.4", "ms": -1},
+    ]
+
+    a = {"source_ip": "1.2.3.4", "user": "a", "uuid": ["0123456789abcdef"], "lat": 1.0}
+    mlat = _mlat_by_ip({"0A": {"a": a}, "0B": {"b": {"user": "b"}}})
+    assert orjson.loads(mlat["1.2.3.4"]) == [{"user": "a", "uuid": "0123456789abc-..."}]
+    assert len(mlat) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_me(fake_redis):
+    provider = Provider(enabled_bg_tasks=[])
+    provider.redis = fake_redis
+    fake_redis.data[REDIS_KEY_BEAST_BY_IP] = _beast_by_ip([{"ip": "1.2.3.4", "ms": 5}])
+    fake_redis.data[REDIS_KEY_BEAST_COUNT] = b"1234"
+    fake_redis.data[REDIS_KEY_HUB_AIRCRAFT] = b"9000"
+
+    assert await provider.get_me("1.2.3.4") == (
+        [{"ip": "1.2.3.4", "ms": 5}],
+        [],
+        {"beast": 1234, "mlat": 0, "aircraft": 9000},
+    )
+    assert await provider.get_clients_per_client_ip("9.9.9.9") == []
+
+
+@pytest.mark.asyncio
+async def test_json_gets_decodes_once_per_version(fake_redis):
+    provider = Provider(enabled_bg_tasks=[])
+    provider.redis = fake_redis
+    fake_redis.data[REDIS_KEY_BEAST_CLIENTS] = orjson.dumps([{"ip": "1.2.3.4"}])
+    fake_redis.data[f"{REDIS_KEY_BEAST_CLIENTS}:version"] = b"1"
+    fake_redis.data[REDIS_KEY_HUB_AIRCRAFT] = b"9000"
+
+    first = await provider._json_gets([REDIS_KEY_BEAST_CLIENTS, REDIS_KEY_HUB_AIRCRAFT])
+    assert first == {
+        REDIS_KEY_BEAST_CLIENTS: [{"ip": "1.2.3.4"}],
+        REDIS_KEY_HUB_AIRCRAFT: 9000,
+    }
+    again = await provider._json_get(REDIS_KEY_BEAST_CLIENTS)
+    assert again is first[REDIS_KEY_BEAST_CLIENTS]
+    # Unversioned keys are never cached
+    assert provider.snapshot_stats == {"hit": 1, "miss": 2}
+
+    fake_redis.data[REDIS_KEY_BEAST_CLIENTS] = orjson.dumps([])
+    fake_redis.data[f"{REDIS_KEY_BEAST_CLIENTS}:version"] = b"2"
+    assert await provider._json_get(REDIS_KEY_BEAST_CLIENTS) == []
+
+
+@pytest.mark.asyncio
+async def test_route_cache_follows_dataset_version(fake_redis):
+    vrs = RedisVRS()
+    vrs.redis = fake_redis
+
+    async def codes():
+        routes = await vrs.resolve_routes([("BAW1", 54.0, -30.0)])
+        return orjson.loads(routes["BAW1"])["airport_codes"]
+
+    assert await codes() == "unknown"
+    route = _join_route("BAW1,BA,1,BAW,EGLL-KJFK", AIRPORTS)
+    fake_redis.data[f"{REDIS_KEY_VRS_ROUTE}:BAW1"] = orjson.dumps(route)
+    fake_redis.data[REDIS_KEY_VRS_ROUTES_VERSION] = b"2"
+    assert await codes() == "unknown"
+    vrs._routes_version_checked = 0.0  # next check is due
+    assert await codes() == "EGLL-KJFK"
+
+
+@pytest.mark.asyncio
+async def test_warm_local_routes(fake_redis):
+    vrs = RedisVRS()
+    vrs.redis = fake_redis
+    fake_redis.data[f"{REDIS_KEY_VRS_ROUTE}:BAW1"] = orjson.dumps(
+        _join_route("BAW1,BA,1,BAW,EGLL-KJFK", AIRPORTS)
+    )
+    fake_redis.data[REDIS_KEY_VRS_LIVE] = {"BAW1": b"{}", "NOPE1": b"{}"}
+
+    await vrs._warm_local_routes()
+    await vrs.resolve_routes([("BAW1", 54.0, -30.0), ("NOPE1", 1.0, 1.0)])
+    assert (
+        vrs.cache_stats["route", "hit"] == 2 and vrs.cache_stats["route", "miss"] == 0
+    )
@@ -0,0 +1,39 @@
+import pytest
+
+from adsb_api.utils.provider import RedisVRS
+from adsb_api.utils.redis_connections import RedisConnections
+
+
+class FakeReplica:
+    def __init__(self, info):
+        self._info = info
+
+    async def info(self, section):
+        if isinstance(self._info, Exception):
+            raise self._info
+        return self._info
+
+
+@pytest.mark.asyncio
+async def test_replica_routing(fake_redis):
+    up = FakeReplica({"role": "slave", "master_link_status": "up"})
+    lagging = FakeReplica({"role": "slave", "master_link_status": "down"})
+    connections = RedisConnections(
+        url="redis://primary", replica_urls=["redis://a", "redis://b", "redis://c"]
+    )
+    connections.replicas = [up, lagging, FakeReplica(ConnectionError("refused"))]
+    await connections._check_replicas()
+
+    vrs = RedisVRS()
+    vrs.redis, vrs.connections = fake_redis, connections
+    assert connections.healthy_replicas() == 1
+    assert vrs.redis_ro is up and vrs.redis_ro is up
+
+    # Nothing healthy, or routing turned off: reads go to the primary
+    connections.route_reads = False
+    assert vrs.redis_ro is fake_redis
+    connections.route_reads = True
+    connections.replicas = [lagging]
+    await connections._check_replicas()
+    assert vrs.redis_ro is fake_redis
+    assert connections.stats == {"replica": 2, "primary": 2}
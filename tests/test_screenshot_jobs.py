@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from adsb_api.utils.screenshot_jobs import ScreenshotJobs
+
+
+@pytest.fixture
+def jobs(fake_redis):
+    jobs = ScreenshotJobs(claim_ttl=1)
+    jobs.redis = fake_redis
+    fake_redis.zadd = fake_redis.zremrangebyscore = fake_redis.zrem = (
+        lambda *args, **kwargs: asyncio.sleep(0)
+    )
+
+    async def delete(key):
+        fake_redis.data.pop(key, None)
+
+    async def publish(channel, cache_key):
+        jobs._wake(cache_key)
+
+    async def eval(script, numkeys, job_key, jobs_key, token, cache_key):
+        if fake_redis.data.get(job_key) == token.encode():
+            del fake_redis.data[job_key]
+
+    fake_redis.delete, fake_redis.publish, fake_redis.eval = delete, publish, eval
+    return jobs
+
+
+@pytest.mark.asyncio
+async def test_waiter_woken_by_renderer(jobs, fake_redis):
+    cached, token = await jobs.acquire("screenshot:abc")
+    assert cached is None and token
+    waiter = asyncio.create_task(jobs.acquire("screenshot:abc"))
+    await asyncio.sleep(0.01)
+    assert jobs.waiting() == 1 and not waiter.done()
+
+    fake_redis.data["screenshot:abc"] = b"png"
+    await jobs.finish("screenshot:abc", token)
+    assert await asyncio.wait_for(waiter, 0.1) == (b"png", None)
+    assert jobs.stats["claimed"] == 1 and jobs.rendering == 0 and jobs.waiting() == 0
+
+
+@pytest.mark.asyncio
+async def test_waiter_takes_over_failed_job(jobs):
+    _, token = await jobs.acquire("screenshot:abc")
+    waiter = asyncio.create_task(jobs.acquire("screenshot:abc"))
+    await asyncio.sleep(0.01)
+
+    # Renderer gave up without caching anything: the waiter claims the job
+    await jobs.finish("screenshot:abc", token)
+    cached, new_token = await asyncio.wait_for(waiter, 0.1)
+    assert cached is None and new_token != token
+    assert jobs.stats["claimed"] == 2
+
+
+@pytest.mark.asyncio
+async def test_acquire_times_out(jobs):
+    assert (await jobs.acquire("screenshot:abc"))[1]
+    with pytest.raises(asyncio.TimeoutError):
+        await jobs.acquire("screenshot:abc", timeout=0.05)
+    assert jobs.stats["timeouts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_finish_keeps_newer_claim(jobs, fake_redis):
+    stale = await jobs.claim("screenshot:abc")
+    # The claim expired and another renderer took the job over
+    del fake_redis.data["screenshot:abc:job"]
+    current = await jobs.claim("screenshot:abc")
+
+    await jobs.finish("screenshot:abc", stale)
+    assert fake_redis.data["screenshot:abc:job"] == current.encode()
+    assert await jobs.claim("screenshot:abc") is None
@@ -0,0 +1,41 @@
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from adsb_api.utils.static_map import StaticMapRenderer, fit_zoom, to_pixel
+
+
+def test_to_pixel_and_zoom():
+    assert to_pixel(0, 0, 0) == pytest.approx((128, 128))
+    assert to_pixel(0, 180, 1) == pytest.approx((512, 256))
+    # 1 km box around a single aircraft: clamped to 60 km like the browser view
+    assert fit_zoom((51.0, -0.5, 51.01, -0.49)) == 9
+    assert fit_zoom((35.0, -120.0, 50.0, 10.0)) < 5
+
+
+@pytest.mark.asyncio
+async def test_render_from_tile_cache(tmp_path):
+    renderer = StaticMapRenderer(tile_dir=str(tmp_path))
+    tile = BytesIO()
+    Image.new("RGB", (256, 256), (0, 128, 0)).save(tile, format="PNG")
+    for x in range(250, 260):
+        for y in range(165, 175):
+            path = tmp_path / "9" / str(x) / f"{y}.png"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(tile.getvalue())
+
+    async def trail(hex):
+        return [(51.40, -0.50), (51.47, -0.46)]
+
+    renderer._trail = trail
+    aircraft = [
+        {"hex": "400001", "lat": 51.47, "lon": -0.46, "track": 90, "flight": "BAW1  "}
+    ]
+    img = Image.open(
+        BytesIO(await renderer.render(aircraft, (51.465, -0.465, 51.475, -0.455)))
+    )
+
+    assert img.size == (256, 256)
+    assert img.getpixel((128, 128)) == (255, 204, 0)  # the icon, centred
+    assert img.getpixel((5, 250)) == (0, 128, 0)  # cached tile, no network
@@ -0,0 +1,36 @@
+import pytest
+
+from adsb_api.utils import timing
+
+
+def test_histogram_lines():
+    h = timing.Histogram(buckets=(0.1, 1.0))
+    for v in (0.05, 0.1, 0.5, 3.0):
+        h.observe(v)
+
+    assert h.lines("x", 'stage="a"') == [
+        'x_bucket{stage="a",le="0.1"} 2',
+        'x_bucket{stage="a",le="1.0"} 3',
+        'x_bucket{stage="a",le="+Inf"} 4',
+        'x_sum{stage="a"} 3.650000',
+        'x_count{stage="a"} 4',
+    ]
+
+
+@pytest.mark.asyncio
+async def test_span_collects_per_request():
+    timing.histograms.clear()
+    with timing.span("untracked"):
+        pass
+    spans = timing.collect()
+    with timing.span("find_hex"):
+        pass
+    timing.observe("browser", "tab_acquire", 0.25)
+
+    assert [stage for stage, _ in spans] == ["find_hex", "tab_acquire"]
+    assert timing.server_timing(spans).endswith("tab_acquire;dur=250.0")
+    assert timing.histograms["screenshot", "untracked"].count == 1
+    assert any(
+        'pipeline="browser",stage="tab_acquire",le="0.25"} 1' in line
+        for line in timing.metrics_lines()
+    )